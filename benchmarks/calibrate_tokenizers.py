@@ -0,0 +1,106 @@
+"""Fit chars-per-token ratios on our corpus and store them in config/tokenizers.yaml.
+
+Families with a local exact encoding (see `get_tokenizer`) are fitted from the
+JSON files under data/. Other families need token counts reported by the
+provider: pass a JSONL file of {"model": ..., "text": ..., "tokens": ...} records.
+
+Usage:
+    python -m benchmarks.calibrate_tokenizers [--families openai] [--usage usage.jsonl] [--write]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.tokenizers import (chars_per_token, count_tokens_batch, fit_chars_per_token,
+                                  get_tokenizer, provider_family)
+
+CONFIG_PATH = os.path.join("config", "tokenizers.yaml")
+
+# Model names whose local encoding is exact for the family
+_EXACT_MODELS = {"openai": "gpt-4"}
+
+
+def corpus_texts(root: str = "data", min_chars: int = 200):
+    """Every string of at least `min_chars` characters in the JSON files under `root`."""
+    texts = []
+
+    def collect(value):
+        if isinstance(value, str):
+            if len(value) >= min_chars:
+                texts.append(value)
+        elif isinstance(value, dict):
+            for item in value.values():
+                collect(item)
+        elif isinstance(value, list):
+            for item in value:
+                collect(item)
+
+    for directory, _, files in os.walk(root):
+        for file_name in sorted(files):
+            if file_name.endswith(".json"):
+                with open(os.path.join(directory, file_name), "r") as f:
+                    collect(json.load(f))
+    return texts
+
+
+def write_ratios(ratios, path: str = CONFIG_PATH):
+    """Update `chars_per_token` entries in place, keeping the file's comments."""
+    with open(path, "r") as f:
+        content = f.read()
+    for family, ratio in ratios.items():
+        pattern = re.compile(rf"^(\s+){re.escape(family)}:\s*[\d.]+\s*$", re.MULTILINE)
+        if pattern.search(content):
+            content = pattern.sub(rf"\g<1>{family}: {ratio:.2f}", content)
+        else:
+            content = re.sub(r"^(\s+)default:\s*[\d.]+\s*$",
+                             rf"\g<0>\n\g<1>{family}: {ratio:.2f}", content, count=1, flags=re.MULTILINE)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate chars-per-token ratios")
+    parser.add_argument("--families", default="openai",
+                        help="Comma-separated families to fit from the local corpus")
+    parser.add_argument("--usage", help="JSONL of provider-reported token counts")
+    parser.add_argument("--write", action="store_true", help=f"Store the ratios in {CONFIG_PATH}")
+    args = parser.parse_args()
+
+    samples = defaultdict(lambda: ([], []))
+    texts = corpus_texts()
+    for family in filter(None, (name.strip() for name in args.families.split(","))):
+        model_name = _EXACT_MODELS.get(family)
+        if model_name is None or get_tokenizer(model_name) is None:
+            print(f"Skipping {family}: no exact local encoding (use --usage)")
+            continue
+        samples[family][0].extend(texts)
+        samples[family][1].extend(count_tokens_batch(texts, model_name).tolist())
+
+    if args.usage:
+        with open(args.usage, "r") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    family_texts, family_counts = samples[provider_family(record["model"])]
+                    family_texts.append(record["text"])
+                    family_counts.append(record["tokens"])
+
+    ratios = {}
+    for family, (family_texts, family_counts) in sorted(samples.items()):
+        ratios[family] = fit_chars_per_token(family_texts, family_counts)
+        print(f"{family:10s} {ratios[family]:.2f} chars/token "
+              f"(was {chars_per_token(family):.2f}, {len(family_texts):,} samples)")
+
+    if args.write and ratios:
+        write_ratios(ratios)
+        print(f"Ratios written to {CONFIG_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark loading per-model results for reports: YAML files vs. the results store.
+
+A full report pass loads every model's results about ten times (comparison
+matrices, cost analysis, charts and recommendations). Before the results
+store, each load re-parsed every YAML file.
+
+Usage:
+    python -m benchmarks.report_loading [--files 2000] [--loads 10]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.results_store import ResultsStore
+
+
+def write_results(yaml_dir: str, count: int):
+    """Per-model result files in the results/yaml layout."""
+    categories = ["ppt_writing", "reasoning", "code", "factual", "context"]
+    for i in range(count):
+        metrics = {"accuracy": 0.5 + i % 50 / 100, "total_tokens": 1000 + i, "total_cost_usd": 0.01 * i,
+                   "average_cost_per_request": 0.001 * i, "average_processing_time_seconds": 1.5}
+        document = {"model": f"model_{i}", "aggregate_metrics": metrics,
+                    "results_by_category": {category: {**metrics, "test_count": 10} for category in categories}}
+        with open(os.path.join(yaml_dir, f"model_{i}.yaml"), "w") as f:
+            yaml.safe_dump(document, f)
+
+
+def load_yaml_files(yaml_dir: str):
+    """What each reporter method used to do."""
+    model_data = {}
+    for yaml_file in [f for f in os.listdir(yaml_dir) if f.endswith('.yaml')]:
+        with open(f"{yaml_dir}/{yaml_file}", 'r') as f:
+            data = yaml.safe_load(f)
+            model_data[data.get("model", yaml_file.replace(".yaml", ""))] = data
+    return model_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark report data loading")
+    parser.add_argument("--files", type=int, default=2000, help="Per-model result files")
+    parser.add_argument("--loads", type=int, default=10, help="Loads per report pass")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        yaml_dir = os.path.join(tmp, "yaml")
+        os.makedirs(yaml_dir)
+        write_results(yaml_dir, args.files)
+        print(f"{args.files:,} result files, {args.loads} loads per report pass")
+
+        start = time.perf_counter()
+        for _ in range(args.loads):
+            expected = load_yaml_files(yaml_dir)
+        yaml_time = time.perf_counter() - start
+
+        store = ResultsStore(os.path.join(tmp, "results.db"))
+        start = time.perf_counter()
+        store.sync_yaml_dir(yaml_dir)
+        import_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.loads):
+            store.sync_yaml_dir(yaml_dir)
+            documents = store.model_documents()
+        store_time = time.perf_counter() - start
+        store.close()
+
+        assert documents == expected, "store documents differ from the YAML files"
+        print(f"YAML parsed on every load:     {yaml_time:8.3f}s")
+        print(f"Results store, first import:   {import_time:8.3f}s")
+        print(f"Results store, report pass:    {store_time:8.3f}s  ({yaml_time / store_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
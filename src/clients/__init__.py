@@ -6,4 +6,5 @@ from .google_client import GoogleClient
 from .mistral_client import MistralClient
 from .meta_client import MetaClient
 from .others import DatabricksClient
-from .others import CohereClient
\ No newline at end of file
+from .others import CohereClient
+from .mock_client import MockClient
@@ -1,6 +1,7 @@
 # src/clients/base_client.py
 """Base client class for interacting with LLM APIs."""
 
+import asyncio
 import time
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Any
@@ -17,16 +18,27 @@ class BaseClient(ABC):
             model_config: Dictionary containing model configuration
         """
         self.name = "base"
+        self.api_key = api_key
 
         if model_config:
-            self.model_name = model_config.get("name", "unknown")
-            self.display_name = model_config.get("display_name", "Unknown Model")
-            self.version = model_config.get("version", "1.0")
-            self.api_key = api_key
-            self.max_tokens = model_config.get("max_tokens", 4096)
-            self.context_window = model_config.get("context_window", 4096)
-            self.defaults = model_config.get("defaults", {})
-            self.cost_config = model_config.get("cost", {})
+            self.configure(model_config)
+
+    def configure(self, model_config: Dict[str, Any]):
+        """
+        Apply a model configuration (an entry of config/models/*.yaml).
+
+        Args:
+            model_config: Dictionary containing model configuration
+        """
+        self.model_name = model_config.get("name", "unknown")
+        self.display_name = model_config.get("display_name", "Unknown Model")
+        self.version = model_config.get("version", "1.0")
+        self.max_tokens = model_config.get("max_tokens", 4096)
+        self.context_window = model_config.get("context_window", 4096)
+        self.defaults = model_config.get("defaults", {})
+        self.cost_config = model_config.get("cost", {})
+        # Provider prompt caching: enabled, read_multiplier, write_multiplier, min_prefix_tokens
+        self.prompt_caching = model_config.get("prompt_caching") or {}
 
     @abstractmethod
     def generate(self, prompt: str, config: Optional[Dict[str, Any]] = None) -> str:
@@ -42,19 +54,191 @@ class BaseClient(ABC):
         """
         pass
 
-    def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
+    async def generate_response(self,
+                                prompt: str,
+                                system_prompt: Optional[str] = None,
+                                temperature: Optional[float] = None,
+                                cache_prefix: Optional[str] = None,
+                                **kwargs) -> Dict[str, Any]:
+        """
+        Generate a response with usage, timing and cost information.
+
+        This is the interface evaluators use to call a judge model. The
+        blocking `generate` call runs in a worker thread so that many
+        judgments can be awaited concurrently. The estimated cost is reserved
+        on the shared cost ledger before the call and settled afterwards.
+
+        Args:
+            prompt: User prompt/input text
+            system_prompt: Optional system prompt
+            temperature: Sampling temperature, or None for the model default
+            cache_prefix: Stable leading part of `prompt` to mark cacheable when the
+                model has `prompt_caching` enabled (see `layout_prompt`)
+            **kwargs: Additional configuration parameters
+
+        Returns:
+            Dictionary with "text", "usage", "timing" and "cost"
+
+        Raises:
+            BudgetExceededError: If the call would exceed a run, model or provider budget
+        """
+        from ..utils.cost_tracker import get_cost_ledger
+
+        config = self._call_config(system_prompt, temperature, kwargs)
+        prompt_tokens = self._count_prompt_tokens(prompt, system_prompt)
+        cache_prefix = self._cacheable_prefix(prompt, cache_prefix)
+        if cache_prefix:
+            config["cache_prefix"] = cache_prefix
+
+        ledger = get_cost_ledger()
+        reservation = await ledger.reserve_async(
+            self._ledger_model_name(), self.name, self._estimate_call_cost(prompt_tokens, config)
+        )
+        start_time = time.time()
+        try:
+            text = await asyncio.to_thread(self.generate, prompt, config)
+        except Exception:
+            ledger.release(reservation)
+            raise
+        return self._charge(ledger, reservation, text, prompt_tokens, start_time, system_prompt, cache_prefix)
+
+    def generate_with_cost(self,
+                           prompt: str,
+                           system_prompt: Optional[str] = None,
+                           temperature: Optional[float] = None,
+                           cache_prefix: Optional[str] = None,
+                           **kwargs) -> Dict[str, Any]:
+        """
+        Blocking version of `generate_response`, charged to the cost ledger the same way.
+
+        Args:
+            prompt: User prompt/input text
+            system_prompt: Optional system prompt
+            temperature: Sampling temperature, or None for the model default
+            cache_prefix: Stable leading part of `prompt` to mark cacheable when the
+                model has `prompt_caching` enabled (see `layout_prompt`)
+            **kwargs: Additional configuration parameters
+
+        Returns:
+            Dictionary with "text", "usage", "timing" and "cost"
+
+        Raises:
+            BudgetExceededError: If the call would exceed a run, model or provider budget
+        """
+        from ..utils.cost_tracker import get_cost_ledger
+
+        config = self._call_config(system_prompt, temperature, kwargs)
+        prompt_tokens = self._count_prompt_tokens(prompt, system_prompt)
+        cache_prefix = self._cacheable_prefix(prompt, cache_prefix)
+        if cache_prefix:
+            config["cache_prefix"] = cache_prefix
+
+        ledger = get_cost_ledger()
+        reservation = ledger.reserve(
+            self._ledger_model_name(), self.name, self._estimate_call_cost(prompt_tokens, config)
+        )
+        start_time = time.time()
+        try:
+            text = self.generate(prompt, config)
+        except Exception:
+            ledger.release(reservation)
+            raise
+        return self._charge(ledger, reservation, text, prompt_tokens, start_time, system_prompt, cache_prefix)
+
+    def _call_config(self, system_prompt: Optional[str], temperature: Optional[float],
+                     kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge model defaults with per-call parameters."""
+        config = dict(getattr(self, "defaults", {}))
+        config.update(kwargs)
+        if system_prompt is not None:
+            config["system_prompt"] = system_prompt
+        if temperature is not None:
+            config["temperature"] = temperature
+        return config
+
+    def _ledger_model_name(self) -> str:
+        return getattr(self, "model_name", self.name)
+
+    def _count_prompt_tokens(self, prompt: str, system_prompt: Optional[str]) -> int:
+        from ..utils.tokenizers import count_tokens
+        return count_tokens((system_prompt or "") + prompt, self._ledger_model_name())
+
+    def _estimate_call_cost(self, prompt_tokens: int, config: Dict[str, Any]) -> float:
+        """Upper estimate of a call's cost, assuming the full output token limit is used."""
+        output_tokens = config.get("max_output_tokens") or config.get("max_tokens") or 1024
+        return self.calculate_cost(prompt_tokens, output_tokens)
+
+    def _cacheable_prefix(self, prompt: str, cache_prefix: Optional[str]) -> str:
+        """The requested cache prefix, or "" if caching is off or it does not start the prompt."""
+        if not cache_prefix or not getattr(self, "prompt_caching", {}).get("enabled", False):
+            return ""
+        return cache_prefix if prompt.startswith(cache_prefix) else ""
+
+    def cache_usage(self, system_prompt: Optional[str], cache_prefix: str) -> Dict[str, int]:
+        """
+        Input tokens of the last call that were read from or written to the provider's prompt cache.
+
+        Providers report these in their API usage; clients override this to surface them.
+
+        Args:
+            system_prompt: System prompt sent with the call
+            cache_prefix: Prefix marked cacheable for the call, or "" if none
+
+        Returns:
+            Dictionary with cached_input_tokens and cache_write_tokens
+        """
+        return {"cached_input_tokens": 0, "cache_write_tokens": 0}
+
+    def _charge(self, ledger: Any, reservation: int, text: str, prompt_tokens: int,
+                start_time: float, system_prompt: Optional[str] = None, cache_prefix: str = "") -> Dict[str, Any]:
+        """Settle a reservation with the actual cost and build the response dictionary."""
+        from ..utils.tokenizers import count_tokens
+
+        timing = self._create_timing_info(start_time)
+        completion_tokens = count_tokens(text, self._ledger_model_name())
+        cache = self.cache_usage(system_prompt, cache_prefix)
+        cost = self.calculate_cost(prompt_tokens, completion_tokens,
+                                   cache["cached_input_tokens"], cache["cache_write_tokens"])
+        ledger.settle(reservation, cost)
+
+        return {
+            "text": text,
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "cached_input_tokens": cache["cached_input_tokens"],
+                "cache_write_tokens": cache["cache_write_tokens"],
+                "uncached_input_tokens": prompt_tokens - cache["cached_input_tokens"] - cache["cache_write_tokens"]
+            },
+            "timing": timing,
+            "cost": cost
+        }
+
+    def calculate_cost(self, input_tokens: int, output_tokens: int,
+                       cached_input_tokens: int = 0, cache_write_tokens: int = 0) -> float:
         """
-        Calculate the cost of a request.
+        Calculate the cost of a request from the model's `cost:` configuration.
 
         Args:
-            input_tokens: Number of input tokens
+            input_tokens: Number of input tokens, including cached ones
             output_tokens: Number of output tokens
+            cached_input_tokens: Input tokens read from the prompt cache (`read_multiplier` of the input rate)
+            cache_write_tokens: Input tokens written to the prompt cache (`write_multiplier` of the input rate)
 
         Returns:
             Cost in USD
         """
-        input_cost = (input_tokens / 1000) * self.cost_config.get("input_per_1k", 0)
-        output_cost = (output_tokens / 1000) * self.cost_config.get("output_per_1k", 0)
+        cost_config = getattr(self, "cost_config", None)
+        if not cost_config:
+            from ..utils.cost_tracker import get_cost_rates
+            cost_config = get_cost_rates(self._ledger_model_name())
+        caching = getattr(self, "prompt_caching", {})
+        billed_input = (input_tokens - cached_input_tokens - cache_write_tokens
+                        + cached_input_tokens * caching.get("read_multiplier", 0.1)
+                        + cache_write_tokens * caching.get("write_multiplier", 1.25))
+        input_cost = (billed_input / 1000) * cost_config.get("input_per_1k", 0)
+        output_cost = (output_tokens / 1000) * cost_config.get("output_per_1k", 0)
         return input_cost + output_cost
 
     def _create_timing_info(self, start_time: float, first_token_time: Optional[float] = None) -> Dict[str, float]:
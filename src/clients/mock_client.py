@@ -0,0 +1,84 @@
+# src/clients/mock_client.py
+"""Local client that simulates a provider's prompt-prefix cache."""
+
+import hashlib
+import threading
+import time
+from typing import Dict, Optional, Any
+
+from .base_client import BaseClient
+
+class MockClient(BaseClient):
+    """
+    Offline client for dry runs and tests.
+
+    Responses are deterministic. Prompt prefixes marked cacheable are kept
+    for `ttl` seconds: the first call with a prefix is billed as a cache
+    write, later calls within the TTL as cache reads, so runs can be
+    costed with and without caching before any real API is called.
+    """
+
+    def __init__(self, api_key: str = None, model_config: Dict[str, Any] = None, ttl: float = 300.0):
+        """
+        Initialize the mock client.
+
+        Args:
+            api_key: Ignored
+            model_config: Dictionary containing model configuration
+            ttl: Seconds a cached prefix stays warm after its last use
+        """
+        super().__init__(api_key=api_key)
+        self.name = "mock"
+        self.ttl = ttl
+        self.prompt_caching = {"enabled": True}
+        self._cache: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.cache_stats = {"reads": 0, "writes": 0}
+
+        if model_config:
+            self.configure(model_config)
+
+    def configure(self, model_config: Dict[str, Any]):
+        """Apply a model configuration, keeping prompt caching on unless it is disabled."""
+        super().configure(model_config)
+        self.prompt_caching = {"enabled": True, **self.prompt_caching}
+
+    def generate(self, prompt: str, config: Optional[Dict[str, Any]] = None) -> str:
+        """Return a deterministic response, recording the call's cache usage."""
+        config = config or {}
+        self._local.usage = self._lookup(config.get("system_prompt"), config.get("cache_prefix", ""))
+        return f"This is a mock response for prompt: {prompt[:50]}...\nRating: 3"
+
+    def cache_usage(self, system_prompt: Optional[str], cache_prefix: str) -> Dict[str, int]:
+        """Cache reads and writes of the last `generate` call on this thread."""
+        return getattr(self._local, "usage", None) or super().cache_usage(system_prompt, cache_prefix)
+
+    def clear_cache(self):
+        """Expire every cached prefix."""
+        with self._lock:
+            self._cache.clear()
+
+    def _lookup(self, system_prompt: Optional[str], cache_prefix: str) -> Dict[str, int]:
+        """Simulate the provider cache for one call."""
+        from ..utils.tokenizers import count_tokens
+
+        if not cache_prefix:
+            return {"cached_input_tokens": 0, "cache_write_tokens": 0}
+
+        # System prompt and prefix are sent first, so both are part of the cached block
+        cached_text = (system_prompt or "") + cache_prefix
+        prefix_tokens = count_tokens(cached_text, self._ledger_model_name())
+        if prefix_tokens < self.prompt_caching.get("min_prefix_tokens", 0):
+            return {"cached_input_tokens": 0, "cache_write_tokens": 0}
+
+        key = hashlib.blake2b(cached_text.encode("utf-8"), digest_size=16).hexdigest()
+        now = time.monotonic()
+        with self._lock:
+            hit = self._cache.get(key, 0.0) > now
+            self._cache[key] = now + self.ttl
+            self.cache_stats["reads" if hit else "writes"] += 1
+
+        if hit:
+            return {"cached_input_tokens": prefix_tokens, "cache_write_tokens": 0}
+        return {"cached_input_tokens": 0, "cache_write_tokens": prefix_tokens}
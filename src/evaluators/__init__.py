@@ -1,19 +1,58 @@
 """Evaluator package for assessing model performance."""
 
+from .base_evaluator import (
+    BaseEvaluator,
+    ModelBasedEvaluator,
+    EVALUATOR_REGISTRY,
+    register_evaluator,
+    get_evaluator,
+    get_metrics_config
+)
 from .accuracy_evaluator import AccuracyEvaluator
 from .reasoning_evaluator import ReasoningEvaluator
 from .hallucination_evaluator import HallucinationEvaluator
 from .instruction_evaluator import InstructionEvaluator
 from .context_evaluator import ContextEvaluator
-from .efficiency_evaluator import EfficiencyEvaluator
+from .efficiency_evaluator import EfficiencyEvaluator, responses_to_arrays
 from .prompt_quality_evaluator import PromptQualityEvaluator
+from .code_evaluator import CodeEvaluator
+from .ppt_evaluator import PPTEvaluator
+from .context_reducer import ContextReducer
+from .cascade import CascadeJudge
+from .claim_screen import ClaimScreener
+from .constraints import CompiledConstraints, compile_constraints
+from .code_sandbox import CodeSandbox, extract_code
+from .prompt_budget import JudgePromptBuilder
+from .ppt_outline import OutlineParser, StructuralScorer, parse_outline
+from .creative_evaluator import CreativeEvaluator
 
 __all__ = [
+    "BaseEvaluator",
+    "ModelBasedEvaluator",
+    "EVALUATOR_REGISTRY",
+    "register_evaluator",
+    "get_evaluator",
+    "get_metrics_config",
     "AccuracyEvaluator",
     "ReasoningEvaluator",
     "HallucinationEvaluator",
     "InstructionEvaluator",
     "ContextEvaluator",
     "EfficiencyEvaluator",
-    "PromptQualityEvaluator"
+    "responses_to_arrays",
+    "PromptQualityEvaluator",
+    "CodeEvaluator",
+    "PPTEvaluator",
+    "ContextReducer",
+    "CascadeJudge",
+    "ClaimScreener",
+    "CompiledConstraints",
+    "compile_constraints",
+    "CodeSandbox",
+    "extract_code",
+    "OutlineParser",
+    "StructuralScorer",
+    "parse_outline",
+    "JudgePromptBuilder",
+    "CreativeEvaluator"
 ]
\ No newline at end of file
@@ -1,3 +1,100 @@
+"""Base classes, shared configuration and registry for evaluators."""
+
+import asyncio
+import os
+import re
+from typing import Callable, Dict, List, Any, Optional, Type
+
+from ..clients.base_client import BaseClient
+from ..utils.config import load_config, load_model_client, load_model_config
+from ..utils.cost_tracker import BudgetExceededError
+from ..utils.prompt_formatter import shared_prefix
+from .cascade import CascadeJudge
+from .prompt_budget import JudgePromptBuilder
+
+# Matches the first integer in a "Rating: ..." line
+_RATING_NUMBER_RE = re.compile(r"\d+")
+
+# Metrics configuration shared by every evaluator, keyed by file path
+_METRICS_CONFIGS: Dict[str, Dict[str, Any]] = {}
+
+# Maps suite `evaluation.method` values to (evaluator class, constructor kwargs)
+EVALUATOR_REGISTRY: Dict[str, tuple] = {}
+
+
+def get_metrics_config(config_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Get the evaluation metrics configuration, loading it only once per path.
+
+    Args:
+        config_path: Path to metrics.yaml, or None to use CONFIG_DIR
+
+    Returns:
+        Metrics configuration dictionary shared by all evaluators
+    """
+    if config_path is None:
+        config_dir = os.environ.get("CONFIG_DIR", "./config")
+        config_path = f"{config_dir}/evaluation/metrics.yaml"
+
+    if config_path not in _METRICS_CONFIGS:
+        config = load_config(config_path) or {}
+        config.setdefault("metrics", {})
+        _METRICS_CONFIGS[config_path] = config
+
+    return _METRICS_CONFIGS[config_path]
+
+
+def register_evaluator(method: str, **init_kwargs) -> Callable[[Type], Type]:
+    """
+    Class decorator registering an evaluator for a suite evaluation method.
+
+    Args:
+        method: Value of `evaluation.method` in the test suite YAML
+        **init_kwargs: Extra constructor arguments used for this method
+
+    Returns:
+        Decorator that registers and returns the class unchanged
+    """
+    def decorator(cls: Type) -> Type:
+        EVALUATOR_REGISTRY[method] = (cls, init_kwargs)
+        return cls
+
+    return decorator
+
+
+def get_evaluator(method: str,
+                  evaluation_model: BaseClient,
+                  metrics_config: Dict[str, Any] = None,
+                  settings: Dict[str, Any] = None,
+                  **kwargs) -> "ModelBasedEvaluator":
+    """
+    Create the evaluator registered for a suite evaluation method.
+
+    Args:
+        method: Value of `evaluation.method` in the test suite YAML
+        evaluation_model: Model client used as the judge
+        metrics_config: Metrics configuration, or None to use the shared one
+        settings: The suite's `settings` block; evaluators build their optional
+            components (context reducer, claim screener, ...) from it
+        **kwargs: Additional constructor arguments, overriding those built from settings
+
+    Returns:
+        Evaluator instance
+
+    Raises:
+        ValueError: If no evaluator is registered for the method
+    """
+    if method not in EVALUATOR_REGISTRY:
+        raise ValueError(
+            f"No evaluator registered for method '{method}'. "
+            f"Available methods: {', '.join(sorted(EVALUATOR_REGISTRY))}"
+        )
+
+    cls, init_kwargs = EVALUATOR_REGISTRY[method]
+    settings_kwargs = cls.settings_kwargs(settings or {}) if hasattr(cls, "settings_kwargs") else {}
+    return cls(evaluation_model, metrics_config, **{**init_kwargs, **settings_kwargs, **kwargs})
+
+
 class BaseEvaluator:
     """
     Base class for all evaluators. Defines the common interface that all evaluators must implement.
@@ -25,4 +122,230 @@ class BaseEvaluator:
         Raises:
             NotImplementedError: This method must be implemented by subclasses
         """
-        raise NotImplementedError("Subclasses must implement the evaluate method")
\ No newline at end of file
+        raise NotImplementedError("Subclasses must implement the evaluate method")
+
+
+class ModelBasedEvaluator(BaseEvaluator):
+    """
+    Base class for evaluators that score responses with a judge model.
+
+    Subclasses implement `evaluate` and `_create_evaluation_prompt`; metric
+    dispatch, score parsing, weighting and batching live here.
+    """
+
+    name = "model_based"
+    system_prompt = "You are an expert evaluator assessing AI model responses."
+    default_metrics: List[str] = []
+
+    def __init__(self, evaluation_model: BaseClient, metrics_config: Dict[str, Any] = None,
+                 cascade: CascadeJudge = None):
+        """
+        Initialize the evaluator.
+
+        Args:
+            evaluation_model: Model client for evaluation
+            metrics_config: Metrics configuration dictionary, or None to use the shared one
+            cascade: Cheap-then-expensive judge cascade used instead of evaluation_model, or None
+                to build one from the `cascade` block of the metrics configuration when enabled
+        """
+        self.evaluation_model = evaluation_model
+        self.metrics_config = metrics_config if metrics_config is not None else get_metrics_config()
+        if cascade is None and evaluation_model is not None:
+            cascade = self._build_cascade(self.metrics_config.get("cascade"), evaluation_model)
+        self.cascade = cascade
+        self.prompt_builder = JudgePromptBuilder.from_config(
+            self.metrics_config.get("judge_prompt_budget"), evaluation_model
+        )
+
+    @staticmethod
+    def _build_cascade(config: Optional[Dict[str, Any]], evaluation_model: BaseClient) -> Optional[CascadeJudge]:
+        """
+        Create the configured cascade, with a client for its `cheap_model`.
+
+        Args:
+            config: `cascade` block of the metrics configuration, or None
+            evaluation_model: Expensive judge the cascade escalates to
+
+        Returns:
+            CascadeJudge instance, or None if cascading is disabled
+
+        Raises:
+            ValueError: If no client can be created for the cheap model
+        """
+        if not config or not config.get("enabled", False):
+            return None
+
+        cheap_model_id = config.get("cheap_model")
+        cheap_model_config = load_model_config(cheap_model_id) if cheap_model_id else None
+        cheap_model = load_model_client(cheap_model_id, cheap_model_config) if cheap_model_config else None
+        if cheap_model is None:
+            raise ValueError(f"Cannot create a client for the cascade's cheap model '{cheap_model_id}'")
+        return CascadeJudge.from_config(config, cheap_model, evaluation_model)
+
+    @classmethod
+    def settings_kwargs(cls, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Constructor arguments built from a suite's `settings` block.
+
+        Args:
+            settings: Suite settings dictionary
+
+        Returns:
+            Keyword arguments for the constructor (none by default)
+        """
+        return {}
+
+    def close(self):
+        """Release resources held by the evaluator (none by default)."""
+
+    async def evaluate_batch(self,
+                             cases: List[Dict[str, Any]],
+                             max_concurrency: int = None) -> List[Dict[str, Any]]:
+        """
+        Evaluate many responses concurrently.
+
+        Args:
+            cases: Keyword argument dictionaries for `evaluate`, one per response
+            max_concurrency: Maximum concurrent evaluations, or None for MAX_PARALLEL_REQUESTS
+
+        Returns:
+            List of evaluation results in the same order as `cases`
+        """
+        if max_concurrency is None:
+            max_concurrency = int(os.environ.get("MAX_PARALLEL_REQUESTS", "5"))
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def run(case: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.evaluate(**case)
+
+        return await asyncio.gather(*(run(case) for case in cases))
+
+    async def _evaluate_metrics(self,
+                                metrics: List[str],
+                                build_prompt: Callable[..., str],
+                                system_prompt: str = None,
+                                sections: Dict[str, Any] = None,
+                                fit_to_budget: bool = True) -> Dict[str, Any]:
+        """
+        Score each requested metric with the judge model.
+
+        Args:
+            metrics: Metrics to evaluate; unknown metrics are skipped
+            build_prompt: Callable returning the judge prompt for a metric; when
+                `sections` is given it is called as build_prompt(metric=..., **sections)
+            system_prompt: System prompt for the judge, or None for the class default
+            sections: Template arguments whose text may be trimmed to fit the judge's token budget
+            fit_to_budget: Trim `sections` to the prompt budget; False sends them whole
+
+        Returns:
+            Dictionary of metric scores (or error dictionaries), plus a `prompt_budget`
+            entry when sections had to be trimmed
+
+        The judge prompts of one response differ only in their metric lines, so
+        their common leading part is marked cacheable for the judge's provider.
+        """
+        system_prompt = system_prompt or self.system_prompt
+        metric_names = [metric for metric in metrics if metric in self.metrics_config["metrics"]]
+        budget_report = None
+
+        if sections is not None:
+            render = build_prompt
+            fitted = {metric: sections for metric in metric_names}
+            if self.prompt_builder is not None and fit_to_budget and metric_names:
+                section_tokens = self.prompt_builder.count_sections(sections)
+                for metric in metric_names:
+                    static_tokens = self.prompt_builder.static_tokens(
+                        (type(self).__name__, metric),
+                        lambda **values: render(metric=metric, **values),
+                        sections,
+                        system_prompt
+                    )
+                    fitted[metric], report = self.prompt_builder.fit(sections, static_tokens, section_tokens)
+                    if report["tokens_trimmed"] and (
+                            budget_report is None or report["tokens_trimmed"] > budget_report["tokens_trimmed"]):
+                        budget_report = report
+            build_prompt = lambda metric: render(metric=metric, **fitted[metric])
+
+        prompts = {metric: build_prompt(metric) for metric in metric_names}
+        cache_prefix = shared_prefix(list(prompts.values()))
+        scores = await asyncio.gather(*(
+            self._evaluate_metric(metric, prompts[metric], system_prompt, cache_prefix)
+            for metric in metric_names
+        ))
+        results = dict(zip(metric_names, scores))
+        if budget_report is not None:
+            results["prompt_budget"] = budget_report
+        return results
+
+    async def _evaluate_metric(self, metric: str, prompt: str, system_prompt: str, cache_prefix: str = "") -> Any:
+        """Score a single metric, returning an error dictionary on failure."""
+        metric_config = self.metrics_config["metrics"][metric]
+
+        if metric_config.get("evaluation_method") != "model_based":
+            # Implement rule-based or other evaluation methods here
+            return 0
+
+        try:
+            if self.cascade is not None:
+                judgment = await self.cascade.judge(
+                    prompt, system_prompt, metric_config["scale"], self._parse_score, cache_prefix, metric
+                )
+                return judgment["score"]
+
+            eval_response = await self.evaluation_model.generate_response(
+                prompt=prompt,
+                system_prompt=system_prompt,
+                temperature=0.1,
+                cache_prefix=cache_prefix
+            )
+            return self._parse_score(eval_response["text"], metric_config["scale"])
+        except BudgetExceededError:
+            # Out of budget is a reason to stop the run, not a zero score
+            raise
+        except Exception as e:
+            return {
+                "score": 0,
+                "error": str(e)
+            }
+
+    def _add_overall_score(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the weighted average of all numeric metric scores as `overall_score`."""
+        weighted_score = 0
+        total_weight = 0
+
+        for metric, score in results.items():
+            if isinstance(score, dict) or metric not in self.metrics_config["metrics"]:
+                # Skip errors and non-metric entries
+                continue
+
+            metric_weight = self.metrics_config["metrics"][metric].get("weight", 1.0)
+            weighted_score += score * metric_weight
+            total_weight += metric_weight
+
+        results["overall_score"] = weighted_score / total_weight if total_weight > 0 else 0
+        return results
+
+    def _scale_rate(self, rate: float, metric: str) -> float:
+        """Map a 0-1 rate (e.g. a pass rate) onto a metric's scale."""
+        scale = self.metrics_config["metrics"][metric]["scale"]
+        return min(scale) + rate * (max(scale) - min(scale))
+
+    def _parse_score(self, evaluation_text: str, scale: List[int]) -> int:
+        """Parse the score from evaluation response."""
+        low, high = min(scale), max(scale)
+        try:
+            # Look for "Rating: X" pattern
+            for line in evaluation_text.split("\n"):
+                line = line.strip()
+                if line.lower().startswith("rating:"):
+                    match = _RATING_NUMBER_RE.search(line, 7)
+                    if match:
+                        # Ensure score is within scale
+                        return max(min(int(match.group()), high), low)
+
+            # If no rating found, assume minimum score
+            return low
+        except Exception:
+            # Default to minimum score on error
+            return low
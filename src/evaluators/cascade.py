@@ -0,0 +1,233 @@
+"""Cascaded judging: a cheap judge scores first, an expensive judge only when needed."""
+
+import random
+import re
+from typing import Callable, Dict, List, Any, Optional
+
+from ..clients.base_client import BaseClient
+from ..utils.cost_tracker import BudgetExceededError
+
+_CONFIDENCE_RE = re.compile(r"confidence\s*:\s*(\d+(\.\d+)?)\s*(%)?", re.IGNORECASE)
+
+CONFIDENCE_INSTRUCTION = """
+        Finally, add one more line stating how confident you are in your rating:
+        Confidence: [number between 0 and 100]
+        """
+
+
+class CascadeJudge:
+    """Routes judgments to a cheap judge and escalates uncertain ones."""
+
+    def __init__(self,
+                 cheap_model: BaseClient,
+                 expensive_model: BaseClient,
+                 confidence_threshold: float = 0.7,
+                 decision_thresholds: Optional[Dict[str, List[float]]] = None,
+                 decision_margin: float = 0.5,
+                 audit_rate: float = 0.05,
+                 audit_tolerance: int = 1,
+                 seed: Optional[int] = None):
+        """
+        Initialize the cascade.
+
+        Args:
+            cheap_model: Inexpensive judge that scores every case first
+            expensive_model: Flagship judge used for escalations and audits
+            confidence_threshold: Escalate when the cheap judge's confidence (0-1) is below this
+            decision_thresholds: Score boundaries that matter downstream, per metric; metrics
+                without boundaries use their scale midpoint
+            decision_margin: Escalate when the cheap score is within this distance of a boundary
+            audit_rate: Fraction of non-escalated cases also sent to the expensive judge
+            audit_tolerance: Maximum score difference that counts as agreement in audits
+            seed: Random seed for audit sampling
+        """
+        self.cheap_model = cheap_model
+        self.expensive_model = expensive_model
+        self.confidence_threshold = confidence_threshold
+        self.decision_thresholds = decision_thresholds or {}
+        self.decision_margin = decision_margin
+        self.audit_rate = audit_rate
+        self.audit_tolerance = audit_tolerance
+        self._random = random.Random(seed)
+
+        self.stats = {
+            "judgments": 0,
+            "escalations": 0,
+            "low_confidence_escalations": 0,
+            "threshold_escalations": 0,
+            "cheap_error_escalations": 0,
+            "cheap_cost": 0.0,
+            "expensive_cost": 0.0,
+            "baseline_cost": 0.0,
+            "audits": 0,
+            "audit_agreements": 0
+        }
+
+    @classmethod
+    def from_config(cls,
+                    config: Optional[Dict[str, Any]],
+                    cheap_model: BaseClient,
+                    expensive_model: BaseClient) -> Optional["CascadeJudge"]:
+        """
+        Create a cascade from the `cascade` block of metrics.yaml.
+
+        Args:
+            config: Cascade settings dictionary, or None
+            cheap_model: Client for the configured `cheap_model`
+            expensive_model: Client for the suite's evaluation model
+
+        Returns:
+            CascadeJudge instance, or None if cascading is disabled
+        """
+        if not config or not config.get("enabled", False):
+            return None
+
+        return cls(
+            cheap_model,
+            expensive_model,
+            confidence_threshold=config.get("confidence_threshold", 0.7),
+            decision_thresholds=config.get("decision_thresholds"),
+            decision_margin=config.get("decision_margin", 0.5),
+            audit_rate=config.get("audit_rate", 0.05),
+            audit_tolerance=config.get("audit_tolerance", 1),
+            seed=config.get("seed")
+        )
+
+    async def judge(self,
+                    prompt: str,
+                    system_prompt: str,
+                    scale: List[int],
+                    parse_score: Callable[[str, List[int]], int],
+                    cache_prefix: str = "",
+                    metric: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Score a judge prompt through the cascade.
+
+        Args:
+            prompt: Judge prompt
+            system_prompt: Judge system prompt
+            scale: Metric scale values
+            parse_score: Function extracting the rating from judge output
+            cache_prefix: Leading part of the prompt to mark cacheable for both judges
+            metric: Metric being judged, selecting its decision thresholds
+
+        Returns:
+            Dictionary with the final score, cheap confidence and routing details
+        """
+        self.stats["judgments"] += 1
+
+        try:
+            cheap_response = await self.cheap_model.generate_response(
+                prompt=prompt + CONFIDENCE_INSTRUCTION,
+                system_prompt=system_prompt,
+                temperature=0.1,
+                cache_prefix=cache_prefix
+            )
+            cheap_score = parse_score(cheap_response["text"], scale)
+            confidence = self._parse_confidence(cheap_response["text"])
+        except BudgetExceededError:
+            raise
+        except Exception:
+            # A failing cheap judge is a reason to ask the expensive one, not a failed metric
+            cheap_response, cheap_score, confidence = None, None, 0.0
+        if cheap_response is not None:
+            self.stats["cheap_cost"] += cheap_response.get("cost", 0) or 0
+            self.stats["baseline_cost"] += self._expensive_cost_estimate(cheap_response)
+
+        reason = None
+        if cheap_score is None:
+            reason = "cheap_error"
+        elif confidence < self.confidence_threshold:
+            reason = "low_confidence"
+        elif self._near_threshold(cheap_score, scale, metric):
+            reason = "threshold"
+
+        result = {
+            "score": cheap_score,
+            "cheap_score": cheap_score,
+            "confidence": confidence,
+            "escalated": reason is not None,
+            "escalation_reason": reason,
+            "audited": False
+        }
+
+        if reason is not None:
+            self.stats["escalations"] += 1
+            self.stats[f"{reason}_escalations"] += 1
+            expensive_cost = self.stats["expensive_cost"]
+            result["score"] = await self._expensive_score(prompt, system_prompt, scale, parse_score, cache_prefix)
+            if cheap_response is None:
+                # Without a cheap response the expensive call is also what judging alone would have cost
+                self.stats["baseline_cost"] += self.stats["expensive_cost"] - expensive_cost
+        elif self.audit_rate > 0 and self._random.random() < self.audit_rate:
+            expensive_score = await self._expensive_score(prompt, system_prompt, scale, parse_score, cache_prefix)
+            self.stats["audits"] += 1
+            if abs(expensive_score - cheap_score) <= self.audit_tolerance:
+                self.stats["audit_agreements"] += 1
+            result["audited"] = True
+            result["audit_score"] = expensive_score
+
+        return result
+
+    async def _expensive_score(self, prompt: str, system_prompt: str,
+                               scale: List[int], parse_score: Callable[[str, List[int]], int],
+                               cache_prefix: str = "") -> int:
+        """Score a prompt with the expensive judge and account for its cost."""
+        response = await self.expensive_model.generate_response(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            temperature=0.1,
+            cache_prefix=cache_prefix
+        )
+        self.stats["expensive_cost"] += response.get("cost", 0) or 0
+        return parse_score(response["text"], scale)
+
+    def _expensive_cost_estimate(self, cheap_response: Dict[str, Any]) -> float:
+        """Estimate what the expensive judge would have cost for the same judgment."""
+        usage = cheap_response.get("usage", {})
+        return self.expensive_model.calculate_cost(
+            usage.get("prompt_tokens", 0),
+            usage.get("completion_tokens", 0)
+        )
+
+    def _parse_confidence(self, text: str) -> float:
+        """
+        Parse the cheap judge's confidence as a 0-1 value; missing means no confidence.
+
+        The judge is asked for 0-100, so whole numbers are percentages ("1" is 1%);
+        only a decimal value such as "0.8" without a % sign is read as a fraction.
+        """
+        match = _CONFIDENCE_RE.search(text)
+        if not match:
+            return 0.0
+        value = float(match.group(1))
+        is_fraction = match.group(2) is not None and match.group(3) is None and value <= 1
+        if not is_fraction:
+            value /= 100
+        return max(0.0, min(value, 1.0))
+
+    def _near_threshold(self, score: int, scale: List[int], metric: Optional[str] = None) -> bool:
+        """Check whether a score sits within the decision margin of one of the metric's thresholds."""
+        thresholds = self.decision_thresholds.get(metric)
+        if thresholds is None:
+            thresholds = [(min(scale) + max(scale)) / 2]
+        return any(abs(score - threshold) <= self.decision_margin for threshold in thresholds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Summarize escalation rate, cost saved and audit agreement.
+
+        Returns:
+            Dictionary of cascade statistics
+        """
+        judgments = self.stats["judgments"]
+        actual_cost = self.stats["cheap_cost"] + self.stats["expensive_cost"]
+        audits = self.stats["audits"]
+
+        return {
+            **self.stats,
+            "escalation_rate": self.stats["escalations"] / judgments if judgments else 0.0,
+            "actual_cost": actual_cost,
+            "cost_saved": self.stats["baseline_cost"] - actual_cost,
+            "audit_agreement_rate": self.stats["audit_agreements"] / audits if audits else None
+        }
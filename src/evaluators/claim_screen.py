@@ -0,0 +1,173 @@
+"""Local claim extraction and source lookup used to pre-screen hallucination checks."""
+
+import re
+from typing import Dict, List, Any, Optional
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+
+_MONTHS = (r"(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|"
+           r"Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)")
+
+# Claim patterns, checked in this order; later matches overlapping earlier ones are dropped
+_CLAIM_PATTERNS = [
+    ("date", re.compile(
+        rf"\b{_MONTHS}\.?\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}\b"
+        rf"|\b\d{{1,2}}(?:st|nd|rd|th)?\s+{_MONTHS}\.?,?\s+\d{{4}}\b"
+        rf"|\b{_MONTHS}\.?\s+\d{{4}}\b"
+        r"|\b\d{4}-\d{2}-\d{2}\b"
+    )),
+    ("number", re.compile(r"(?<![\w.])\d+(?:[.,]\d+)*(?:\s?%|\s+percent)?")),
+    ("entity", re.compile(r"\b[A-Z][\w&'-]*(?:\s+(?:of|the|and|de|for)?\s*[A-Z][\w&'-]*)*")),
+]
+
+# Capitalized words that start sentences without naming anything
+_LEADING_STOPWORDS = frozenset("""
+a an the this that these those it its in on at for of and but or if when while as
+by from with to we our you your they their he she his her i my there here however
+also first second third finally overall additionally furthermore moreover yes no
+""".split())
+
+
+def _tokens(text: str) -> List[str]:
+    """Normalized word and number tokens; thousands separators are dropped."""
+    return [token.replace(",", "") for token in _TOKEN_RE.findall(text.lower())]
+
+
+class ClaimScreener:
+    """Extracts checkable claims from a response and looks them up in source text."""
+
+    def __init__(self, max_ngram: int = 5, min_entity_chars: int = 3):
+        """
+        Initialize the screener.
+
+        Args:
+            max_ngram: Longest n-gram stored in the source index
+            min_entity_chars: Shorter capitalized words are not treated as entities
+        """
+        self.max_ngram = max_ngram
+        self.min_entity_chars = min_entity_chars
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> Optional["ClaimScreener"]:
+        """
+        Create a screener from a suite `claim_prescreen` settings block.
+
+        Args:
+            config: Settings dictionary, or None
+
+        Returns:
+            ClaimScreener instance, or None if pre-screening is disabled
+        """
+        if not config or not config.get("enabled", False):
+            return None
+
+        return cls(
+            max_ngram=config.get("max_ngram", 5),
+            min_entity_chars=config.get("min_entity_chars", 3)
+        )
+
+    def build_index(self, sources: List[str]) -> set:
+        """
+        Build a hashed n-gram index of the source texts.
+
+        Args:
+            sources: Context and known facts the response may rely on
+
+        Returns:
+            Set of hashes of every token n-gram up to max_ngram
+        """
+        index = set()
+        for source in sources:
+            if not source:
+                continue
+            tokens = _tokens(source)
+            for n in range(1, self.max_ngram + 1):
+                for start in range(len(tokens) - n + 1):
+                    index.add(hash(tuple(tokens[start:start + n])))
+        return index
+
+    def extract_claims(self, response: str) -> List[Dict[str, Any]]:
+        """
+        Extract entities, numbers and dates sentence by sentence.
+
+        Args:
+            response: Model response
+
+        Returns:
+            List of claim dictionaries with text, type and sentence
+        """
+        claims = []
+        for sentence in _SENTENCE_RE.split(response):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+
+            taken = []
+            for claim_type, pattern in _CLAIM_PATTERNS:
+                for match in pattern.finditer(sentence):
+                    start, end = match.span()
+                    if any(start < taken_end and taken_start < end for taken_start, taken_end in taken):
+                        continue
+                    text = match.group().strip()
+                    if claim_type == "entity":
+                        text = self._strip_leading_stopwords(text)
+                        if len(text) < self.min_entity_chars:
+                            continue
+                    taken.append((start, end))
+                    claims.append({"text": text, "type": claim_type, "sentence": sentence})
+
+        return claims
+
+    def _strip_leading_stopwords(self, text: str) -> str:
+        words = text.split()
+        while words and words[0].lower() in _LEADING_STOPWORDS:
+            words.pop(0)
+        return " ".join(words)
+
+    def is_supported(self, claim: str, index: set) -> bool:
+        """
+        Check whether every n-gram window of a claim occurs in the source index.
+
+        Args:
+            claim: Claim text
+            index: Index from `build_index`
+
+        Returns:
+            True if the claim is found in the sources
+        """
+        tokens = _tokens(claim)
+        if not tokens:
+            return True
+        if len(tokens) <= self.max_ngram:
+            return hash(tuple(tokens)) in index
+        return all(
+            hash(tuple(tokens[start:start + self.max_ngram])) in index
+            for start in range(len(tokens) - self.max_ngram + 1)
+        )
+
+    def screen(self, response: str, sources: List[str]) -> Dict[str, Any]:
+        """
+        Screen a response for claims that are not backed by the sources.
+
+        A response is only `supported` if it makes checkable claims and all of
+        them are found; one without any extracted claims (e.g. a lower-case
+        fabrication) is left to the judge.
+
+        Args:
+            response: Model response
+            sources: Context and known facts the response may rely on (not the prompt)
+
+        Returns:
+            Dictionary with claim counts, unsupported claims and a `supported` flag
+        """
+        index = self.build_index(sources)
+        claims = self.extract_claims(response)
+        unsupported = [claim for claim in claims if not self.is_supported(claim["text"], index)]
+
+        return {
+            "supported": bool(claims) and not unsupported,
+            "claims_total": len(claims),
+            "claims_unsupported": len(unsupported),
+            "unsupported": unsupported
+        }
@@ -0,0 +1,169 @@
+"""Code quality evaluator backed by sandboxed execution."""
+
+import asyncio
+from typing import Dict, List, Any
+
+from ..clients.base_client import BaseClient
+from .base_evaluator import ModelBasedEvaluator, register_evaluator
+from .cascade import CascadeJudge
+from .code_sandbox import CodeSandbox, extract_code
+
+@register_evaluator("code_quality")
+class CodeEvaluator(ModelBasedEvaluator):
+    """Evaluates generated code by running it against test harnesses."""
+
+    name = "code"
+    system_prompt = "You are an expert software engineer reviewing code written by AI models."
+    default_metrics = ["correctness", "readability"]
+
+    # Metrics scored from the test pass rate whenever a case has tests
+    execution_metrics = {"correctness", "fix_correctness"}
+
+    def __init__(self, evaluation_model: BaseClient, metrics_config: Dict[str, Any] = None,
+                 sandbox: CodeSandbox = None, cascade: CascadeJudge = None):
+        """
+        Initialize the code evaluator.
+
+        Args:
+            evaluation_model: Model client for the judged metrics (readability, idiomaticity)
+            metrics_config: Metrics configuration dictionary
+            sandbox: Sandbox used to run code, or None for a default one
+            cascade: Optional cheap-then-expensive judge cascade
+        """
+        super().__init__(evaluation_model, metrics_config, cascade)
+        self.sandbox = sandbox or CodeSandbox()
+
+    @classmethod
+    def settings_kwargs(cls, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the sandbox from the suite's `code_sandbox` block."""
+        return {"sandbox": CodeSandbox.from_config(settings.get("code_sandbox"))}
+
+    def close(self):
+        """Stop any test interpreters still running in the sandbox."""
+        self.sandbox.close()
+
+    async def evaluate(self,
+                 prompt: str,
+                 response: str,
+                 tests: List[str] = None,
+                 language: str = "python",
+                 metrics: List[str] = None,
+                 timeout: float = None,
+                 execution: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Evaluate the code in a model response.
+
+        Args:
+            prompt: Original prompt given to the model
+            response: Model's response
+            tests: Test snippets (e.g. assert statements) from the test case
+            language: Language of the expected code; only Python is executed
+            metrics: Specific metrics to evaluate
+            timeout: Per-case execution time limit in seconds
+            execution: Precomputed sandbox result (see `evaluate_batch`)
+
+        Returns:
+            Dictionary of evaluation scores
+        """
+        metrics = metrics or self.default_metrics
+        code = extract_code(response, language)
+        results = {}
+
+        runnable = bool(tests) and language.lower() == "python"
+        if runnable and execution is None:
+            if code.strip():
+                execution = await asyncio.to_thread(self.sandbox.run, code, tests, timeout)
+            else:
+                execution = self._no_code_result(tests)
+
+        judged = []
+        for metric in metrics:
+            if metric not in self.metrics_config["metrics"]:
+                continue
+            if runnable and metric in self.execution_metrics:
+                results[metric] = self._scale_rate(execution["pass_rate"], metric)
+            else:
+                # Without a harness the judge is the only option for correctness
+                judged.append(metric)
+
+        results.update(await self._evaluate_metrics(
+            judged,
+            self._create_evaluation_prompt,
+            sections={"prompt": prompt, "code": code or response, "language": language}
+        ))
+
+        if execution is not None:
+            results["execution"] = execution
+        return self._add_overall_score(results)
+
+    async def evaluate_batch(self,
+                             cases: List[Dict[str, Any]],
+                             max_concurrency: int = None) -> List[Dict[str, Any]]:
+        """
+        Evaluate many responses, executing all of their code across the sandbox pool first.
+
+        Args:
+            cases: Keyword argument dictionaries for `evaluate`, one per response
+            max_concurrency: Maximum concurrent judge evaluations
+
+        Returns:
+            List of evaluation results in the same order as `cases`
+        """
+        cases = list(cases)
+        positions, jobs = [], []
+        for position, case in enumerate(cases):
+            language = case.get("language", "python")
+            if not case.get("tests") or language.lower() != "python" or case.get("execution") is not None:
+                continue
+            code = extract_code(case["response"], language)
+            if not code.strip():
+                cases[position] = {**case, "execution": self._no_code_result(case["tests"])}
+                continue
+            positions.append(position)
+            jobs.append({"code": code, "tests": case["tests"], "timeout": case.get("timeout")})
+
+        executions = await asyncio.to_thread(self.sandbox.run_batch, jobs)
+        for position, execution in zip(positions, executions):
+            cases[position] = {**cases[position], "execution": execution}
+
+        return await super().evaluate_batch(cases, max_concurrency)
+
+    def _no_code_result(self, tests: List[str]) -> Dict[str, Any]:
+        """Execution result for a response without any runnable code."""
+        return {
+            "status": "no_code",
+            "passed": 0,
+            "total": len(tests),
+            "pass_rate": 0.0,
+            "failures": [],
+            "error": "No code found in response",
+            "duration": 0.0
+        }
+
+    def _create_evaluation_prompt(self, prompt: str, code: str, language: str, metric: str) -> str:
+        """Create a prompt for judging a code metric."""
+        metric_config = self.metrics_config["metrics"][metric]
+
+        template = f"""
+        Please evaluate the following {language} code written by an AI model.
+
+        Original task:
+        "{prompt}"
+
+        Code:
+        ```{language}
+        {code}
+        ```
+
+        Evaluate it for {metric_config["description"]}.
+
+        On a scale of {min(metric_config["scale"])} to {max(metric_config["scale"])},
+        where {min(metric_config["scale"])} means very poor and {max(metric_config["scale"])} means excellent,
+        rate the code and explain your rating.
+
+        Your answer should be in this format:
+        Rating: [numeric score between {min(metric_config["scale"])} and {max(metric_config["scale"])}]
+        Explanation: [your explanation]
+        """
+
+        return template
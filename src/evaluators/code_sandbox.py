@@ -0,0 +1,389 @@
+"""Sandboxed execution of generated code against test harnesses.
+
+Every test runs in its own short-lived, isolated (`python -I`) interpreter:
+the harness loads the solution, runs one test snippet and reports the verdict
+only through its exit status, which the supervising process reads. Nothing
+the solution does to the modules of its interpreter (e.g. patching `json`)
+can change how a result is reported, and a solution that ends its own process
+is reported as a crash.
+
+Before any candidate code runs, the harness moves into private mount and
+network namespaces, remounts every filesystem read-only except its temporary
+working directory (also its HOME and TMPDIR), gives up its capabilities and
+applies CPU, memory, file-size and process-count limits. The kernel does not
+apply process-count limits to root, so a harness started as root switches to
+the nobody user when the standard library stays readable. Where namespaces are
+not available it falls back to working-directory confinement, an in-process
+network block and, when running as root, the nobody user; these keep
+well-behaved code in place but are not a security boundary.
+
+Requires a POSIX platform (resource limits); full isolation requires Linux.
+"""
+
+import json
+import os
+import random
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Set
+
+_FENCE_RE = re.compile(r"```[ \t]*([\w+#.-]*)[^\n]*\n(.*?)```", re.DOTALL)
+
+# Harness exit statuses; anything else means the interpreter was killed or exited early.
+# A passing test exits with a status drawn per run and held only in a local of the
+# harness's main function, so a solution that simply exits, or looks the status up
+# through the harness module, cannot pass for it. Code that walks interpreter
+# frames or reads process memory can still find it.
+_EXIT_FAILED = 3
+_EXIT_SETUP_ERROR = 4
+_PASS_STATUSES = range(16, 126)
+
+# Runs inside each test interpreter; reads one JSON job from stdin, writes an
+# error description (if any) to stderr and exits with one of the statuses above.
+# Candidate output goes to /dev/null.
+_HARNESS_SOURCE = r'''
+import ctypes, json, os, resource, sys, traceback
+
+_exit, _write = os._exit, os.write
+
+CLONE_NEWNS, CLONE_NEWUSER, CLONE_NEWNET = 0x00020000, 0x10000000, 0x40000000
+MS_RDONLY, MS_REMOUNT, MS_BIND, MS_REC, MS_PRIVATE = 0x1, 0x20, 0x1000, 0x4000, 0x40000
+# Flags that must be kept when remounting a mount locked by a user namespace
+_KEPT_FLAGS = {"nosuid": 0x2, "nodev": 0x4, "noexec": 0x8, "noatime": 0x400,
+               "nodiratime": 0x800, "relatime": 0x200000}
+NOBODY = 65534
+
+_libc = ctypes.CDLL(None, use_errno=True)
+
+def _check(result):
+    if result != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+def _mount(source, target, flags):
+    _check(_libc.mount(source.encode(), target.encode(), None, ctypes.c_ulong(flags), None))
+
+def _usable_by_nobody():
+    """Whether the standard library stays readable after switching to the nobody user."""
+    path = os.path.dirname(os.__file__)
+    if not os.stat(path).st_mode & 0o004:
+        return False
+    while True:
+        if not os.stat(path).st_mode & 0o001:
+            return False
+        parent = os.path.dirname(path)
+        if parent == path:
+            return True
+        path = parent
+
+def _drop_root(workdir):
+    os.chown(workdir, NOBODY, NOBODY)
+    os.setgroups([])
+    os.setgid(NOBODY)
+    os.setuid(NOBODY)
+
+def _isolate(root, workdir):
+    """Private mount and network namespaces with everything but workdir read-only."""
+    _check(_libc.unshare(CLONE_NEWNS | CLONE_NEWNET | (0 if root else CLONE_NEWUSER)))
+    _mount("none", "/", MS_REC | MS_PRIVATE)
+    _mount(workdir, workdir, MS_BIND | MS_REC)
+    with open("/proc/self/mountinfo") as f:
+        mounts = [line.split() for line in f]
+    for fields in mounts:
+        target = fields[4].encode().decode("unicode_escape")
+        if target == workdir:
+            continue
+        flags = MS_BIND | MS_REMOUNT | MS_RDONLY
+        for option in fields[5].split(","):
+            flags |= _KEPT_FLAGS.get(option, 0)
+        _mount("none", target, flags)
+    if root and _usable_by_nobody():
+        # The kernel does not enforce RLIMIT_NPROC for root
+        _drop_root(workdir)
+    else:
+        # A (nested) user namespace holds no capabilities over the mounts above
+        _check(_libc.unshare(CLONE_NEWUSER))
+
+def _block_network():
+    import socket
+
+    def blocked(*args, **kwargs):
+        raise PermissionError("network access is disabled in the sandbox")
+    socket.socket = socket.create_connection = socket.getaddrinfo = blocked
+
+def _limit(job):
+    memory = job["memory_mb"] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    cpu = int(job["timeout"]) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (16 * 1024 * 1024, 16 * 1024 * 1024))
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+def _report(errors, exc, status):
+    text = "".join(traceback.format_exception_only(type(exc), exc)).strip()[:500]
+    _write(errors, text.encode(errors="replace"))
+    _exit(status)
+
+def _main():
+    # The pass status only ever lives in this frame, never in a module or object
+    # the candidate can import or reach by name
+    job = json.loads(sys.stdin.read())
+    passed = job.pop("pass_status")
+    workdir = job["workdir"]
+    errors = os.dup(2)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+
+    root = os.geteuid() == 0
+    try:
+        _isolate(root, workdir)
+    except (OSError, AttributeError):
+        _block_network()
+        if root and _usable_by_nobody():
+            _drop_root(workdir)
+    os.chdir(workdir)
+    _limit(job)
+
+    namespace = {"__name__": "__main__"}
+    try:
+        exec(compile(job["code"], "<solution>", "exec"), namespace)
+    except BaseException as e:
+        _report(errors, e, 4)
+    try:
+        exec(compile(job["test"], "<test %d>" % job["index"], "exec"), namespace)
+    except BaseException as e:
+        _report(errors, e, 3)
+    _exit(passed)
+
+_main()
+'''
+
+
+def extract_code(response: str, language: str = "python") -> str:
+    """
+    Extract the code from a model response.
+
+    All fenced blocks tagged with the language (or untagged) are joined in
+    order, so a corrected version that follows an earlier block wins. A
+    response without fences is treated as code.
+
+    Args:
+        response: Model response
+        language: Language tag to look for
+
+    Returns:
+        Extracted source code
+    """
+    aliases = {language.lower()}
+    if language.lower() == "python":
+        aliases.update({"py", "python3"})
+
+    blocks = [body for tag, body in _FENCE_RE.findall(response) if not tag or tag.lower() in aliases]
+    if blocks:
+        return "\n\n".join(block.strip("\n") for block in blocks)
+    if _FENCE_RE.search(response):
+        # Only blocks in other languages
+        return ""
+    return response
+
+
+class CodeSandbox:
+    """Runs code against test snippets, each test in its own isolated interpreter."""
+
+    def __init__(self,
+                 workers: Optional[int] = None,
+                 timeout: float = 10.0,
+                 memory_mb: int = 512,
+                 python_executable: Optional[str] = None):
+        """
+        Initialize the sandbox.
+
+        Args:
+            workers: Number of jobs run at once by `run_batch`, or None for one per CPU core
+            timeout: Wall-clock limit per job in seconds (CPU limit is derived from it)
+            memory_mb: Address-space limit per test interpreter in megabytes
+            python_executable: Interpreter used to run tests, or None for the current one
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.python_executable = python_executable or sys.executable
+
+        self._running: Set[subprocess.Popen] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "CodeSandbox":
+        """
+        Create a sandbox from a suite `code_sandbox` settings block.
+
+        Args:
+            config: Settings dictionary, or None for defaults
+
+        Returns:
+            CodeSandbox instance
+        """
+        config = config or {}
+        return cls(
+            workers=config.get("workers"),
+            timeout=config.get("timeout_seconds", 10.0),
+            memory_mb=config.get("memory_mb", 512),
+            python_executable=config.get("python_executable")
+        )
+
+    def _run_test(self, job: Dict[str, Any], deadline: float) -> Dict[str, Any]:
+        """Run one test in a fresh harness interpreter and read its verdict from the exit status."""
+        workdir = job["workdir"]
+        pass_status = random.choice(_PASS_STATUSES)
+        process = subprocess.Popen(
+            [self.python_executable, "-I", "-c", _HARNESS_SOURCE],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            cwd=workdir,
+            env={"HOME": workdir, "TMPDIR": workdir, "PATH": "/usr/bin:/bin", "LANG": "C.UTF-8"},
+            start_new_session=True
+        )
+        with self._lock:
+            self._running.add(process)
+        try:
+            try:
+                _, errors = process.communicate(
+                    json.dumps({**job, "pass_status": pass_status}).encode(),
+                    max(deadline - time.monotonic(), 0.01)
+                )
+            except subprocess.TimeoutExpired:
+                self._kill(process)
+                process.communicate()
+                return {"test": job["index"], "timed_out": True}
+        finally:
+            with self._lock:
+                self._running.discard(process)
+
+        error = errors.decode(errors="replace").strip() or None
+        if process.returncode == pass_status:
+            return {"test": job["index"], "passed": True}
+        if process.returncode == _EXIT_FAILED:
+            return {"test": job["index"], "passed": False, "error": error}
+        if process.returncode == _EXIT_SETUP_ERROR:
+            return {"setup_error": error}
+        return {"test": job["index"], "exit_status": process.returncode}
+
+    @staticmethod
+    def _kill(process: subprocess.Popen):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            process.kill()
+
+    def run(self, code: str, tests: List[str], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Run code against test snippets, each in its own isolated interpreter.
+
+        Args:
+            code: Solution source code
+            tests: Test snippets (e.g. assert statements), each run separately
+            timeout: Wall-clock limit in seconds for all tests, or None for the sandbox default
+
+        Returns:
+            Dictionary with status, passed/total counts, pass_rate, failures and duration
+        """
+        timeout = timeout or self.timeout
+        tests = list(tests)
+        started = time.monotonic()
+        deadline = started + timeout
+        raw: Dict[str, Any] = {"events": [], "timed_out": False}
+
+        workdir = tempfile.mkdtemp(prefix="sandbox-")
+        try:
+            for index, test in enumerate(tests):
+                event = self._run_test({
+                    "code": code, "test": test, "index": index, "workdir": workdir,
+                    "timeout": timeout, "memory_mb": self.memory_mb
+                }, deadline)
+                if event.get("timed_out"):
+                    raw["timed_out"] = True
+                    break
+                if "exit_status" in event:
+                    # Killed by a resource limit or exited on its own; counts as a crash
+                    raw["exit_status"] = event["exit_status"]
+                    break
+                raw["events"].append(event)
+                if "setup_error" in event:
+                    break
+        except OSError as e:
+            raw["error"] = str(e)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        raw["duration"] = time.monotonic() - started
+        return self._summarize(raw, len(tests))
+
+    def run_batch(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Run many jobs concurrently.
+
+        Args:
+            jobs: Keyword argument dictionaries for `run` (code, tests, optional timeout)
+
+        Returns:
+            List of run results in the same order as `jobs`
+        """
+        if not jobs:
+            return []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(lambda job: self.run(**job), jobs))
+
+    def _summarize(self, raw: Dict[str, Any], total: int) -> Dict[str, Any]:
+        """Turn test verdicts into pass counts and a status."""
+        events = raw.get("events", [])
+        setup_error = next((event["setup_error"] for event in events if "setup_error" in event), None)
+        tests = [event for event in events if "test" in event]
+        passed = sum(1 for event in tests if event["passed"])
+
+        if raw.get("error"):
+            status = "sandbox_error"
+        elif total == 0:
+            status = "no_tests"
+        elif setup_error is not None:
+            status = "error"
+        elif raw.get("timed_out"):
+            status = "timeout"
+        elif len(tests) < total:
+            # Interpreter died mid-run, typically from a resource limit
+            status = "crashed"
+        else:
+            status = "passed" if passed == total else "failed"
+
+        return {
+            "status": status,
+            "passed": passed,
+            "total": total,
+            "pass_rate": passed / total if total else 0.0,
+            "failures": [
+                {"test": event["test"], "error": event.get("error")} for event in tests if not event["passed"]
+            ],
+            "error": raw.get("error") or setup_error,
+            "duration": raw.get("duration", 0.0)
+        }
+
+    def close(self):
+        """Kill any test interpreters that are still running."""
+        with self._lock:
+            running, self._running = list(self._running), set()
+        for process in running:
+            self._kill(process)
+
+    def __enter__(self) -> "CodeSandbox":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,248 @@
+"""Declarative response constraints compiled into fast local checkers.
+
+Test cases may carry a `constraints` list such as::
+
+    "constraints": [
+      {"type": "slide_count", "min": 15, "max": 20},
+      {"type": "max_bullet_words", "max": 25},
+      {"type": "forbidden_phrases", "phrases": ["as an AI"]},
+      {"type": "subjective", "instruction": "Bullets highlight compelling benefits"}
+    ]
+
+Every objective constraint is compiled once into a checker function; only
+`subjective` constraints need a judge model.
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+_WORD_RE = re.compile(r"\b\w+\b")
+_BULLET_RE = re.compile(r"^\s*(?:[-*•▪]|\d+[.)])\s+(.*)$")
+_HEADING_RE = re.compile(r"^\s*(?:#{1,6}\s+(.*)|\*\*(.+?)\*\*\s*:?\s*)$")
+# Setext underline ("Title" followed by "=====" or "-----")
+_UNDERLINE_RE = re.compile(r"^\s*(?:=+|-{2,})\s*$")
+# Unindented numbered title ("1. Introduction", "2) Results", "3.1 Methods")
+_NUMBERED_HEADING_RE = re.compile(r"^(?:\d+[.)]|\d+(?:\.\d+)+\.?)\s+(\S.*?)\s*:?\s*$")
+_SLIDE_RE = re.compile(r"^\s*(?:#{1,6}\s*)?(?:\*\*)?\s*slide\s*\d+", re.IGNORECASE)
+_CODE_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+# Metric each objective constraint type contributes to unless the spec says otherwise
+DEFAULT_CONSTRAINT_METRICS = {
+    "word_count": "compliance_rate",
+    "bullet_count": "format_adherence",
+    "max_bullet_words": "compliance_rate",
+    "slide_count": "compliance_rate",
+    "json_valid": "format_adherence",
+    "heading_present": "format_adherence",
+    "forbidden_phrases": "compliance_rate",
+    "required_phrases": "compliance_rate",
+    "regex": "format_adherence",
+}
+
+# Compiled constraint sets kept for reuse, keyed by their canonical JSON spec
+COMPILED_CACHE_SIZE = 256
+
+
+class ResponseFeatures:
+    """Lazily computed structural features of one response, shared by all checkers."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self._lower = None
+        self._lines = None
+        self._bullets = None
+        self._headings = None
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    @property
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            self._lines = self.text.splitlines()
+        return self._lines
+
+    @property
+    def bullets(self) -> List[str]:
+        if self._bullets is None:
+            self._bullets = [m.group(1) for m in map(_BULLET_RE.match, self.lines) if m]
+        return self._bullets
+
+    @property
+    def headings(self) -> List[str]:
+        """Markdown (# or **bold**), underlined and numbered heading titles, in order."""
+        if self._headings is None:
+            self._headings = []
+            lines = self.lines
+            for i, line in enumerate(lines):
+                match = _HEADING_RE.match(line)
+                if match:
+                    self._headings.append((match.group(1) or match.group(2)).strip())
+                elif (line.strip() and i + 1 < len(lines) and _UNDERLINE_RE.match(lines[i + 1])
+                        and not _UNDERLINE_RE.match(line) and not _BULLET_RE.match(line)):
+                    self._headings.append(line.strip())
+                else:
+                    match = _NUMBERED_HEADING_RE.match(line)
+                    if match:
+                        self._headings.append(match.group(1))
+        return self._headings
+
+    def word_count(self) -> int:
+        return len(_WORD_RE.findall(self.text))
+
+    def slide_count(self) -> int:
+        slides = sum(1 for line in self.lines if _SLIDE_RE.match(line))
+        # Fall back to headings for outlines that don't number their slides
+        return slides or len(self.headings)
+
+
+def _in_range(value: int, spec: Dict[str, Any]) -> Tuple[bool, str]:
+    low, high = spec.get("min"), spec.get("max")
+    passed = (low is None or value >= low) and (high is None or value <= high)
+    bounds = f"[{low if low is not None else '-'}, {high if high is not None else '-'}]"
+    return passed, f"{value} (expected {bounds})"
+
+
+def _compile_checker(spec: Dict[str, Any]) -> Callable[[ResponseFeatures], Tuple[bool, str]]:
+    """Turn one objective constraint spec into a checker function."""
+    kind = spec["type"]
+
+    if kind == "word_count":
+        return lambda f: _in_range(f.word_count(), spec)
+
+    if kind == "bullet_count":
+        return lambda f: _in_range(len(f.bullets), spec)
+
+    if kind == "slide_count":
+        return lambda f: _in_range(f.slide_count(), spec)
+
+    if kind == "max_bullet_words":
+        limit = spec["max"]
+
+        def check(f: ResponseFeatures) -> Tuple[bool, str]:
+            longest = max((len(_WORD_RE.findall(bullet)) for bullet in f.bullets), default=0)
+            return longest <= limit, f"longest bullet has {longest} words (max {limit})"
+        return check
+
+    if kind == "json_valid":
+        def check(f: ResponseFeatures) -> Tuple[bool, str]:
+            match = _CODE_FENCE_RE.search(f.text)
+            candidate = match.group(1) if match else f.text
+            try:
+                json.loads(candidate)
+                return True, "valid JSON"
+            except ValueError as e:
+                return False, f"invalid JSON: {e}"
+        return check
+
+    if kind == "heading_present":
+        pattern = re.compile(spec.get("pattern") or re.escape(spec["heading"]), re.IGNORECASE)
+
+        def check(f: ResponseFeatures) -> Tuple[bool, str]:
+            found = any(pattern.search(heading) for heading in f.headings)
+            return found, f"heading {pattern.pattern!r} {'found' if found else 'missing'}"
+        return check
+
+    if kind in ("forbidden_phrases", "required_phrases"):
+        phrases = [phrase.lower() for phrase in spec["phrases"]]
+        forbidden = kind == "forbidden_phrases"
+
+        def check(f: ResponseFeatures) -> Tuple[bool, str]:
+            present = [phrase for phrase in phrases if phrase in f.lower]
+            if forbidden:
+                return not present, f"forbidden phrases present: {present}" if present else "none present"
+            missing = [phrase for phrase in phrases if phrase not in present]
+            return not missing, f"missing phrases: {missing}" if missing else "all present"
+        return check
+
+    if kind == "regex":
+        pattern = re.compile(spec["pattern"], re.MULTILINE)
+        should_match = spec.get("match", True)
+
+        def check(f: ResponseFeatures) -> Tuple[bool, str]:
+            found = bool(pattern.search(f.text))
+            return found == should_match, f"pattern {'found' if found else 'not found'}"
+        return check
+
+    raise ValueError(f"Unknown constraint type: {kind}")
+
+
+class CompiledConstraints:
+    """A test case's constraints, split into compiled checkers and subjective instructions."""
+
+    def __init__(self, specs: List[Dict[str, Any]]):
+        """
+        Compile a list of constraint specs.
+
+        Args:
+            specs: Constraint dictionaries from a test case
+
+        Raises:
+            ValueError: If a spec has an unknown type
+        """
+        self.checkers: List[Tuple[str, str, Callable]] = []
+        self.subjective: Dict[str, List[str]] = {}
+
+        for spec in specs:
+            if spec["type"] == "subjective":
+                metric = spec.get("metric", "compliance_rate")
+                self.subjective.setdefault(metric, []).append(spec["instruction"])
+                continue
+            metric = spec.get("metric", DEFAULT_CONSTRAINT_METRICS.get(spec["type"], "compliance_rate"))
+            name = spec.get("name", spec["type"])
+            self.checkers.append((name, metric, _compile_checker(spec)))
+
+    def check(self, response: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Run every objective checker against a response.
+
+        Args:
+            response: Model response
+
+        Returns:
+            Check results grouped by metric
+        """
+        features = ResponseFeatures(response)
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        for name, metric, checker in self.checkers:
+            passed, detail = checker(features)
+            results.setdefault(metric, []).append({"constraint": name, "passed": passed, "detail": detail})
+        return results
+
+    def check_batch(self, responses: List[str]) -> List[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Run every objective checker against many responses.
+
+        Args:
+            responses: Model responses
+
+        Returns:
+            One `check` result per response, in order
+        """
+        return [self.check(response) for response in responses]
+
+
+def compile_constraints(specs: Optional[List[Dict[str, Any]]]) -> Optional[CompiledConstraints]:
+    """
+    Compile constraint specs, reusing a cached result for identical specs.
+
+    Args:
+        specs: Constraint dictionaries from a test case, or None
+
+    Returns:
+        CompiledConstraints instance, or None if there are no constraints
+    """
+    if not specs:
+        return None
+
+    return _compile_cached(json.dumps(specs, sort_keys=True))
+
+
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def _compile_cached(key: str) -> CompiledConstraints:
+    return CompiledConstraints(json.loads(key))
@@ -1,37 +1,47 @@
 """Context utilization evaluator."""
 
-import os
 from typing import Dict, List, Any
 
-from ..clients.base_client import BaseModelClient
-from ..utils.config import load_evaluation_metrics
+from ..clients.base_client import BaseClient
+from .base_evaluator import ModelBasedEvaluator, register_evaluator
+from .cascade import CascadeJudge
+from .context_reducer import ContextReducer
 
-class ContextEvaluator:
+@register_evaluator("context_utilization")
+class ContextEvaluator(ModelBasedEvaluator):
     """Evaluates context utilization in model responses."""
 
-    def __init__(self, evaluation_model: BaseModelClient, metrics_config: Dict[str, Any] = None):
+    name = "context"
+    system_prompt = "You are an expert evaluator assessing AI model context utilization."
+    default_metrics = ["relevance", "accuracy", "completeness"]
+
+    def __init__(self, evaluation_model: BaseClient, metrics_config: Dict[str, Any] = None,
+                 context_reducer: ContextReducer = None, cascade: CascadeJudge = None):
         """
         Initialize the context evaluator.
 
         Args:
             evaluation_model: Model client for evaluation
             metrics_config: Metrics configuration dictionary
+            context_reducer: Optional reducer that trims long contexts in judge prompts
+            cascade: Optional cheap-then-expensive judge cascade
         """
-        self.evaluation_model = evaluation_model
+        super().__init__(evaluation_model, metrics_config, cascade)
+        self.context_reducer = context_reducer
 
-        # Load metrics configuration if not provided
-        if metrics_config is None:
-            config_dir = os.environ.get("CONFIG_DIR", "./config")
-            self.metrics_config = load_evaluation_metrics(f"{config_dir}/evaluation/metrics.yaml")
-        else:
-            self.metrics_config = metrics_config
+    @classmethod
+    def settings_kwargs(cls, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the context reducer from the suite's `judge_context_reduction` block."""
+        return {"context_reducer": ContextReducer.from_config(settings.get("judge_context_reduction"))}
 
     async def evaluate(self,
                  prompt: str,
                  response: str,
                  context: str,
                  context_questions: List[str] = None,
-                 metrics: List[str] = None) -> Dict[str, Any]:
+                 metrics: List[str] = None,
+                 context_reducer: ContextReducer = None,
+                 full_context: bool = False) -> Dict[str, Any]:
         """
         Evaluate the context utilization in a model response.
 
@@ -41,66 +51,33 @@ class ContextEvaluator:
             context: Context provided to the model
             context_questions: Specific questions to check if they can be answered from the context
             metrics: Specific metrics to evaluate
+            context_reducer: Reducer to use for this call instead of the evaluator's own
+            full_context: Show the judge the whole context, without reduction or prompt budget trimming
 
         Returns:
             Dictionary of evaluation scores
         """
-        if not metrics:
-            metrics = ["relevance", "accuracy", "completeness"]
-
         results = {}
 
-        for metric in metrics:
-            if metric not in self.metrics_config["metrics"]:
-                continue
-
-            metric_config = self.metrics_config["metrics"][metric]
-
-            if metric_config["evaluation_method"] == "model_based":
-                # Create evaluation prompt
-                eval_prompt = self._create_evaluation_prompt(
-                    prompt, response, context, context_questions, metric
-                )
-
-                # Generate evaluation using evaluation model
-                eval_response = await self.evaluation_model.generate_response(
-                    prompt=eval_prompt,
-                    system_prompt="You are an expert evaluator assessing AI model context utilization.",
-                    temperature=0.1
-                )
-
-                # Parse score from response
-                try:
-                    score = self._parse_score(eval_response["text"], metric_config["scale"])
-                    results[metric] = score
-                except Exception as e:
-                    results[metric] = {
-                        "score": 0,
-                        "error": str(e)
-                    }
-            else:
-                # Implement rule-based or other evaluation methods here
-                results[metric] = 0
-
-        # Calculate weighted average score
-        weighted_score = 0
-        total_weight = 0
-
-        for metric, score in results.items():
-            if isinstance(score, dict):
-                # Skip if there was an error
-                continue
-
-            metric_weight = self.metrics_config["metrics"][metric].get("weight", 1.0)
-            weighted_score += score * metric_weight
-            total_weight += metric_weight
-
-        if total_weight > 0:
-            results["overall_score"] = weighted_score / total_weight
-        else:
-            results["overall_score"] = 0
-
-        return results
+        # Only show the judge the passages relevant to the response and questions
+        judge_context = context
+        reducer = None if full_context else (context_reducer or self.context_reducer)
+        if reducer and context:
+            reduction = reducer.reduce(context, [response] + (context_questions or []))
+            judge_context = reduction["context"]
+            results["context_reduction"] = {
+                key: value for key, value in reduction.items() if key != "context"
+            }
+
+        results.update(await self._evaluate_metrics(
+            metrics or self.default_metrics,
+            self._create_evaluation_prompt,
+            sections={"prompt": prompt, "response": response, "context": judge_context,
+                      "context_questions": context_questions},
+            fit_to_budget=not full_context
+        ))
+
+        return self._add_overall_score(results)
 
     def _create_evaluation_prompt(self, prompt: str, response: str,
                                   context: str, context_questions: List[str],
@@ -110,14 +87,14 @@ class ContextEvaluator:
         scale_description = ", ".join([f"{i}: {desc}" for i, desc in enumerate(metric_config.get("scale_descriptions", []))])
 
         template = f"""
-        Please evaluate the following AI model response for {metric_config["description"]}.
-
-        Original prompt:
-        "{prompt}"
+        Please evaluate the following AI model response.
 
         Context provided to the model:
         "{context}"
 
+        Original prompt:
+        "{prompt}"
+
         AI model response:
         "{response}"
         """
@@ -130,6 +107,8 @@ class ContextEvaluator:
             """
 
         template += f"""
+        Evaluate it for {metric_config["description"]}.
+
         On a scale of {min(metric_config["scale"])} to {max(metric_config["scale"])},
         where {min(metric_config["scale"])} means poor context utilization and {max(metric_config["scale"])} means excellent context utilization,
         rate the response and explain your rating.
@@ -148,24 +127,3 @@ class ContextEvaluator:
         """
 
         return template
-
-    def _parse_score(self, evaluation_text: str, scale: List[int]) -> int:
-        """Parse the score from evaluation response."""
-        try:
-            # Look for "Rating: X" pattern
-            for line in evaluation_text.split("\n"):
-                if line.lower().startswith("rating:"):
-                    score_str = line.split(":", 1)[1].strip()
-                    # Extract first number found
-                    import re
-                    numbers = re.findall(r'\d+', score_str)
-                    if numbers:
-                        score = int(numbers[0])
-                        # Ensure score is within scale
-                        return max(min(score, max(scale)), min(scale))
-
-            # If no rating found, assume minimum score
-            return min(scale)
-        except Exception:
-            # Default to minimum score on error
-            return min(scale)
\ No newline at end of file
@@ -0,0 +1,356 @@
+"""Judge-side context reduction for long-context evaluations."""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Any, Optional
+
+from ..utils.tokenizers import count_tokens
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+# Very common words carry no retrieval signal and only inflate the index
+_STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in is it its of on or that the
+this to was were will with which who what when where how why not no can
+""".split())
+
+OMISSION_MARKER = "[...]"
+
+
+def _terms(text: str) -> List[str]:
+    """Lower-case word terms of a text with stopwords removed."""
+    return [t for t in _WORD_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Minimal in-memory Okapi BM25 index over a list of passages."""
+
+    def __init__(self, passages: List[str], k1: float = 1.5, b: float = 0.75):
+        """
+        Build the index.
+
+        Args:
+            passages: Passages to index; their position is the document id
+            k1: Term frequency saturation parameter
+            b: Length normalization parameter
+        """
+        self.k1 = k1
+        self.b = b
+        self.doc_count = len(passages)
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[tuple]] = defaultdict(list)
+
+        for doc_id, passage in enumerate(passages):
+            terms = _terms(passage)
+            self.doc_lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self.postings[term].append((doc_id, tf))
+
+        total_length = sum(self.doc_lengths)
+        self.avg_length = total_length / self.doc_count if self.doc_count else 0.0
+
+    def _idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def score(self, query: str) -> List[float]:
+        """
+        Score every indexed passage against a query.
+
+        Args:
+            query: Free-text query
+
+        Returns:
+            BM25 score per passage, indexed by document id
+        """
+        scores = [0.0] * self.doc_count
+        if not self.doc_count or not self.avg_length:
+            return scores
+
+        for term in set(_terms(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for doc_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return scores
+
+
+class ContextReducer:
+    """Trims long contexts down to the passages a judge actually needs."""
+
+    def __init__(self,
+                 token_budget: int = 3000,
+                 chunk_tokens: int = 200,
+                 chunk_overlap: int = 40,
+                 model_name: str = "gpt-4",
+                 k1: float = 1.5,
+                 b: float = 0.75):
+        """
+        Initialize the context reducer.
+
+        Args:
+            token_budget: Maximum context tokens to include in a judge prompt
+            chunk_tokens: Approximate size of each indexed chunk in tokens
+            chunk_overlap: Approximate overlap between neighbouring chunks in tokens
+            model_name: Model name used for token counting
+            k1: BM25 term frequency saturation parameter
+            b: BM25 length normalization parameter
+        """
+        self.token_budget = token_budget
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = min(chunk_overlap, chunk_tokens // 2)
+        self.model_name = model_name
+        self.k1 = k1
+        self.b = b
+
+        self.stats = {
+            "calls": 0,
+            "reduced_calls": 0,
+            "original_tokens": 0,
+            "reduced_tokens": 0
+        }
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> Optional["ContextReducer"]:
+        """
+        Create a reducer from a suite `judge_context_reduction` settings block.
+
+        Args:
+            config: Settings dictionary, or None
+
+        Returns:
+            ContextReducer instance, or None if reduction is disabled
+        """
+        if not config or not config.get("enabled", False):
+            return None
+
+        return cls(
+            token_budget=config.get("token_budget", 3000),
+            chunk_tokens=config.get("chunk_tokens", 200),
+            chunk_overlap=config.get("chunk_overlap", 40),
+            model_name=config.get("model_name", "gpt-4")
+        )
+
+    def chunk(self, context: str) -> List[str]:
+        """
+        Split a context into overlapping, paragraph-aligned chunks.
+
+        Args:
+            context: Full context text
+
+        Returns:
+            List of chunk strings in document order
+        """
+        # Words are roughly 0.75 tokens, so size windows in words up front
+        # and only use the tokenizer for budget accounting.
+        window = max(1, int(self.chunk_tokens * 0.75))
+        overlap = int(self.chunk_overlap * 0.75)
+
+        chunks = []
+        for paragraph in _PARAGRAPH_RE.split(context):
+            words = paragraph.split()
+            if not words:
+                continue
+            if len(words) <= window:
+                chunks.append(" ".join(words))
+                continue
+            step = max(1, window - overlap)
+            for start in range(0, len(words), step):
+                chunks.append(" ".join(words[start:start + window]))
+                if start + window >= len(words):
+                    break
+
+        return chunks
+
+    def reduce(self, context: str, queries: List[str]) -> Dict[str, Any]:
+        """
+        Reduce a context to the passages most relevant to the queries.
+
+        Every query gets its own BM25 ranking and chunks are picked from the
+        rankings round-robin, so a single long query (usually the response)
+        cannot crowd out the specific context questions.
+
+        Args:
+            context: Full context text
+            queries: Texts to retrieve for (response, context questions, ...)
+
+        Returns:
+            Dictionary with the reduced context and token accounting
+        """
+        original_tokens = count_tokens(context, self.model_name)
+        self.stats["calls"] += 1
+        self.stats["original_tokens"] += original_tokens
+
+        if original_tokens <= self.token_budget:
+            self.stats["reduced_tokens"] += original_tokens
+            return {
+                "context": context,
+                "reduced": False,
+                "original_tokens": original_tokens,
+                "reduced_tokens": original_tokens,
+                "chunks_total": None,
+                "chunks_kept": None
+            }
+
+        chunks = self.chunk(context)
+        index = BM25Index(chunks, k1=self.k1, b=self.b)
+
+        # Every kept chunk may open a gap, so it is charged for an omission
+        # marker and the separators around it; one more marker may close the text.
+        gap_tokens = count_tokens(f"{OMISSION_MARKER}\n\n", self.model_name) + 1
+        chunk_cost: Dict[int, int] = {}
+
+        def cost(doc_id: int) -> int:
+            if doc_id not in chunk_cost:
+                chunk_cost[doc_id] = count_tokens(chunks[doc_id], self.model_name) + gap_tokens
+            return chunk_cost[doc_id]
+
+        rankings = []
+        for query in queries:
+            if not query:
+                continue
+            scores = index.score(query)
+            ranked = [i for i in sorted(range(len(chunks)), key=lambda i: -scores[i]) if scores[i] > 0]
+            if ranked:
+                rankings.append(ranked)
+
+        selected: List[int] = []
+        used_tokens = gap_tokens
+        position = 0
+        while rankings and used_tokens < self.token_budget:
+            progressed = False
+            for ranked in rankings:
+                if position >= len(ranked):
+                    continue
+                progressed = True
+                doc_id = ranked[position]
+                if doc_id in selected:
+                    continue
+                if used_tokens + cost(doc_id) > self.token_budget:
+                    continue
+                selected.append(doc_id)
+                used_tokens += cost(doc_id)
+            if not progressed:
+                break
+            position += 1
+
+        # Fall back to the head of the document if nothing matched at all
+        if not selected:
+            for doc_id in range(len(chunks)):
+                if used_tokens + cost(doc_id) > self.token_budget:
+                    break
+                selected.append(doc_id)
+                used_tokens += cost(doc_id)
+
+        # Tokens can merge across chunk boundaries, so check the assembled text
+        # and drop the least relevant chunks until it fits
+        reduced_context = self._assemble(chunks, selected)
+        reduced_tokens = count_tokens(reduced_context, self.model_name)
+        while reduced_tokens > self.token_budget and selected:
+            selected.pop()
+            reduced_context = self._assemble(chunks, selected)
+            reduced_tokens = count_tokens(reduced_context, self.model_name)
+
+        self.stats["reduced_calls"] += 1
+        self.stats["reduced_tokens"] += reduced_tokens
+
+        return {
+            "context": reduced_context,
+            "reduced": True,
+            "original_tokens": original_tokens,
+            "reduced_tokens": reduced_tokens,
+            "chunks_total": len(chunks),
+            "chunks_kept": len(selected)
+        }
+
+    @staticmethod
+    def _assemble(chunks: List[str], selected: List[int]) -> str:
+        """Join the selected chunks in document order, marking the gaps."""
+        parts = []
+        previous = -1
+        for doc_id in sorted(selected):
+            if doc_id != previous + 1:
+                parts.append(OMISSION_MARKER)
+            parts.append(chunks[doc_id])
+            previous = doc_id
+        if previous != len(chunks) - 1:
+            parts.append(OMISSION_MARKER)
+        return "\n\n".join(parts)
+
+    def get_savings(self) -> Dict[str, Any]:
+        """
+        Summarize the judge input tokens saved so far.
+
+        Returns:
+            Dictionary of cumulative token savings
+        """
+        saved = self.stats["original_tokens"] - self.stats["reduced_tokens"]
+        return {
+            **self.stats,
+            "tokens_saved": saved,
+            "savings_ratio": saved / self.stats["original_tokens"] if self.stats["original_tokens"] else 0.0
+        }
+
+
+async def audit_context_reduction(evaluator: Any,
+                                  cases: List[Dict[str, Any]],
+                                  tolerance: int = 1,
+                                  reducer: Optional[ContextReducer] = None) -> Dict[str, Any]:
+    """
+    Check how often the reduced-context judge agrees with the full-context judge.
+
+    Each case is evaluated twice with the same evaluator, once with the
+    reducer and once with the full context, and per-metric scores are
+    compared. The evaluator itself is not modified, so it can keep serving
+    other evaluations concurrently.
+
+    Args:
+        evaluator: ContextEvaluator or HallucinationEvaluator
+        cases: Keyword argument dictionaries for `evaluator.evaluate`
+        tolerance: Maximum score difference that still counts as agreement
+        reducer: Reducer to audit, or None for the evaluator's context_reducer
+
+    Returns:
+        Dictionary with agreement rate, mean absolute difference and per-case details
+
+    Raises:
+        ValueError: If there is no reducer to audit
+    """
+    reducer = reducer or evaluator.context_reducer
+    if reducer is None:
+        raise ValueError("Evaluator has no context reducer to audit")
+
+    comparisons = []
+    details = []
+    for case in cases:
+        reduced = await evaluator.evaluate(**case, context_reducer=reducer)
+        full = await evaluator.evaluate(**case, full_context=True)
+
+        case_diffs = {}
+        for metric, full_score in full.items():
+            reduced_score = reduced.get(metric)
+            if metric == "overall_score" or isinstance(full_score, dict) or isinstance(reduced_score, dict):
+                continue
+            if reduced_score is None:
+                continue
+            diff = abs(full_score - reduced_score)
+            case_diffs[metric] = diff
+            comparisons.append(diff)
+        details.append(case_diffs)
+
+    agreed = sum(1 for diff in comparisons if diff <= tolerance)
+    return {
+        "cases": len(cases),
+        "comparisons": len(comparisons),
+        "agreement_rate": agreed / len(comparisons) if comparisons else 1.0,
+        "mean_absolute_difference": sum(comparisons) / len(comparisons) if comparisons else 0.0,
+        "tolerance": tolerance,
+        "details": details,
+        "savings": reducer.get_savings()
+    }
@@ -0,0 +1,85 @@
+"""Creative writing evaluator."""
+
+from typing import Dict, List, Any
+
+from .base_evaluator import ModelBasedEvaluator, register_evaluator
+
+@register_evaluator("creative_quality")
+class CreativeEvaluator(ModelBasedEvaluator):
+    """Evaluates the quality of creative content in model responses."""
+
+    name = "creative"
+    system_prompt = "You are an expert evaluator assessing the quality of AI-generated creative writing."
+    default_metrics = ["coherence", "originality", "engagement"]
+
+    async def evaluate(self,
+                 prompt: str,
+                 response: str,
+                 target_style: str = None,
+                 source_content: str = None,
+                 metrics: List[str] = None) -> Dict[str, Any]:
+        """
+        Evaluate the creative quality of a model response.
+
+        Args:
+            prompt: Original prompt given to the model
+            response: Model's response
+            target_style: Style or voice the response was asked to write in, if any
+            source_content: Content the response was asked to transform, if any
+            metrics: Specific metrics to evaluate
+
+        Returns:
+            Dictionary of evaluation scores
+        """
+        results = await self._evaluate_metrics(
+            metrics or self.default_metrics,
+            self._create_evaluation_prompt,
+            sections={"prompt": prompt, "response": response,
+                      "target_style": target_style, "source_content": source_content}
+        )
+
+        return self._add_overall_score(results)
+
+    def _create_evaluation_prompt(self, prompt: str, response: str,
+                                  target_style: str, source_content: str,
+                                  metric: str) -> str:
+        """Create a prompt for evaluating a specific creative quality metric."""
+        metric_config = self.metrics_config["metrics"][metric]
+
+        template = """
+        Please evaluate the following AI model response.
+        """
+
+        if source_content:
+            template += f"""
+            Source content to transform:
+            "{source_content}"
+            """
+
+        template += f"""
+        Original prompt:
+        "{prompt}"
+
+        AI model response:
+        "{response}"
+        """
+
+        if target_style:
+            template += f"""
+            Requested style or voice:
+            "{target_style}"
+            """
+
+        template += f"""
+        Evaluate it for {metric_config["description"]}.
+
+        On a scale of {min(metric_config["scale"])} to {max(metric_config["scale"])},
+        where {min(metric_config["scale"])} means poor and {max(metric_config["scale"])} means excellent,
+        rate the response and explain your rating.
+
+        Your answer should be in this format:
+        Rating: [numeric score between {min(metric_config["scale"])} and {max(metric_config["scale"])}]
+        Explanation: [your explanation]
+        """
+
+        return template
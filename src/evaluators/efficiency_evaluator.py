@@ -1,6 +1,62 @@
 """Efficiency evaluator for token usage and response time."""
 
-from typing import Dict, Any
+import warnings
+from typing import Callable, Dict, List, Any, Optional
+
+import numpy as np
+
+# Latency percentiles reported by the batch mode
+PERCENTILES = (50, 90, 95, 99)
+
+# Upper bound on bootstrap resample cells held in memory at once
+_BOOTSTRAP_BLOCK_CELLS = 5_000_000
+
+
+def responses_to_arrays(responses: List[Dict[str, Any]],
+                        quality_scores: Optional[List[float]] = None) -> Dict[str, np.ndarray]:
+    """
+    Convert a run's response records into column arrays.
+
+    Args:
+        responses: Response records with `model`, `context_length`, `usage`, `timing`
+            and `cost` (and optionally `quality_score`)
+        quality_scores: Quality score per response, overriding `quality_score` in the records
+
+    Returns:
+        Dictionary of equal-length NumPy arrays; missing timings are NaN
+    """
+    count = len(responses)
+    arrays = {
+        "model": np.empty(count, dtype=object),
+        "context_length": np.empty(count, dtype=object),
+        "latency": np.full(count, np.nan),
+        "ttft": np.full(count, np.nan),
+        "completion_tokens": np.zeros(count),
+        "total_tokens": np.zeros(count),
+        "cost": np.zeros(count),
+        "quality": np.full(count, np.nan),
+    }
+
+    for i, response in enumerate(responses):
+        usage = response.get("usage") or {}
+        timing = response.get("timing") or {}
+        arrays["model"][i] = response.get("model", "unknown")
+        arrays["context_length"][i] = response.get("context_length", "all")
+        # A zero timing is a measurement (e.g. a cached response), only a missing one is NaN
+        if timing.get("total_time") is not None:
+            arrays["latency"][i] = timing["total_time"]
+        if timing.get("time_to_first_token") is not None:
+            arrays["ttft"][i] = timing["time_to_first_token"]
+        completion = usage.get("completion_tokens", 0) or 0
+        arrays["completion_tokens"][i] = completion
+        arrays["total_tokens"][i] = usage.get("total_tokens", 0) or (usage.get("prompt_tokens", 0) or 0) + completion
+        arrays["cost"][i] = response.get("cost", 0) or 0
+        quality = quality_scores[i] if quality_scores is not None else response.get("quality_score")
+        if quality is not None:
+            arrays["quality"][i] = quality
+
+    return arrays
+
 
 class EfficiencyEvaluator:
     """Evaluates efficiency metrics of model responses."""
@@ -59,4 +115,120 @@ class EfficiencyEvaluator:
         results["cost"] = cost
         results["cost_per_1k_tokens"] = (cost * 1000) / total_tokens if total_tokens > 0 else 0
 
-        return results
\ No newline at end of file
+        return results
+
+    def evaluate_batch(self,
+                       arrays: Dict[str, np.ndarray],
+                       n_bootstrap: int = 1000,
+                       confidence: float = 0.95,
+                       seed: Optional[int] = 0) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Compute run-level efficiency distributions per model and context length.
+
+        Args:
+            arrays: Column arrays from `responses_to_arrays`
+            n_bootstrap: Bootstrap resamples used for confidence intervals (0 to skip)
+            confidence: Confidence level of the intervals
+            seed: Random seed for resampling
+
+        Returns:
+            Nested dictionary {model: {context_length: metrics}}; each metric is a
+            value, and every metric with an interval also has a `<metric>_ci` [low, high]
+        """
+        rng = np.random.default_rng(seed)
+        alpha = (1 - confidence) / 2
+
+        keys = np.array([f"{m}\x00{c}" for m, c in zip(arrays["model"], arrays["context_length"])])
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        ends = np.r_[starts[1:], len(sorted_keys)]
+
+        results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for start, end in zip(starts, ends):
+            index = order[start:end]
+            model = arrays["model"][index[0]]
+            context_length = arrays["context_length"][index[0]]
+            results.setdefault(model, {})[context_length] = self._group_metrics(
+                {name: column[index] for name, column in arrays.items()
+                 if name not in ("model", "context_length")},
+                rng, n_bootstrap, alpha
+            )
+
+        return results
+
+    def _group_metrics(self, group: Dict[str, np.ndarray], rng: np.random.Generator,
+                       n_bootstrap: int, alpha: float) -> Dict[str, Any]:
+        """Percentiles, throughput and cost per quality point for one group, with bootstrap CIs."""
+        latency, ttft = group["latency"], group["ttft"]
+        metrics: Dict[str, Any] = {"samples": int(len(latency))}
+
+        for name, column in (("latency", latency), ("ttft", ttft)):
+            self._estimate(
+                metrics, [f"{name}_p{q}" for q in PERCENTILES],
+                (column[~np.isnan(column)],),
+                lambda values: np.percentile(values, PERCENTILES, axis=-1),
+                rng, n_bootstrap, alpha
+            )
+
+        timed = ~np.isnan(latency)
+        self._estimate(
+            metrics, ["throughput_tokens_per_second"],
+            (group["completion_tokens"][timed], latency[timed]),
+            lambda tokens, seconds: self._ratio(tokens.sum(axis=-1), seconds.sum(axis=-1))[np.newaxis],
+            rng, n_bootstrap, alpha
+        )
+
+        scored = ~np.isnan(group["quality"])
+        self._estimate(
+            metrics, ["cost_per_quality_point"],
+            (group["cost"][scored], group["quality"][scored]),
+            lambda cost, quality: self._ratio(cost.sum(axis=-1), quality.sum(axis=-1))[np.newaxis],
+            rng, n_bootstrap, alpha
+        )
+
+        return metrics
+
+    def _estimate(self, metrics: Dict[str, Any], names: List[str], columns: tuple,
+                  statistic: Callable[..., np.ndarray], rng: np.random.Generator,
+                  n_bootstrap: int, alpha: float):
+        """
+        Add point estimates and percentile-bootstrap CIs of a statistic to `metrics`.
+
+        `statistic` maps equal-length columns to one value per name; given
+        (resamples, n) matrices it must return a (names, resamples) array.
+        """
+        n = len(columns[0])
+        if n == 0:
+            for name in names:
+                metrics[name] = None
+                metrics[f"{name}_ci"] = None
+            return
+
+        for name, value in zip(names, np.asarray(statistic(*columns), dtype=float)):
+            metrics[name] = None if np.isnan(value) else float(value)
+
+        if n_bootstrap <= 0 or n < 2:
+            return
+
+        # Resample in blocks so huge groups don't allocate resamples x n at once
+        block = max(1, _BOOTSTRAP_BLOCK_CELLS // n)
+        samples = []
+        for first in range(0, n_bootstrap, block):
+            idx = rng.integers(0, n, size=(min(block, n_bootstrap - first), n))
+            samples.append(statistic(*(column[idx] for column in columns)))
+        samples = np.concatenate(samples, axis=-1)
+
+        with warnings.catch_warnings():
+            # Statistics undefined on every resample are reported as None
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            bounds = np.nanpercentile(samples, [100 * alpha, 100 * (1 - alpha)], axis=-1)
+        for name, low, high in zip(names, bounds[0], bounds[1]):
+            metrics[f"{name}_ci"] = None if np.isnan(low) else [float(low), float(high)]
+
+    @staticmethod
+    def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+        """Elementwise ratio that is NaN where the denominator is not positive."""
+        numerator, denominator = np.asarray(numerator, dtype=float), np.asarray(denominator, dtype=float)
+        safe = np.where(denominator > 0, denominator, 1.0)
+        return np.where(denominator > 0, numerator / safe, np.nan)
@@ -1,106 +1,134 @@
 """Instruction following evaluator."""
 
-import os
+import json
 from typing import Dict, List, Any
 
-from ..clients.base_client import BaseModelClient
-from ..utils.config import load_evaluation_metrics
+from .base_evaluator import ModelBasedEvaluator, register_evaluator
+from .constraints import compile_constraints
 
-class InstructionEvaluator:
+@register_evaluator("instruction_compliance")
+class InstructionEvaluator(ModelBasedEvaluator):
     """Evaluates instruction following capabilities of model responses."""
 
-    def __init__(self, evaluation_model: BaseModelClient, metrics_config: Dict[str, Any] = None):
-        """
-        Initialize the instruction evaluator.
-
-        Args:
-            evaluation_model: Model client for evaluation
-            metrics_config: Metrics configuration dictionary
-        """
-        self.evaluation_model = evaluation_model
-
-        # Load metrics configuration if not provided
-        if metrics_config is None:
-            config_dir = os.environ.get("CONFIG_DIR", "./config")
-            self.metrics_config = load_evaluation_metrics(f"{config_dir}/evaluation/metrics.yaml")
-        else:
-            self.metrics_config = metrics_config
+    name = "instruction"
+    system_prompt = "You are an expert evaluator assessing AI model responses for instruction following."
+    default_metrics = ["compliance_rate", "format_adherence"]
 
     async def evaluate(self,
                  prompt: str,
                  response: str,
                  instructions: List[str] = None,
                  required_format: str = None,
-                 metrics: List[str] = None) -> Dict[str, Any]:
+                 metrics: List[str] = None,
+                 constraints: List[Dict[str, Any]] = None,
+                 constraint_results: Dict[str, List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         Evaluate the instruction following quality of a model response.
 
+        Objective constraints are checked locally; the judge is only asked about
+        metrics that have subjective instructions or no local checks at all.
+
         Args:
             prompt: Original prompt given to the model
             response: Model's response
             instructions: List of specific instructions to check
             required_format: Expected format for the response
             metrics: Specific metrics to evaluate
+            constraints: Declarative constraint specs from the test case
+            constraint_results: Precomputed local check results (see `evaluate_batch`)
 
         Returns:
             Dictionary of evaluation scores
         """
-        if not metrics:
-            metrics = ["compliance_rate", "format_adherence"]
+        metrics = metrics or self.default_metrics
+        compiled = compile_constraints(constraints)
+
+        if compiled is None:
+            results = await self._evaluate_metrics(
+                metrics,
+                self._create_evaluation_prompt,
+                sections={"prompt": prompt, "response": response,
+                          "instructions": instructions, "required_format": required_format}
+            )
+            return self._add_overall_score(results)
+
+        if constraint_results is None:
+            constraint_results = compiled.check(response)
+
+        # Free-text instructions are subjective compliance checks
+        subjective = {metric: list(items) for metric, items in compiled.subjective.items()}
+        if instructions:
+            subjective.setdefault("compliance_rate", []).extend(instructions)
 
         results = {}
-
+        judged = []
         for metric in metrics:
             if metric not in self.metrics_config["metrics"]:
                 continue
-
-            metric_config = self.metrics_config["metrics"][metric]
-
-            if metric_config["evaluation_method"] == "model_based":
-                # Create evaluation prompt
-                eval_prompt = self._create_evaluation_prompt(
-                    prompt, response, instructions, required_format, metric
-                )
-
-                # Generate evaluation using evaluation model
-                eval_response = await self.evaluation_model.generate_response(
-                    prompt=eval_prompt,
-                    system_prompt="You are an expert evaluator assessing AI model responses for instruction following.",
-                    temperature=0.1
-                )
-
-                # Parse score from response
-                try:
-                    score = self._parse_score(eval_response["text"], metric_config["scale"])
-                    results[metric] = score
-                except Exception as e:
-                    results[metric] = {
-                        "score": 0,
-                        "error": str(e)
-                    }
+            if constraint_results.get(metric) and not subjective.get(metric):
+                results[metric] = self._checks_to_score(constraint_results[metric], metric)
             else:
-                # Implement rule-based or other evaluation methods here
-                results[metric] = 0
-
-        # Calculate weighted average score
-        weighted_score = 0
-        total_weight = 0
-
-        for metric, score in results.items():
-            if isinstance(score, dict):
-                # Skip if there was an error
-                continue
-
-            metric_weight = self.metrics_config["metrics"][metric].get("weight", 1.0)
-            weighted_score += score * metric_weight
-            total_weight += metric_weight
+                judged.append(metric)
+
+        def build_prompt(metric: str, prompt: str, response: str) -> str:
+            if constraint_results.get(metric):
+                # Objective parts are already settled; only ask about the rest
+                return self._create_evaluation_prompt(prompt, response, subjective[metric], None, metric)
+            return self._create_evaluation_prompt(
+                prompt, response, subjective.get(metric) or instructions, required_format, metric
+            )
+
+        judged_results = await self._evaluate_metrics(
+            judged, build_prompt, sections={"prompt": prompt, "response": response}
+        )
+        if "prompt_budget" in judged_results:
+            results["prompt_budget"] = judged_results.pop("prompt_budget")
+
+        for metric, score in judged_results.items():
+            checks = constraint_results.get(metric)
+            if checks and not isinstance(score, dict):
+                # Blend local and judged parts by how many constraints each covers
+                local_score = self._checks_to_score(checks, metric)
+                judged_count = len(subjective[metric])
+                score = (local_score * len(checks) + score * judged_count) / (len(checks) + judged_count)
+            results[metric] = score
+
+        results["constraint_checks"] = constraint_results
+        return self._add_overall_score(results)
+
+    async def evaluate_batch(self,
+                             cases: List[Dict[str, Any]],
+                             max_concurrency: int = None) -> List[Dict[str, Any]]:
+        """
+        Evaluate many responses, running local constraint checks for the whole batch first.
 
-        if total_weight > 0:
-            results["overall_score"] = weighted_score / total_weight
-        else:
-            results["overall_score"] = 0
+        Args:
+            cases: Keyword argument dictionaries for `evaluate`, one per response
+            max_concurrency: Maximum concurrent judge evaluations
 
-        return results
+        Returns:
+            List of evaluation results in the same order as `cases`
+        """
+        # Group responses by identical constraint specs so each set is compiled once
+        groups: Dict[str, List[int]] = {}
+        for position, case in enumerate(cases):
+            if case.get("constraints") and case.get("constraint_results") is None:
+                key = json.dumps(case["constraints"], sort_keys=True)
+                groups.setdefault(key, []).append(position)
+
+        cases = list(cases)
+        for positions in groups.values():
+            compiled = compile_constraints(cases[positions[0]]["constraints"])
+            checked = compiled.check_batch([cases[position]["response"] for position in positions])
+            for position, constraint_results in zip(positions, checked):
+                cases[position] = {**cases[position], "constraint_results": constraint_results}
+
+        return await super().evaluate_batch(cases, max_concurrency)
+
+    def _checks_to_score(self, checks: List[Dict[str, Any]], metric: str) -> float:
+        """Map the pass rate of local checks onto the metric's scale."""
+        pass_rate = sum(1 for check in checks if check["passed"]) / len(checks)
+        return self._scale_rate(pass_rate, metric)
 
     def _create_evaluation_prompt(self, prompt: str, response: str,
                                   instructions: List[str], required_format: str,
@@ -110,7 +138,7 @@ class InstructionEvaluator:
         scale_description = ", ".join([f"{i}: {desc}" for i, desc in enumerate(metric_config.get("scale_descriptions", []))])
 
         template = f"""
-        Please evaluate the following AI model response for {metric_config["description"]}.
+        Please evaluate the following AI model response.
 
         Original prompt:
         "{prompt}"
@@ -133,6 +161,8 @@ class InstructionEvaluator:
             """
 
         template += f"""
+        Evaluate it for {metric_config["description"]}.
+
         On a scale of {min(metric_config["scale"])} to {max(metric_config["scale"])},
         where {min(metric_config["scale"])} means poor instruction following and {max(metric_config["scale"])} means perfect instruction following,
         rate the response and explain your rating. Identify specific instructions that were followed or not followed.
@@ -145,24 +175,3 @@ class InstructionEvaluator:
         """
 
         return template
-
-    def _parse_score(self, evaluation_text: str, scale: List[int]) -> int:
-        """Parse the score from evaluation response."""
-        try:
-            # Look for "Rating: X" pattern
-            for line in evaluation_text.split("\n"):
-                if line.lower().startswith("rating:"):
-                    score_str = line.split(":", 1)[1].strip()
-                    # Extract first number found
-                    import re
-                    numbers = re.findall(r'\d+', score_str)
-                    if numbers:
-                        score = int(numbers[0])
-                        # Ensure score is within scale
-                        return max(min(score, max(scale)), min(scale))
-
-            # If no rating found, assume minimum score
-            return min(scale)
-        except Exception:
-            # Default to minimum score on error
-            return min(scale)
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""Presentation (PPT) outline evaluator."""
+
+from typing import Dict, List, Any
+
+from ..clients.base_client import BaseClient
+from .base_evaluator import ModelBasedEvaluator, register_evaluator
+from .cascade import CascadeJudge
+from .ppt_outline import StructuralScorer, parse_outline
+
+@register_evaluator("ppt_quality")
+class PPTEvaluator(ModelBasedEvaluator):
+    """Evaluates slide outlines: structure is measured locally, narrative is judged."""
+
+    name = "ppt"
+    system_prompt = "You are an expert presentation designer assessing slide decks written by AI models."
+    default_metrics = ["structure", "completeness", "conciseness"]
+
+    # Metrics scored from the parsed outline instead of the judge
+    structural_metrics = {"structure", "completeness", "conciseness"}
+
+    def __init__(self, evaluation_model: BaseClient, metrics_config: Dict[str, Any] = None,
+                 scorer: StructuralScorer = None, cascade: CascadeJudge = None):
+        """
+        Initialize the PPT evaluator.
+
+        Args:
+            evaluation_model: Model client for the narrative and engagement metrics
+            metrics_config: Metrics configuration dictionary
+            scorer: Structural scorer, or None for default targets
+            cascade: Optional cheap-then-expensive judge cascade
+        """
+        super().__init__(evaluation_model, metrics_config, cascade)
+        self.scorer = scorer or StructuralScorer()
+
+    @classmethod
+    def settings_kwargs(cls, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the structural scorer from the suite's `outline_structure` block."""
+        return {"scorer": StructuralScorer.from_config(settings.get("outline_structure"))}
+
+    async def evaluate(self,
+                 prompt: str,
+                 response: str,
+                 metrics: List[str] = None,
+                 duration: Any = None,
+                 slide_range: List[int] = None,
+                 slides: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Evaluate a slide outline.
+
+        Args:
+            prompt: Original prompt given to the model
+            response: Model's response
+            metrics: Specific metrics to evaluate
+            duration: Presentation length in minutes, used for the expected slide count
+            slide_range: Explicit (min, max) slide count
+            slides: Pre-parsed slide statistics (see `evaluate_batch`)
+
+        Returns:
+            Dictionary of evaluation scores, including per-slide statistics
+        """
+        metrics = metrics or self.default_metrics
+        if slides is None:
+            slides = parse_outline(response)
+        structural = self.scorer.score(slides, duration, slide_range)
+
+        results = {}
+        judged = []
+        for metric in metrics:
+            if metric not in self.metrics_config["metrics"]:
+                continue
+            if metric in self.structural_metrics:
+                results[metric] = self._scale_rate(structural["rates"][metric], metric)
+            else:
+                judged.append(metric)
+
+        results.update(await self._evaluate_metrics(
+            judged,
+            self._create_evaluation_prompt,
+            sections={"prompt": prompt, "response": response}
+        ))
+
+        results["outline"] = {"slides": slides, **structural["checks"]}
+        return self._add_overall_score(results)
+
+    async def evaluate_batch(self,
+                             cases: List[Dict[str, Any]],
+                             max_concurrency: int = None) -> List[Dict[str, Any]]:
+        """
+        Evaluate many outlines, parsing every response before any judge calls.
+
+        Args:
+            cases: Keyword argument dictionaries for `evaluate`, one per response
+            max_concurrency: Maximum concurrent judge evaluations
+
+        Returns:
+            List of evaluation results in the same order as `cases`
+        """
+        cases = [
+            case if case.get("slides") is not None else {**case, "slides": parse_outline(case["response"])}
+            for case in cases
+        ]
+        return await super().evaluate_batch(cases, max_concurrency)
+
+    def _create_evaluation_prompt(self, prompt: str, response: str, metric: str) -> str:
+        """Create a prompt for judging a narrative or engagement metric."""
+        metric_config = self.metrics_config["metrics"][metric]
+
+        template = f"""
+        Please evaluate the following presentation outline written by an AI model.
+        Slide counts, bullet counts and lengths are measured separately; focus on the content and story.
+
+        Original request:
+        "{prompt}"
+
+        Presentation outline:
+        "{response}"
+
+        Evaluate it for {metric_config["description"]}.
+
+        On a scale of {min(metric_config["scale"])} to {max(metric_config["scale"])},
+        where {min(metric_config["scale"])} means very poor and {max(metric_config["scale"])} means excellent,
+        rate the outline and explain your rating.
+
+        Your answer should be in this format:
+        Rating: [numeric score between {min(metric_config["scale"])} and {max(metric_config["scale"])}]
+        Explanation: [your explanation]
+        """
+
+        return template
@@ -0,0 +1,317 @@
+"""Streaming slide-outline parser and structural scorer for PPT responses."""
+
+import re
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+
+_WORD_RE = re.compile(r"\b\w+\b")
+_SLIDE_RE = re.compile(
+    r"^\s*(?:#{1,6}\s*)?(?:\*\*)?\s*slide\s*(\d+)\s*(?:\*\*)?\s*[:.\-–—)]?\s*(.*?)\s*(?:\*\*)?\s*$",
+    re.IGNORECASE
+)
+_HEADING_RE = re.compile(r"^\s*(?:(#{1,6})\s+(.+?)|\*\*([^*]+?)\*\*\s*:?)\s*$")
+_BULLET_RE = re.compile(r"^(\s*)(?:[-*•▪◦]|\d+[.)])\s+(.*)$")
+_LABEL_RE = re.compile(r"^\s*[-*]?\s*(?:\*\*|_)?\s*([A-Za-z][A-Za-z ]{1,30}?)\s*(?:\*\*|_)?\s*:\s*(?:\*\*|_)?\s*(.*)$")
+
+_TITLE_LABELS = {"title", "slide title", "heading"}
+_VISUAL_LABELS = {"visual", "visuals", "visual element", "visual elements", "visual note",
+                  "image", "images", "graphic", "graphics", "chart", "diagram"}
+_NOTES_LABELS = {"notes", "speaker notes", "note"}
+_CONTENT_LABELS = {"content", "bullet points", "bullets", "key points", "key content"}
+
+# Level given to slides started by a plain numbered or bare title line, below any markdown heading
+_PLAIN_LEVEL = 8
+
+_INTRO_RE = re.compile(r"intro|overview|agenda|welcome|title slide|opening", re.IGNORECASE)
+_CONCLUSION_RE = re.compile(r"conclu|summary|takeaway|next steps|recap|q\s*&\s*a|questions|thank|closing",
+                            re.IGNORECASE)
+
+
+def _words(text: str) -> int:
+    return len(_WORD_RE.findall(text))
+
+
+def _clean(text: str) -> str:
+    return text.strip().strip("*_#").strip()
+
+
+class OutlineParser:
+    """
+    Incremental parser turning an outline into per-slide statistics.
+
+    Lines can be fed one at a time (e.g. from a streamed response) so the
+    whole response never has to be re-scanned; statistics are computed in `close`.
+
+    Slides start at "Slide N" markers, at markdown or bold headings, and in
+    plain outlines at unindented numbered lines ("1. Introduction") or at bare
+    title lines followed by indented bullets.
+    """
+
+    def __init__(self):
+        self.slides: List[Dict[str, Any]] = []
+        self._current: Optional[Dict[str, Any]] = None
+        self._numbered = False
+        self._bullet_indent: Optional[int] = None
+        # Bare line that becomes a slide title if indented bullets follow it
+        self._pending_title: Optional[str] = None
+
+    def feed(self, line: str):
+        """
+        Consume one line of the outline.
+
+        Args:
+            line: Line of text without its trailing newline
+        """
+        if not line.strip():
+            return
+        pending_title, self._pending_title = self._pending_title, None
+
+        match = _SLIDE_RE.match(line)
+        if match:
+            if not self._numbered:
+                # Headings seen before the first "Slide N" marker are a deck title/preamble
+                self._numbered = True
+                self.slides = []
+                self._current = None
+            self._start_slide(_clean(match.group(2)))
+            return
+
+        label = _LABEL_RE.match(line)
+        if label and self._current is not None:
+            name, value = label.group(1).strip().lower(), _clean(label.group(2))
+            if name in _TITLE_LABELS:
+                self._current["title"] = value
+                return
+            if name in _VISUAL_LABELS:
+                self._current["has_visual"] = True
+                return
+            if name in _NOTES_LABELS:
+                self._current["has_notes"] = True
+                return
+            if name in _CONTENT_LABELS:
+                if value:
+                    self._add_bullet(0, value)
+                return
+
+        bullet = _BULLET_RE.match(line)
+        if bullet:
+            indent = len(bullet.group(1).expandtabs(4))
+            if indent == 0 and line[0].isdigit() and self._plain_titles():
+                self._start_slide(_clean(bullet.group(2)), _PLAIN_LEVEL)
+                return
+            if pending_title is not None and indent > 0:
+                self._start_slide(pending_title, _PLAIN_LEVEL)
+            if self._current is not None:
+                self._add_bullet(indent, _clean(bullet.group(2)))
+            return
+
+        heading = _HEADING_RE.match(line)
+        if heading and not self._numbered:
+            level = len(heading.group(1)) if heading.group(1) else 7
+            self._start_slide(_clean(heading.group(2) or heading.group(3)), level)
+        elif not heading and not line[0].isspace() and self._plain_titles():
+            self._pending_title = _clean(line)
+
+    def _plain_titles(self) -> bool:
+        """Whether plain numbered or bare lines can start slides, i.e. the outline has no slide headings."""
+        if self._numbered:
+            return False
+        current = self._current
+        return (current is None or current["level"] == _PLAIN_LEVEL
+                # A bullet-less "# Title" at the top is the deck title
+                or (len(self.slides) == 1 and current["level"] == 1 and not current["bullets"]))
+
+    def _start_slide(self, title: str, level: int = 0):
+        self._current = {"title": title, "level": level, "bullets": [], "sub_bullets": 0,
+                         "has_visual": False, "has_notes": False}
+        self.slides.append(self._current)
+        self._bullet_indent = None
+
+    def _add_bullet(self, indent: int, text: str):
+        lowered = text.lower()
+        if any(lowered.startswith(name) for name in _VISUAL_LABELS):
+            self._current["has_visual"] = True
+            return
+        if self._bullet_indent is None or indent < self._bullet_indent:
+            self._bullet_indent = indent
+        if indent > self._bullet_indent:
+            self._current["sub_bullets"] += 1
+        else:
+            self._current["bullets"].append(text)
+
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        Finish parsing and compute per-slide statistics.
+
+        Returns:
+            One statistics dictionary per slide, in order
+        """
+        slides = self.slides
+        if (len(slides) > 1 and not slides[0]["bullets"]
+                and slides[0]["level"] < min(slide["level"] for slide in slides[1:])):
+            # A lone top-level heading above the slide headings is the deck title
+            slides = slides[1:]
+
+        stats = []
+        last = len(slides) - 1
+        for index, slide in enumerate(slides):
+            bullet_words = [_words(bullet) for bullet in slide["bullets"]]
+            title = slide["title"]
+            if _INTRO_RE.search(title) and index <= 1:
+                section = "introduction"
+            elif _CONCLUSION_RE.search(title) and index >= last - 2:
+                section = "conclusion"
+            else:
+                section = "body"
+            stats.append({
+                "index": index + 1,
+                "title": title,
+                "title_words": _words(title),
+                "bullet_count": len(bullet_words),
+                "sub_bullet_count": slide["sub_bullets"],
+                "max_bullet_words": max(bullet_words, default=0),
+                "avg_bullet_words": sum(bullet_words) / len(bullet_words) if bullet_words else 0.0,
+                "has_visual": slide["has_visual"],
+                "has_notes": slide["has_notes"],
+                "section": section
+            })
+        return stats
+
+
+def parse_outline(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Parse an outline into per-slide statistics.
+
+    Args:
+        lines: Outline text, or any iterable of lines (e.g. a streamed response)
+
+    Returns:
+        One statistics dictionary per slide
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    parser = OutlineParser()
+    for line in lines:
+        parser.feed(line.rstrip("\n"))
+    return parser.close()
+
+
+class StructuralScorer:
+    """Scores measurable outline properties as 0-1 rates per metric."""
+
+    def __init__(self,
+                 bullets_per_slide: Tuple[int, int] = (3, 5),
+                 max_title_words: int = 8,
+                 max_bullet_words: int = 20,
+                 slides_per_minute: Tuple[float, float] = (0.5, 0.75),
+                 require_visuals: bool = True):
+        """
+        Initialize the scorer.
+
+        Args:
+            bullets_per_slide: Accepted (min, max) top-level bullets on content slides
+            max_title_words: Longest acceptable slide title
+            max_bullet_words: Longest acceptable bullet
+            slides_per_minute: (min, max) slide rate used to derive a slide range from the duration
+            require_visuals: Whether completeness expects a visual note on each content slide
+        """
+        self.bullets_per_slide = tuple(bullets_per_slide)
+        self.max_title_words = max_title_words
+        self.max_bullet_words = max_bullet_words
+        self.slides_per_minute = tuple(slides_per_minute)
+        self.require_visuals = require_visuals
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "StructuralScorer":
+        """
+        Create a scorer from a suite `outline_structure` settings block.
+
+        Args:
+            config: Settings dictionary, or None for defaults
+
+        Returns:
+            StructuralScorer instance
+        """
+        config = config or {}
+        return cls(
+            bullets_per_slide=config.get("bullets_per_slide", (3, 5)),
+            max_title_words=config.get("max_title_words", 8),
+            max_bullet_words=config.get("max_bullet_words", 20),
+            slides_per_minute=config.get("slides_per_minute", (0.5, 0.75)),
+            require_visuals=config.get("require_visuals", True)
+        )
+
+    def slide_range(self, duration: Any = None, slide_range: List[int] = None) -> Optional[Tuple[int, int]]:
+        """Explicit slide range, or one derived from the presentation duration in minutes."""
+        if slide_range:
+            return int(slide_range[0]), int(slide_range[1])
+        try:
+            minutes = float(duration)
+        except (TypeError, ValueError):
+            return None
+        low, high = self.slides_per_minute
+        return max(1, round(minutes * low)), max(1, round(minutes * high))
+
+    def score(self, slides: List[Dict[str, Any]],
+              duration: Any = None, slide_range: List[int] = None) -> Dict[str, Any]:
+        """
+        Score parsed slides on structure, completeness and conciseness.
+
+        Args:
+            slides: Output of `parse_outline`
+            duration: Presentation length in minutes, used for the expected slide count
+            slide_range: Explicit (min, max) slide count, overriding duration
+
+        Returns:
+            Dictionary with a 0-1 rate per metric and the individual checks
+        """
+        if not slides:
+            return {
+                "rates": {"structure": 0.0, "completeness": 0.0, "conciseness": 0.0},
+                "checks": {"slide_count": 0}
+            }
+
+        sections = [slide["section"] for slide in slides]
+        content = [slide for slide in slides if slide["section"] == "body"] or slides
+        low_bullets, high_bullets = self.bullets_per_slide
+
+        structure_checks = {
+            "has_introduction": "introduction" in sections,
+            "has_body": "body" in sections,
+            "has_conclusion": "conclusion" in sections,
+            "titles_present": all(slide["title"] for slide in slides),
+        }
+        expected = self.slide_range(duration, slide_range)
+        if expected:
+            structure_checks["slide_count_in_range"] = expected[0] <= len(slides) <= expected[1]
+
+        completeness_parts = [
+            sum(1 for slide in content if slide["bullet_count"] > 0) / len(content)
+        ]
+        if self.require_visuals:
+            completeness_parts.append(sum(1 for slide in content if slide["has_visual"]) / len(content))
+
+        bulleted = [slide for slide in slides if slide["bullet_count"] > 0]
+        conciseness_parts = [
+            sum(1 for slide in slides if slide["title_words"] <= self.max_title_words) / len(slides)
+        ]
+        if bulleted:
+            conciseness_parts.append(
+                sum(1 for slide in bulleted if low_bullets <= slide["bullet_count"] <= high_bullets) / len(bulleted)
+            )
+            conciseness_parts.append(
+                sum(1 for slide in bulleted if slide["max_bullet_words"] <= self.max_bullet_words) / len(bulleted)
+            )
+
+        return {
+            "rates": {
+                "structure": sum(structure_checks.values()) / len(structure_checks),
+                "completeness": sum(completeness_parts) / len(completeness_parts),
+                "conciseness": sum(conciseness_parts) / len(conciseness_parts),
+            },
+            "checks": {
+                **structure_checks,
+                "slide_count": len(slides),
+                "expected_slide_range": list(expected) if expected else None,
+                "avg_bullets_per_slide": sum(slide["bullet_count"] for slide in slides) / len(slides),
+            }
+        }
@@ -0,0 +1,220 @@
+"""Token-budgeted assembly of judge prompts."""
+
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+from ..clients.base_client import BaseClient
+from ..utils.tokenizers import chars_per_token, count_tokens, get_tokenizer
+from .context_reducer import ContextReducer
+
+logger = logging.getLogger(__name__)
+
+# Higher priority sections are trimmed first; the response is trimmed last
+DEFAULT_PRIORITIES = {
+    "context": 3,
+    "known_facts": 2,
+    "expected_answer": 2,
+    "expected_reasoning": 2,
+    "expected_conclusion": 2,
+    "prompt": 1,
+    "original_prompt": 1,
+    "response": 0,
+    "generated_prompt": 0,
+    "code": 0,
+}
+
+TRIM_MARKER = "\n[... {count} tokens trimmed ...]\n"
+_MARKER_TOKENS = 10
+
+# Stands in for text sections when measuring the static part of a template
+_PLACEHOLDER = "x"
+
+# Static token counts kept; non-text sections (e.g. fact lists) make many distinct keys
+STATIC_CACHE_SIZE = 1024
+
+
+class JudgePromptBuilder:
+    """Fits the variable sections of judge prompts into a token budget."""
+
+    def __init__(self,
+                 token_budget: int,
+                 model_name: str = "gpt-4",
+                 priorities: Optional[Dict[str, int]] = None,
+                 strategies: Optional[Dict[str, str]] = None,
+                 min_section_tokens: int = 64):
+        """
+        Initialize the builder.
+
+        Args:
+            token_budget: Maximum tokens for the system prompt plus judge prompt
+            model_name: Judge model name used to pick the tokenizer
+            priorities: Trim order per section name (higher is trimmed first)
+            strategies: Trim strategy per section: "middle" (keep head and tail),
+                "head" (keep the beginning) or "extract" (keep BM25-relevant passages)
+            min_section_tokens: Sections are never trimmed below this many tokens
+        """
+        self.token_budget = token_budget
+        self.model_name = model_name
+        self.priorities = {**DEFAULT_PRIORITIES, **(priorities or {})}
+        self.strategies = strategies or {}
+        self.min_section_tokens = min_section_tokens
+
+        # Token counts of rendered templates with placeholder sections, least recently used first
+        self._static_tokens: "OrderedDict[tuple, int]" = OrderedDict()
+        self.stats = {"prompts": 0, "prompts_trimmed": 0, "tokens_trimmed": 0, "prompts_over_budget": 0}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], judge: BaseClient) -> Optional["JudgePromptBuilder"]:
+        """
+        Create a builder for a judge from the `judge_prompt_budget` block of metrics.yaml.
+
+        The budget is the smaller of `max_prompt_tokens` and the judge's
+        context window minus `reserve_output_tokens`.
+
+        Args:
+            config: Budget settings dictionary, or None
+            judge: Judge model client
+
+        Returns:
+            JudgePromptBuilder instance, or None if budgeting is disabled
+        """
+        if not config or not config.get("enabled", False):
+            return None
+
+        budgets = []
+        if config.get("max_prompt_tokens"):
+            budgets.append(config["max_prompt_tokens"])
+        context_window = getattr(judge, "context_window", None)
+        if context_window:
+            budgets.append(context_window - config.get("reserve_output_tokens", 1024))
+        if not budgets:
+            return None
+
+        return cls(
+            token_budget=min(budgets),
+            model_name=getattr(judge, "model_name", "gpt-4"),
+            priorities=config.get("priorities"),
+            strategies=config.get("strategies"),
+            min_section_tokens=config.get("min_section_tokens", 64)
+        )
+
+    def static_tokens(self, key: tuple, render: Callable[..., str], sections: Dict[str, Any],
+                      system_prompt: str = "") -> int:
+        """
+        Token count of a template without its text sections, cached per key (LRU).
+
+        Args:
+            key: Cache key identifying the template (e.g. evaluator and metric)
+            render: Callable rendering the template from section keyword arguments
+            sections: Section values; text sections are replaced by a placeholder
+            system_prompt: System prompt sent with the template
+
+        Returns:
+            Tokens used by the system prompt and the fixed parts of the rendered prompt
+        """
+        # Optional blocks depend on which sections are present; other arguments are part of the template
+        shape = tuple(sorted(
+            (name, bool(value)) if isinstance(value, str) else (name, repr(value))
+            for name, value in sections.items()
+        ))
+        cache_key = key + (system_prompt, shape)
+        if cache_key in self._static_tokens:
+            self._static_tokens.move_to_end(cache_key)
+        else:
+            placeholders = {
+                name: (_PLACEHOLDER if value else value) if isinstance(value, str) else value
+                for name, value in sections.items()
+            }
+            text_sections = sum(1 for value in sections.values() if isinstance(value, str) and value)
+            rendered = count_tokens(render(**placeholders), self.model_name)
+            system = count_tokens(system_prompt, self.model_name) if system_prompt else 0
+            self._static_tokens[cache_key] = max(0, rendered - text_sections) + system
+            if len(self._static_tokens) > STATIC_CACHE_SIZE:
+                self._static_tokens.popitem(last=False)
+        return self._static_tokens[cache_key]
+
+    def count_sections(self, sections: Dict[str, Any]) -> Dict[str, int]:
+        """Token count of every non-empty text section."""
+        return {
+            name: count_tokens(value, self.model_name)
+            for name, value in sections.items()
+            if isinstance(value, str) and value
+        }
+
+    def fit(self,
+            sections: Dict[str, Any],
+            static_tokens: int,
+            section_tokens: Optional[Dict[str, int]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Trim text sections by priority until the prompt fits the budget.
+
+        Args:
+            sections: Section values keyed by template argument name
+            static_tokens: Tokens used by the template and system prompt
+            section_tokens: Precomputed `count_sections` result
+
+        Returns:
+            Tuple of (fitted sections, report with budget and tokens trimmed per section);
+            `over_budget` is the number of tokens still above the budget, when sections
+            could not be trimmed further
+        """
+        if section_tokens is None:
+            section_tokens = self.count_sections(sections)
+
+        overflow = static_tokens + sum(section_tokens.values()) - self.token_budget
+        report = {"budget": self.token_budget, "tokens_trimmed": 0, "sections": {}}
+        self.stats["prompts"] += 1
+        if overflow <= 0:
+            return sections, report
+
+        fitted = dict(sections)
+        order = sorted(section_tokens, key=lambda name: self.priorities.get(name, 1), reverse=True)
+        for name in order:
+            if overflow <= 0:
+                break
+            keep = max(self.min_section_tokens, section_tokens[name] - overflow - _MARKER_TOKENS)
+            if keep >= section_tokens[name]:
+                continue
+            queries = [fitted[other] for other in section_tokens
+                       if other != name and self.priorities.get(other, 1) < self.priorities.get(name, 1)]
+            fitted[name] = self._trim(sections[name], keep, self.strategies.get(name, "middle"), queries)
+            trimmed = section_tokens[name] - count_tokens(fitted[name], self.model_name)
+            overflow -= trimmed
+            report["sections"][name] = trimmed
+            report["tokens_trimmed"] += trimmed
+
+        if report["tokens_trimmed"]:
+            self.stats["prompts_trimmed"] += 1
+            self.stats["tokens_trimmed"] += report["tokens_trimmed"]
+        if overflow > 0:
+            # Sections are never trimmed below min_section_tokens, and non-text sections not at all
+            report["over_budget"] = overflow
+            self.stats["prompts_over_budget"] += 1
+            logger.warning(f"Judge prompt is still {overflow} tokens over its {self.token_budget}-token budget "
+                           f"after trimming")
+        return fitted, report
+
+    def _trim(self, text: str, keep_tokens: int, strategy: str, queries: List[str]) -> str:
+        """Shorten a section to roughly `keep_tokens` tokens."""
+        if strategy == "extract":
+            reducer = ContextReducer(token_budget=keep_tokens, model_name=self.model_name)
+            return reducer.reduce(text, queries)["context"]
+
+        head_tokens = keep_tokens if strategy == "head" else (keep_tokens + 1) // 2
+        tail_tokens = keep_tokens - head_tokens
+        tokenizer = get_tokenizer(self.model_name)
+
+        if tokenizer:
+            tokens = tokenizer.encode_ordinary(text)
+            omitted = len(tokens) - keep_tokens
+            head = tokenizer.decode(tokens[:head_tokens])
+            tail = tokenizer.decode(tokens[len(tokens) - tail_tokens:]) if tail_tokens else ""
+        else:
+            # Same chars-per-token estimate as count_tokens
+            ratio = chars_per_token(self.model_name)
+            omitted = int(len(text) / ratio) - keep_tokens
+            head = text[:int(head_tokens * ratio)]
+            tail = text[len(text) - int(tail_tokens * ratio):] if tail_tokens else ""
+
+        return head + TRIM_MARKER.format(count=max(omitted, 0)) + tail
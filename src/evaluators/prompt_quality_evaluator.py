@@ -1,35 +1,36 @@
 """Prompt quality evaluator for meta-prompting and image prompts."""
 
-import os
 from typing import Dict, List, Any
 
-from ..clients.base_client import BaseModelClient
-from ..utils.config import load_evaluation_metrics
+from ..clients.base_client import BaseClient
+from .base_evaluator import ModelBasedEvaluator, register_evaluator
+from .cascade import CascadeJudge
 
-class PromptQualityEvaluator:
+@register_evaluator("prompt_quality")
+@register_evaluator("image_prompt_quality", prompt_type="image")
+class PromptQualityEvaluator(ModelBasedEvaluator):
     """Evaluates quality of generated prompts for downstream use."""
 
-    def __init__(self, evaluation_model: BaseModelClient, metrics_config: Dict[str, Any] = None):
+    name = "prompt_quality"
+
+    def __init__(self, evaluation_model: BaseClient, metrics_config: Dict[str, Any] = None,
+                 prompt_type: str = "meta", cascade: CascadeJudge = None):
         """
         Initialize the prompt quality evaluator.
 
         Args:
             evaluation_model: Model client for evaluation
             metrics_config: Metrics configuration dictionary
+            prompt_type: Default prompt type ("meta" or "image") when not given per call
+            cascade: Optional cheap-then-expensive judge cascade
         """
-        self.evaluation_model = evaluation_model
-
-        # Load metrics configuration if not provided
-        if metrics_config is None:
-            config_dir = os.environ.get("CONFIG_DIR", "./config")
-            self.metrics_config = load_evaluation_metrics(f"{config_dir}/evaluation/metrics.yaml")
-        else:
-            self.metrics_config = metrics_config
+        super().__init__(evaluation_model, metrics_config, cascade)
+        self.prompt_type = prompt_type
 
     async def evaluate(self,
                  original_prompt: str,
                  generated_prompt: str,
-                 prompt_type: str = "meta",  # "meta" or "image"
+                 prompt_type: str = None,  # "meta" or "image"
                  prompt_purpose: str = None,
                  target_system: str = None,
                  metrics: List[str] = None) -> Dict[str, Any]:
@@ -39,7 +40,7 @@ class PromptQualityEvaluator:
         Args:
             original_prompt: Original prompt asking to generate a prompt
             generated_prompt: The prompt generated by the model
-            prompt_type: Type of prompt ("meta" or "image")
+            prompt_type: Type of prompt ("meta" or "image"), or None for the evaluator default
             prompt_purpose: Purpose or goal of the prompt
             target_system: Target system for the prompt
             metrics: Specific metrics to evaluate
@@ -47,66 +48,24 @@ class PromptQualityEvaluator:
         Returns:
             Dictionary of evaluation scores
         """
+        prompt_type = prompt_type or self.prompt_type
+
         if not metrics:
             if prompt_type == "image":
                 metrics = ["clarity", "specificity", "consistency"]
             else:  # meta
                 metrics = ["clarity", "specificity", "effectiveness"]
 
-        results = {}
-
-        for metric in metrics:
-            if metric not in self.metrics_config["metrics"]:
-                continue
-
-            metric_config = self.metrics_config["metrics"][metric]
-
-            if metric_config["evaluation_method"] == "model_based":
-                # Create evaluation prompt
-                eval_prompt = self._create_evaluation_prompt(
-                    original_prompt, generated_prompt, prompt_type,
-                    prompt_purpose, target_system, metric
-                )
-
-                # Generate evaluation using evaluation model
-                eval_response = await self.evaluation_model.generate_response(
-                    prompt=eval_prompt,
-                    system_prompt=f"You are an expert evaluator assessing {prompt_type} prompt quality.",
-                    temperature=0.1
-                )
-
-                # Parse score from response
-                try:
-                    score = self._parse_score(eval_response["text"], metric_config["scale"])
-                    results[metric] = score
-                except Exception as e:
-                    results[metric] = {
-                        "score": 0,
-                        "error": str(e)
-                    }
-            else:
-                # Implement rule-based or other evaluation methods here
-                results[metric] = 0
-
-        # Calculate weighted average score
-        weighted_score = 0
-        total_weight = 0
-
-        for metric, score in results.items():
-            if isinstance(score, dict):
-                # Skip if there was an error
-                continue
-
-            metric_weight = self.metrics_config["metrics"][metric].get("weight", 1.0)
-            weighted_score += score * metric_weight
-            total_weight += metric_weight
-
-        if total_weight > 0:
-            results["overall_score"] = weighted_score / total_weight
-        else:
-            results["overall_score"] = 0
-
-        return results
+        results = await self._evaluate_metrics(
+            metrics,
+            self._create_evaluation_prompt,
+            system_prompt=f"You are an expert evaluator assessing {prompt_type} prompt quality.",
+            sections={"original_prompt": original_prompt, "generated_prompt": generated_prompt,
+                      "prompt_type": prompt_type, "prompt_purpose": prompt_purpose,
+                      "target_system": target_system}
+        )
+
+        return self._add_overall_score(results)
 
     def _create_evaluation_prompt(self, original_prompt: str, generated_prompt: str,
                                   prompt_type: str, prompt_purpose: str, target_system: str,
@@ -117,7 +76,7 @@ class PromptQualityEvaluator:
 
         if prompt_type == "image":
             template = f"""
-            Please evaluate the quality of the following image generation prompt for {metric_config["description"]}.
+            Please evaluate the quality of the following image generation prompt.
 
             Original request:
             "{original_prompt}"
@@ -133,6 +92,8 @@ class PromptQualityEvaluator:
                 """
 
             template += f"""
+            Evaluate it for {metric_config["description"]}.
+
             On a scale of {min(metric_config["scale"])} to {max(metric_config["scale"])},
             where {min(metric_config["scale"])} means poor image prompt and {max(metric_config["scale"])} means excellent image prompt,
             rate the prompt and explain your rating.
@@ -152,7 +113,7 @@ class PromptQualityEvaluator:
             """
         else:  # meta prompt
             template = f"""
-            Please evaluate the quality of the following meta-prompt for {metric_config["description"]}.
+            Please evaluate the quality of the following meta-prompt.
 
             Original request:
             "{original_prompt}"
@@ -174,6 +135,8 @@ class PromptQualityEvaluator:
                 """
 
             template += f"""
+            Evaluate it for {metric_config["description"]}.
+
             On a scale of {min(metric_config["scale"])} to {max(metric_config["scale"])},
             where {min(metric_config["scale"])} means poor meta-prompt and {max(metric_config["scale"])} means excellent meta-prompt,
             rate the prompt and explain your rating.
@@ -193,24 +156,3 @@ class PromptQualityEvaluator:
             """
 
         return template
-
-    def _parse_score(self, evaluation_text: str, scale: List[int]) -> int:
-        """Parse the score from evaluation response."""
-        try:
-            # Look for "Rating: X" pattern
-            for line in evaluation_text.split("\n"):
-                if line.lower().startswith("rating:"):
-                    score_str = line.split(":", 1)[1].strip()
-                    # Extract first number found
-                    import re
-                    numbers = re.findall(r'\d+', score_str)
-                    if numbers:
-                        score = int(numbers[0])
-                        # Ensure score is within scale
-                        return max(min(score, max(scale)), min(scale))
-
-            # If no rating found, assume minimum score
-            return min(scale)
-        except Exception:
-            # Default to minimum score on error
-            return min(scale)
\ No newline at end of file
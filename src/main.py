@@ -5,8 +5,15 @@ import argparse
 import yaml
 import logging
 from src.utils.config import load_config
+from src.utils.cost_tracker import BudgetExceededError, CostLedger, set_cost_ledger
+from src.utils.results_store import open_results_store
+from src.utils.tokenizers import prewarm_tokenizers
 from src.test_runner.executor import TestExecutor
-from src.reporting.yaml_generator import YAMLReporter
+from src.test_runner.adaptive import SequentialSampler
+from src.test_runner.plan_compiler import PlanShard, compile_plan, load_suites
+from src.test_runner.planner import RunPlanner, format_plan_table, load_history
+from src.test_runner.unit_scorer import UnitScorer
+from src.reporting.jsonl_generator import JSONLReporter
 
 # Configure logging
 logging.basicConfig(
@@ -83,8 +90,63 @@ def get_available_models():
 
     return models
 
+def parse_shard(value):
+    """Parse a --shard value "K/N" into (K, N)"""
+    try:
+        shard_index, shard_count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, got '{value}'")
+    if not 0 <= shard_index < shard_count:
+        raise argparse.ArgumentTypeError(f"shard {shard_index} is out of range for {shard_count} shards")
+    return shard_index, shard_count
+
+def compile_execution_plan(args):
+    """Compile the selected test suites, reusing the --plan-file cache when it is current"""
+    names = [name.strip() for name in args.suites.split(',')] if args.suites else None
+    # A sharded run generates the units of expanded cases as it sends them
+    execution_plan = compile_plan(names=names, cache_path=args.plan_file, expand=args.shard is None)
+    for problem in execution_plan.problems:
+        logger.warning(problem)
+    return execution_plan
+
+def adaptive_samplers(execution_plan):
+    """Sequential samplers for the planned suites whose settings enable adaptive_sampling"""
+    suite_units = {}
+    for unit in execution_plan.resolved_units():
+        suite_units[unit["suite"]] = suite_units.get(unit["suite"], 0) + 1
+    suites = load_suites(names=list(suite_units))
+    samplers = {}
+    for name, suite in suites.items():
+        config = (suite.get("settings") or {}).get("adaptive_sampling")
+        sampler = SequentialSampler.from_config(config, examples_count=suite_units[name])
+        if sampler:
+            samplers[name] = sampler
+    return samplers, suites
+
+def print_plan(args, models, available_models):
+    """Compile the suites into work units and print predicted tokens, cost and wall-clock per model"""
+    execution_plan = compile_execution_plan(args)
+
+    history = load_history(args.history) if args.history else None
+    # Judge models are priced from their own configuration even when not being tested
+    planner = RunPlanner(available_models, history=history)
+    units = list(PlanShard(execution_plan, *args.shard)) if args.shard else list(execution_plan.units)
+    plan = planner.plan(units, list(models), dedupe=not args.no_dedupe)
+
+    suites = len({unit["suite"] for unit in units})
+    shard = f" (shard {args.shard[0]}/{args.shard[1]})" if args.shard else ""
+    print(f"Plan {execution_plan.digest[:12]}{shard}: {len(units):,} requests per model from {suites} suites")
+    print(format_plan_table(plan))
+    if execution_plan.missing_files:
+        print(f"\nMissing data files ({len(execution_plan.missing_files)}): "
+              f"{', '.join(execution_plan.missing_files)}")
+    if execution_plan.problems:
+        print(f"{len(execution_plan.problems)} problems found; see the log for details.")
+
 def main():
     parser = argparse.ArgumentParser(description="LLM Testing Framework")
+    parser.add_argument('command', nargs='?', default='run', choices=['run', 'plan'],
+                        help='run the tests, or plan them: predict tokens, cost and wall-clock without calling models')
     parser.add_argument('--model', type=str, help='Specific model to test')
     parser.add_argument('--models', type=str, help='Comma-separated list of models to test')
     parser.add_argument('--all-models', action='store_true', help='Test all available models')
@@ -96,6 +158,20 @@ def main():
     parser.add_argument('--output', type=str, default='console',
                         choices=['console', 'json', 'yaml', 'html'],
                         help='Output format for results')
+    parser.add_argument('--budget', type=float, help='Maximum USD to spend on this run')
+    parser.add_argument('--suites', type=str,
+                        help='Comma-separated test suites to plan (default: all in config/test_suites)')
+    parser.add_argument('--history', type=str,
+                        help='JSON/JSONL response records with timing, used by plan for latency')
+    parser.add_argument('--plan-file', type=str,
+                        help='Compiled execution plan to reuse while its sources are unchanged (written if stale)')
+    parser.add_argument('--allow-incomplete', action='store_true',
+                        help='With --suites, run the resolved work units even if the plan has problems')
+    parser.add_argument('--no-dedupe', action='store_true',
+                        help='With --suites, send every work unit even if an identical request was already sent')
+    parser.add_argument('--shard', type=parse_shard,
+                        help='With --suites, run shard K/N of the work units (K from 0); expanded cases are '
+                             'generated as they are sent instead of compiled into the plan')
     parser.add_argument('--verbose', action='store_true', help='Enable verbose logging')
 
     args = parser.parse_args()
@@ -137,11 +213,72 @@ def main():
 
     logger.info(f"Testing {len(valid_models)} models: {', '.join(valid_models)}")
 
-    # Create test executor
-    executor = TestExecutor()
+    # Load tokenizers before any test runs so a missing BPE file is reported once
+    tokenizers = prewarm_tokenizers([available_models[model_id].get('version', model_id) for model_id in valid_models])
+    estimated = [model_name for model_name, exact in tokenizers.items() if not exact]
+    if estimated:
+        logger.warning(f"Token counts for {', '.join(estimated)} use the chars-per-token estimate")
+
+    if args.command == 'plan':
+        print_plan(args, {model_id: available_models[model_id] for model_id in valid_models}, available_models)
+        return
+
+    # Charge every generation and judge call against the configured budgets
+    ledger = CostLedger.from_config((load_config(os.path.join("config", "budgets.yaml")) or {}).get("budgets"))
+    if args.budget is not None:
+        ledger.run_budget = args.budget
+    set_cost_ledger(ledger)
+
+    # Create test executor; results go to the shared store the reporters read
+    results_store = open_results_store("results")
+    executor = TestExecutor(results_store)
 
-    # Run tests for each model
+    if args.suites:
+        # Every work unit is resolved and validated before anything is sent
+        execution_plan = compile_execution_plan(args)
+        if not execution_plan.valid and not args.allow_incomplete:
+            logger.error(f"Execution plan has {len(execution_plan.problems)} problems; nothing was sent. "
+                         f"Fix them or pass --allow-incomplete to run the "
+                         f"{len(execution_plan.resolved_units())} resolved work units.")
+            return
+        output_dir = os.path.join("results", "plans", execution_plan.digest[:12])
+        if args.shard:
+            output_dir = os.path.join(output_dir, f"shard_{args.shard[0]}_of_{args.shard[1]}")
+        # Each unit result is on disk as soon as it arrives
+        stream_file = os.path.join(output_dir, "generations.jsonl")
+        models = {model_id: available_models[model_id] for model_id in valid_models}
+        # Suites with adaptive_sampling stop sending units to a model once its judged score is settled
+        samplers, suites = adaptive_samplers(execution_plan)
+        with JSONLReporter(stream_file, metadata={"plan_digest": execution_plan.digest}) as stream:
+            if args.shard:
+                if samplers:
+                    logger.warning("Adaptive sampling is not applied to a sharded run; every unit of the shard is sent")
+                executor.run_units(models, PlanShard(execution_plan, *args.shard),
+                                   f"plan {execution_plan.digest[:12]} shard {args.shard[0]}/{args.shard[1]}",
+                                   dedupe=not args.no_dedupe, on_result=stream.write_result)
+            elif samplers:
+                # Judge cascade escalations and context reduction savings are written next to the cost ledger
+                with UnitScorer(suites, stats_dir=output_dir) as scorer:
+                    outcome = executor.run_plan_adaptive(models, execution_plan, samplers, scorer.score,
+                                                         dedupe=not args.no_dedupe, on_result=stream.write_result)
+                with open(os.path.join(output_dir, "adaptive_sampling.yaml"), 'w') as file:
+                    yaml.safe_dump(outcome["adaptive"], file, sort_keys=False)
+            else:
+                executor.run_plan(models, execution_plan, dedupe=not args.no_dedupe, on_result=stream.write_result)
+        with open(os.path.join(output_dir, "cost_ledger.yaml"), 'w') as file:
+            yaml.safe_dump({"partial": ledger.stopped is not None, **ledger.summary()}, file, sort_keys=False)
+        output_file = os.path.join(output_dir, "generations.yaml")
+        with open(output_file, 'w') as file:
+            yaml.safe_dump(JSONLReporter.aggregate(stream_file), file, sort_keys=False)
+        logger.info(f"Generations for plan {execution_plan.digest[:12]} saved to {output_file}")
+        return
+
+    # Run tests for each model, streaming each result as it completes
     results = {}
+    run_id = results_store.start_run(f"{args.test}/{args.context}")
+    output_dir = os.path.join("results", args.test)
+    stream_file = os.path.join(output_dir, f"test_results_{args.context}.jsonl")
+    stream = JSONLReporter(stream_file)
     for model_id in valid_models:
         logger.info(f"Testing model: {model_id}")
         try:
@@ -153,25 +290,33 @@ def main():
                 context_length=args.context
             )
             results[model_id] = test_result
+            results_store.add_result(run_id, model_id, test_result)
+            stream.write_result(model_id, test_result)
             logger.info(f"Testing completed for {model_id}")
+        except BudgetExceededError as e:
+            logger.error(f"Budget reached while testing {model_id}: {e}")
+            if e.scope == "run":
+                break
         except Exception as e:
             logger.error(f"Error testing model {model_id}: {e}")
 
+    results_store.finish_run(run_id)
+    stream.close()
+
     # Generate reports
-    output_dir = os.path.join("results", args.test)
-    os.makedirs(output_dir, exist_ok=True)
+
+    # Spend so far; a stopped run still reports the results it has
+    cost_file = os.path.join(output_dir, f"cost_ledger_{args.context}.yaml")
+    with open(cost_file, 'w') as file:
+        yaml.safe_dump({"partial": ledger.stopped is not None, **ledger.summary()}, file, sort_keys=False)
+    if ledger.stopped:
+        logger.warning(f"Partial results ({ledger.stopped}); spend saved to {cost_file}")
 
     # Choose reporter based on output format
-    if args.output == 'yaml':
-        reporter = YAMLReporter()
-        output_file = os.path.join(output_dir, f"test_results_{args.context}.yaml")
-        reporter.generate_report(results, output_file)
-        logger.info(f"Results saved to {output_file}")
-    elif args.output == 'json':
-        from src.reporting.json_generator import JSONReporter
-        reporter = JSONReporter()
-        output_file = os.path.join(output_dir, f"test_results_{args.context}.json")
-        reporter.generate_report(results, output_file)
+    if args.output in ('yaml', 'json'):
+        # Built from the stream rather than from the results held in memory
+        output_file = os.path.join(output_dir, f"test_results_{args.context}.{args.output}")
+        JSONLReporter.finalize(stream_file, output_file, args.output)
         logger.info(f"Results saved to {output_file}")
     elif args.output == 'html':
         from src.reporting.html_generator import HTMLReporter
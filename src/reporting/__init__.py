@@ -6,4 +6,6 @@ from .html_generator import HTMLReporter
 from .visualizations_reporter import Visualizer
 from .comparisons_reporter import ModelComparison
 from .cost_analysis_reporter import CostAnalyzer
-from .recommendations_reporter import RecommendationEngine
\ No newline at end of file
+from .recommendations_reporter import RecommendationEngine
+from .report_cache import ReportCache
+from .jsonl_generator import JSONLReporter
\ No newline at end of file
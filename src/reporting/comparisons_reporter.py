@@ -1,11 +1,13 @@
 """Model comparison matrix generator."""
 
 import os
-import yaml
 import json
 from typing import Dict, List, Any, Optional
 import pandas as pd
 
+from src.reporting.report_cache import open_report_cache
+from src.utils.results_store import open_results_store
+
 class ModelComparison:
     """Generates comparative analyses across models."""
 
@@ -22,6 +24,7 @@ class ModelComparison:
 
         # Ensure output directory exists
         os.makedirs(self.comparisons_dir, exist_ok=True)
+        self.report_cache = open_report_cache(results_dir)
 
     def generate_comparison_matrix(self,
                              metrics: List[str],
@@ -41,27 +44,14 @@ class ModelComparison:
             metrics_str = "_".join(metrics[:3]) + (f"_plus_{len(metrics)-3}" if len(metrics) > 3 else "")
             output_file = f"{self.comparisons_dir}/comparison_{metrics_str}.yaml"
 
-        # Get all YAML result files
-        yaml_files = [f for f in os.listdir(self.yaml_dir) if f.endswith('.yaml')]
-        if not yaml_files:
-            raise FileNotFoundError(f"No YAML result files found in {self.yaml_dir}")
-
-        # Load data from all models
-        model_data = {}
-        for yaml_file in yaml_files:
-            try:
-                file_path = f"{self.yaml_dir}/{yaml_file}"
-                with open(file_path, 'r') as f:
-                    data = yaml.safe_load(f)
-                    model_name = data.get("model", yaml_file.replace(".yaml", ""))
-                    model_data[model_name] = data
-            except Exception as e:
-                print(f"Error loading {yaml_file}: {e}")
+        # Latest results of every model
+        model_data = open_results_store(self.results_dir).model_documents()
+        if not model_data:
+            raise FileNotFoundError(f"No results found in {self.yaml_dir} or the results store")
 
-        # Extract specified metrics for each model
-        comparison_data = {}
-        for model_name, data in model_data.items():
-            comparison_data[model_name] = self._extract_metrics(data, metrics)
+        # Extract specified metrics for each model; only models with new results are recomputed
+        comparison_data = self.report_cache.extract("comparison_metrics", model_data, self._extract_metrics, metrics,
+                                                    known_models=model_data)
 
         # Create comparison matrix
         matrix = {
@@ -89,9 +79,8 @@ class ModelComparison:
             except Exception as e:
                 print(f"Error ranking models for metric {metric}: {e}")
 
-        # Write comparison to YAML file
-        with open(output_file, 'w') as f:
-            yaml.dump(matrix, f, default_flow_style=False, sort_keys=False, indent=2)
+        # Write comparison to YAML file unless it is unchanged
+        self.report_cache.write_yaml(output_file, matrix)
 
         return output_file
 
@@ -143,6 +132,57 @@ class ModelComparison:
 
         return self.generate_comparison_matrix(performance_metrics, output_file)
 
+    def generate_efficiency_comparison(self,
+                                       efficiency: Dict[str, Dict[str, Dict[str, Any]]],
+                                       output_file: Optional[str] = None) -> str:
+        """
+        Generate a latency, throughput and cost comparison from run-level distributions.
+
+        Args:
+            efficiency: Output of `EfficiencyEvaluator.evaluate_batch`
+                ({model: {context_length: metrics}})
+            output_file: Output file path, or None to use default
+
+        Returns:
+            Path to the generated comparison file
+        """
+        if output_file is None:
+            output_file = f"{self.comparisons_dir}/efficiency.yaml"
+
+        context_lengths = sorted({length for by_length in efficiency.values() for length in by_length})
+        comparison = {
+            "models": list(efficiency.keys()),
+            "context_lengths": context_lengths,
+            "comparison_data": efficiency,
+            "rankings": {}
+        }
+
+        for context_length in context_lengths:
+            rankings = {}
+            metric_names = sorted({
+                metric
+                for by_length in efficiency.values()
+                for metric, value in by_length.get(context_length, {}).items()
+                if not metric.endswith("_ci") and metric != "samples"
+            })
+            for metric in metric_names:
+                metric_values = []
+                for model_name, by_length in efficiency.items():
+                    value = by_length.get(context_length, {}).get(metric)
+                    if value is not None:
+                        metric_values.append((model_name, value, by_length[context_length].get(f"{metric}_ci")))
+
+                # Only throughput is better when higher
+                metric_values.sort(key=lambda x: x[1], reverse=metric.startswith("throughput"))
+                rankings[metric] = [{"rank": i+1, "model": model, "value": value, "ci": ci}
+                                    for i, (model, value, ci) in enumerate(metric_values)]
+            comparison["rankings"][context_length] = rankings
+
+        # Write comparison to YAML file unless it is unchanged
+        self.report_cache.write_yaml(output_file, comparison)
+
+        return output_file
+
     def generate_category_comparison(self, category: str, output_file: Optional[str] = None) -> str:
         """
         Generate a comparison of model performance in a specific test category.
@@ -157,25 +197,17 @@ class ModelComparison:
         if output_file is None:
             output_file = f"{self.comparisons_dir}/{category}_comparison.yaml"
 
-        # Get all YAML result files
-        yaml_files = [f for f in os.listdir(self.yaml_dir) if f.endswith('.yaml')]
-        if not yaml_files:
-            raise FileNotFoundError(f"No YAML result files found in {self.yaml_dir}")
+        store = open_results_store(self.results_dir)
+        model_data = store.model_documents()
+        if not model_data:
+            raise FileNotFoundError(f"No results found in {self.yaml_dir} or the results store")
 
         # Extract category-specific data from all models
         category_data = {}
 
-        for yaml_file in yaml_files:
-            try:
-                file_path = f"{self.yaml_dir}/{yaml_file}"
-                with open(file_path, 'r') as f:
-                    data = yaml.safe_load(f)
-                    model_name = data.get("model", yaml_file.replace(".yaml", ""))
-
-                    if "results_by_category" in data and category in data["results_by_category"]:
-                        category_data[model_name] = data["results_by_category"][category]
-            except Exception as e:
-                print(f"Error loading {yaml_file}: {e}")
+        for model_name, data in model_data.items():
+            if "results_by_category" in data and category in data["results_by_category"]:
+                category_data[model_name] = data["results_by_category"][category]
 
         # Create comparison
         comparison = {
@@ -190,10 +222,7 @@ class ModelComparison:
                          "average_tokens_per_request", "average_cost_per_request"]
 
         for metric in common_metrics:
-            metric_values = []
-            for model_name, model_data in category_data.items():
-                if metric in model_data:
-                    metric_values.append((model_name, model_data[metric]))
+            metric_values = list(store.metric_values(metric, suite=category).items())
 
             # Sort by metric value (assuming higher is better, adjust if needed)
             reverse = metric not in ["total_cost_usd", "average_cost_per_request"]
@@ -205,8 +234,7 @@ class ModelComparison:
                 for i, (model, value) in enumerate(metric_values)
             ]
 
-        # Write comparison to YAML file
-        with open(output_file, 'w') as f:
-            yaml.dump(comparison, f, default_flow_style=False, sort_keys=False, indent=2)
+        # Write comparison to YAML file unless it is unchanged
+        self.report_cache.write_yaml(output_file, comparison)
 
         return output_file
\ No newline at end of file
@@ -1,11 +1,13 @@
 """Cost analysis for model evaluation."""
 
 import os
-import yaml
 import json
 import pandas as pd
 from typing import Dict, List, Any, Optional
 
+from src.reporting.report_cache import open_report_cache
+from src.utils.results_store import open_results_store
+
 class CostAnalyzer:
     """Analyzes cost metrics and cost-effectiveness of models."""
 
@@ -22,6 +24,53 @@ class CostAnalyzer:
 
         # Ensure output directory exists
         os.makedirs(self.comparisons_dir, exist_ok=True)
+        self.report_cache = open_report_cache(results_dir)
+
+    def _cost_metrics(self, data: Dict[str, Any], performance_metrics: List[str]) -> Optional[Dict[str, Any]]:
+        """Cost, performance and cost-effectiveness metrics of one model, or None without aggregate metrics."""
+        if "aggregate_metrics" not in data:
+            return None
+        metrics = data["aggregate_metrics"]
+        model_metrics = {
+            "total_cost_usd": metrics.get("total_cost_usd", 0),
+            "average_cost_per_request": metrics.get("average_cost_per_request", 0),
+            "total_tokens": metrics.get("total_tokens", 0)
+        }
+
+        # Calculate cost per 1k tokens
+        if model_metrics["total_tokens"] > 0:
+            model_metrics["cost_per_1k_tokens"] = (model_metrics["total_cost_usd"] * 1000) / model_metrics["total_tokens"]
+        else:
+            model_metrics["cost_per_1k_tokens"] = 0
+
+        # Extract performance metrics
+        for metric in performance_metrics:
+            if metric in metrics:
+                model_metrics[metric] = metrics[metric]
+
+        # Calculate cost-effectiveness ratios
+        for metric in performance_metrics:
+            if metric in model_metrics and model_metrics["average_cost_per_request"] > 0:
+                ratio_name = f"{metric}_per_dollar"
+                model_metrics[ratio_name] = model_metrics[metric] / model_metrics["average_cost_per_request"]
+
+        return model_metrics
+
+    def _quality_adjusted_cost(self, data: Dict[str, Any], quality_metric: str) -> Optional[Dict[str, Any]]:
+        """Cost per quality point of one model, or None without a positive quality value."""
+        metrics = data.get("aggregate_metrics")
+        if not metrics:
+            return None
+        cost = metrics.get("average_cost_per_request", 0)
+        quality = metrics.get(quality_metric, 0)
+        if quality <= 0:
+            return None
+        return {
+            "cost": cost,
+            "quality": quality,
+            "cost_per_quality_point": cost / quality,
+            "quality_points_per_dollar": quality / cost if cost > 0 else 0
+        }
 
     def generate_cost_effectiveness_report(self,
                                     performance_metrics: List[str],
@@ -40,48 +89,12 @@ class CostAnalyzer:
         if output_file is None:
             output_file = f"{self.comparisons_dir}/cost_effectiveness.yaml"
 
-        # Load data from YAML files
-        yaml_files = [f for f in os.listdir(self.yaml_dir) if f.endswith('.yaml')]
-
-        # Extract cost and performance data
-        cost_data = {}
-
-        for yaml_file in yaml_files:
-            try:
-                file_path = f"{self.yaml_dir}/{yaml_file}"
-                with open(file_path, 'r') as f:
-                    data = yaml.safe_load(f)
-                    model_name = data.get("model", yaml_file.replace(".yaml", ""))
-
-                    # Extract cost metrics
-                    if "aggregate_metrics" in data:
-                        metrics = data["aggregate_metrics"]
-                        model_metrics = {
-                            "total_cost_usd": metrics.get("total_cost_usd", 0),
-                            "average_cost_per_request": metrics.get("average_cost_per_request", 0),
-                            "total_tokens": metrics.get("total_tokens", 0)
-                        }
-
-                        # Calculate cost per 1k tokens
-                        if model_metrics["total_tokens"] > 0:
-                            model_metrics["cost_per_1k_tokens"] = (model_metrics["total_cost_usd"] * 1000) / model_metrics["total_tokens"]
-                        else:
-                            model_metrics["cost_per_1k_tokens"] = 0
-
-                        # Extract performance metrics
-                        for metric in performance_metrics:
-                            if metric in metrics:
-                                model_metrics[metric] = metrics[metric]
-
-                        # Calculate cost-effectiveness ratios
-                        for metric in performance_metrics:
-                            if metric in model_metrics and model_metrics["average_cost_per_request"] > 0:
-                                ratio_name = f"{metric}_per_dollar"
-                                model_metrics[ratio_name] = model_metrics[metric] / model_metrics["average_cost_per_request"]
-
-                        cost_data[model_name] = model_metrics
-            except Exception as e:
-                print(f"Error loading {yaml_file}: {e}")
+        # Extract cost and performance data from the latest results of every model;
+        # only models with new results are recomputed
+        documents = open_results_store(self.results_dir).model_documents()
+        cost_data = {model_name: model_metrics for model_name, model_metrics in self.report_cache.extract(
+            "cost_metrics", documents, self._cost_metrics, performance_metrics,
+            known_models=documents).items() if model_metrics is not None}
 
         # Create report structure
         report = {
@@ -116,9 +129,8 @@ class CostAnalyzer:
             except Exception as e:
                 print(f"Error ranking models for metric {metric}: {e}")
 
-        # Write report to YAML file
-        with open(output_file, 'w') as f:
-            yaml.dump(report, f, default_flow_style=False, sort_keys=False, indent=2)
+        # Write report to YAML file unless it is unchanged
+        self.report_cache.write_yaml(output_file, report)
 
         return output_file
 
@@ -139,34 +151,12 @@ class CostAnalyzer:
         if output_file is None:
             output_file = f"{self.comparisons_dir}/quality_adjusted_cost_{quality_metric}.yaml"
 
-        # Load data from YAML files
-        yaml_files = [f for f in os.listdir(self.yaml_dir) if f.endswith('.yaml')]
-
-        # Extract cost and quality data
-        qa_data = {}
-
-        for yaml_file in yaml_files:
-            try:
-                file_path = f"{self.yaml_dir}/{yaml_file}"
-                with open(file_path, 'r') as f:
-                    data = yaml.safe_load(f)
-                    model_name = data.get("model", yaml_file.replace(".yaml", ""))
-
-                    # Extract metrics
-                    if "aggregate_metrics" in data:
-                        metrics = data["aggregate_metrics"]
-                        cost = metrics.get("average_cost_per_request", 0)
-                        quality = metrics.get(quality_metric, 0)
-
-                        if quality > 0:
-                            qa_data[model_name] = {
-                                "cost": cost,
-                                "quality": quality,
-                                "cost_per_quality_point": cost / quality if quality > 0 else float('inf'),
-                                "quality_points_per_dollar": quality / cost if cost > 0 else 0
-                            }
-            except Exception as e:
-                print(f"Error loading {yaml_file}: {e}")
+        # Extract cost and quality data from the latest results of every model
+        documents = open_results_store(self.results_dir).model_documents()
+        qa_data = {model_name: model_data for model_name, model_data in self.report_cache.extract(
+            "quality_adjusted_cost", documents, self._quality_adjusted_cost, quality_metric,
+            known_models=documents).items()
+            if model_data is not None}
 
         # Create report structure
         report = {
@@ -196,8 +186,7 @@ class CostAnalyzer:
             for i, (model, value) in enumerate(quality_per_dollar)
         ]
 
-        # Write report to YAML file
-        with open(output_file, 'w') as f:
-            yaml.dump(report, f, default_flow_style=False, sort_keys=False, indent=2)
+        # Write report to YAML file unless it is unchanged
+        self.report_cache.write_yaml(output_file, report)
 
         return output_file
\ No newline at end of file
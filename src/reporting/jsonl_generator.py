@@ -0,0 +1,231 @@
+# src/reporting/jsonl_generator.py
+import os
+import json
+import time
+import logging
+from typing import Dict, Iterator, Any, Optional
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .json_generator import JSONReporter
+from .yaml_generator import YAMLReporter
+
+logger = logging.getLogger(__name__)
+
+# Key of the optional first record holding run-level fields (e.g. the plan digest)
+META_KEY = "_meta"
+
+
+def _default(value: Any) -> Any:
+    """Plain Python values for numpy scalars and arrays; anything else becomes a string."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def _dumps(record: Dict[str, Any]) -> bytes:
+    """One compact JSON line, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(record, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+                            | orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(record, separators=(",", ":"), default=_default).encode("utf-8") + b"\n"
+
+
+def _truncate_partial_line(path: str):
+    """Cut a file back to its last newline, dropping a record left unfinished by a crash."""
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - 65536)
+            f.seek(start)
+            chunk = f.read(position - start)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position != end:
+            f.truncate(position)
+
+
+def _loads(line: bytes) -> Dict[str, Any]:
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+class JSONLReporter:
+    """
+    Streams results to a JSONL file, one compact record per completed unit.
+
+    Records are buffered and flushed every `flush_every` records or
+    `flush_interval` seconds, so a crashed run keeps everything up to the
+    last flush. `finalize` turns a stream into the aggregate JSON or YAML
+    report the other reporters write.
+    """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 metadata: Optional[Dict[str, Any]] = None,
+                 flush_every: int = 50,
+                 flush_interval: float = 5.0,
+                 append: bool = False):
+        """
+        Open a result stream.
+
+        Args:
+            path: JSONL file path, or None for a reporter only used through `generate_report`
+            metadata: Run-level fields written as the first record (only when the file is new)
+            flush_every: Records between flushes
+            flush_interval: Seconds between flushes
+            append: Continue an existing stream instead of replacing it; a last
+                record cut short by a crash is dropped first
+        """
+        self.name = "jsonl"
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._file = None
+        self.records = 0
+        if path is None:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if append and os.path.exists(path):
+            _truncate_partial_line(path)
+        is_new = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "ab" if append else "wb")
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        if metadata and is_new:
+            self._file.write(_dumps({META_KEY: metadata}))
+            self.flush()
+
+    def write(self, record: Dict[str, Any]):
+        """
+        Append one record, flushing when enough records or time have accumulated.
+
+        Args:
+            record: JSON-serializable dictionary
+        """
+        self._file.write(_dumps(record))
+        self.records += 1
+        self._pending += 1
+        if self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def write_result(self, model_id: str, result: Dict[str, Any]):
+        """
+        Append the result of one completed unit (or test) of a model.
+
+        Args:
+            model_id: Model ID
+            result: Result dictionary
+        """
+        self.write({"model": model_id, **result})
+
+    def flush(self):
+        self._file.flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def generate_report(self, results, output_path):
+        """Stream an in-memory results dict ({model: result or [unit results]}) to a JSONL file"""
+        try:
+            with JSONLReporter(output_path, flush_every=self.flush_every,
+                               flush_interval=self.flush_interval) as stream:
+                for model_id, model_results in results.items():
+                    for result in model_results if isinstance(model_results, list) else [model_results]:
+                        stream.write_result(model_id, result)
+
+            logger.info(f"JSONL report generated at {output_path}")
+            return True
+        except Exception as e:
+            logger.error(f"Error generating JSONL report: {e}")
+            return False
+
+    @staticmethod
+    def read_records(path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Records of a stream, skipping a final line cut short by a crash.
+
+        Args:
+            path: JSONL file path
+
+        Yields:
+            Record dictionaries, the metadata record included
+        """
+        with open(path, "rb") as f:
+            previous = None
+            for line in f:
+                if previous is not None:
+                    yield _loads(previous)
+                previous = line if line.strip() else None
+            if previous is not None:
+                try:
+                    yield _loads(previous)
+                except ValueError:
+                    logger.warning(f"Ignoring incomplete last record of {path}")
+
+    @classmethod
+    def aggregate(cls, path: str) -> Dict[str, Any]:
+        """
+        Rebuild the in-memory results of a run from its stream.
+
+        Unit records (with `unit_id`) become a list per model; other records
+        are one result per model, as `TestExecutor.run_test` returns them.
+        With a metadata record, the results are nested under "results" next
+        to its fields.
+
+        Args:
+            path: JSONL file path
+
+        Returns:
+            Results dictionary in the aggregate report format
+        """
+        metadata, results = None, {}
+        for record in cls.read_records(path):
+            if META_KEY in record:
+                metadata = record[META_KEY]
+                continue
+            model_id = record.pop("model", None)
+            if "unit_id" in record:
+                results.setdefault(model_id, []).append(record)
+            else:
+                results[model_id] = record
+        return {**metadata, "results": results} if metadata is not None else results
+
+    @classmethod
+    def finalize(cls, path: str, output_path: str, output_format: Optional[str] = None) -> bool:
+        """
+        Write the aggregate JSON or YAML report of a stream.
+
+        Args:
+            path: JSONL file path
+            output_path: Report path
+            output_format: "json" or "yaml", or None to use the report's extension
+
+        Returns:
+            True if the report was written
+        """
+        output_format = output_format or ("yaml" if output_path.endswith((".yaml", ".yml")) else "json")
+        reporter = YAMLReporter() if output_format == "yaml" else JSONReporter()
+        return reporter.generate_report(cls.aggregate(path), output_path)
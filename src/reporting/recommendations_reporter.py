@@ -1,10 +1,12 @@
 """Model recommendation engine."""
 
 import os
-import yaml
 import json
 from typing import Dict, List, Any, Optional
 
+from src.reporting.report_cache import open_report_cache
+from src.utils.results_store import open_results_store
+
 class RecommendationEngine:
     """Generates model recommendations based on specific criteria."""
 
@@ -21,6 +23,7 @@ class RecommendationEngine:
 
         # Ensure output directory exists
         os.makedirs(self.comparisons_dir, exist_ok=True)
+        self.report_cache = open_report_cache(results_dir)
 
     def generate_recommendations(self,
                            scenarios: List[Dict[str, Any]],
@@ -39,19 +42,8 @@ class RecommendationEngine:
         if output_file is None:
             output_file = f"{self.comparisons_dir}/recommendations.yaml"
 
-        # Load data from YAML files
-        yaml_files = [f for f in os.listdir(self.yaml_dir) if f.endswith('.yaml')]
-
-        model_data = {}
-        for yaml_file in yaml_files:
-            try:
-                file_path = f"{self.yaml_dir}/{yaml_file}"
-                with open(file_path, 'r') as f:
-                    data = yaml.safe_load(f)
-                    model_name = data.get("model", yaml_file.replace(".yaml", ""))
-                    model_data[model_name] = data
-            except Exception as e:
-                print(f"Error loading {yaml_file}: {e}")
+        # Latest results of every model
+        model_data = open_results_store(self.results_dir).model_documents()
 
         # Generate recommendations for each scenario
         recommendations = {
@@ -163,9 +155,8 @@ class RecommendationEngine:
 
             recommendations["scenarios"].append(scenario_recommendation)
 
-        # Write recommendations to YAML file
-        with open(output_file, 'w') as f:
-            yaml.dump(recommendations, f, default_flow_style=False, sort_keys=False, indent=2)
+        # Write recommendations to YAML file unless they are unchanged
+        self.report_cache.write_yaml(output_file, recommendations)
 
         return output_file
 
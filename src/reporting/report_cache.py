@@ -0,0 +1,199 @@
+"""Incremental report generation: per-model extracts and outputs keyed by input hashes."""
+
+import hashlib
+import inspect
+import json
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import yaml
+
+CACHE_FORMAT_VERSION = 2
+
+# Caches opened in this process, keyed by path
+_OPEN_CACHES: Dict[str, "ReportCache"] = {}
+_OPEN_LOCK = threading.Lock()
+
+
+def fingerprint(value: Any) -> str:
+    """Content hash of a JSON-serializable value."""
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _source_fingerprint(function: Callable[..., Any]) -> str:
+    try:
+        source = inspect.getsource(function)
+    except (OSError, TypeError):
+        source = f"{getattr(function, '__module__', '')}.{getattr(function, '__qualname__', repr(function))}"
+    return hashlib.blake2b(source.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def extract_version(extract: Callable[..., Any]) -> str:
+    """
+    Version of an extract function, part of the key its values are cached under.
+
+    An explicit `cache_version` attribute on the function wins; otherwise the
+    hash of its source is used, so editing the function invalidates its
+    values. Set `cache_version` when the output also depends on code the
+    extract calls.
+
+    Args:
+        extract: Extract function or bound method
+
+    Returns:
+        Version string
+    """
+    version = getattr(extract, "cache_version", None)
+    if version is not None:
+        return str(version)
+    return _source_fingerprint(getattr(extract, "__func__", extract))
+
+
+class ReportCache:
+    """
+    Fingerprints of report inputs and outputs, kept between report runs.
+
+    Per-model extracts are cached under (extract name, extract version,
+    arguments, cache format, model) together with the fingerprint of the
+    model's results document, so new
+    results for one model recompute only that model's extracts. Every
+    output records the fingerprint of the data it was rendered from and is
+    neither rendered nor written again while that data is unchanged.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a cache file, starting empty if it is missing or unreadable.
+
+        Args:
+            path: JSON file the cache is kept in
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._extracts: Dict[str, Dict[str, Any]] = {}
+        self._outputs: Dict[str, str] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+                if data.get("version") == CACHE_FORMAT_VERSION:
+                    self._extracts = data["extracts"]
+                    self._outputs = data["outputs"]
+            except (ValueError, KeyError):
+                pass
+        self.hits = 0
+        self.misses = 0
+
+    def extract(self,
+                name: str,
+                documents: Dict[str, Dict[str, Any]],
+                extract: Callable[..., Any],
+                *args,
+                known_models: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Apply a per-model extract to every document, reusing unchanged results.
+
+        Args:
+            name: Extract name; with the extract's version and `args`, identifies the cached values
+            documents: Results documents keyed by model
+            extract: Callable (document, *args) -> JSON-serializable value
+            *args: Further extract arguments
+            known_models: Every model that still has results; cached values of
+                other models are dropped. None keeps them all, e.g. when
+                `documents` is a subset of the models
+
+        Returns:
+            Extract values keyed by model, in document order
+        """
+        key = f"{name}:{fingerprint([CACHE_FORMAT_VERSION, extract_version(extract), list(args)])}"
+        with self._lock:
+            cached = self._extracts.setdefault(key, {})
+            values = {}
+            for model, document in documents.items():
+                digest = fingerprint(document)
+                entry = cached.get(model)
+                if entry is not None and entry[0] == digest:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                    entry = cached[model] = [digest, extract(document, *args)]
+                values[model] = entry[1]
+            if known_models is not None:
+                # Models that no longer have results
+                for model in set(cached) - set(known_models):
+                    del cached[model]
+            return values
+
+    def is_current(self, output_file: str, data: Any) -> bool:
+        """
+        Whether an output exists and was rendered from exactly this data.
+
+        Args:
+            output_file: Output path
+            data: Everything the output is rendered from
+
+        Returns:
+            True if rendering can be skipped
+        """
+        with self._lock:
+            return os.path.exists(output_file) and self._outputs.get(output_file) == fingerprint(data)
+
+    def record(self, output_file: str, data: Any):
+        """
+        Remember the data an output was just rendered from, and save the cache.
+
+        Args:
+            output_file: Output path
+            data: Everything the output was rendered from
+        """
+        with self._lock:
+            self._outputs[output_file] = fingerprint(data)
+            self.save()
+
+    def write_yaml(self, output_file: str, data: Any) -> bool:
+        """
+        Write a YAML report unless the file already holds exactly this data.
+
+        Args:
+            output_file: Output path
+            data: Report content
+
+        Returns:
+            True if the file was (re)written
+        """
+        if self.is_current(output_file, data):
+            return False
+        with open(output_file, 'w') as f:
+            yaml.dump(data, f, default_flow_style=False, sort_keys=False, indent=2)
+        self.record(output_file, data)
+        return True
+
+    def save(self):
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(f"{self.path}.tmp", "w") as f:
+                json.dump({"version": CACHE_FORMAT_VERSION, "extracts": self._extracts, "outputs": self._outputs}, f)
+            os.replace(f"{self.path}.tmp", self.path)
+
+
+def open_report_cache(results_dir: str = "results") -> ReportCache:
+    """
+    Get the process-wide report cache of a results directory (<results_dir>/report_cache.json).
+
+    Args:
+        results_dir: Results directory
+
+    Returns:
+        ReportCache instance
+    """
+    path = os.path.join(results_dir, "report_cache.json")
+    with _OPEN_LOCK:
+        if path not in _OPEN_CACHES:
+            _OPEN_CACHES[path] = ReportCache(path)
+        return _OPEN_CACHES[path]
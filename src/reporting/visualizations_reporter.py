@@ -8,6 +8,9 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from typing import Dict, List, Any, Optional
 
+from src.reporting.report_cache import fingerprint, open_report_cache
+from src.utils.results_store import open_results_store
+
 class Visualizer:
     """Generates visualizations from test results."""
 
@@ -25,11 +28,20 @@ class Visualizer:
 
         # Ensure output directory exists
         os.makedirs(self.visualizations_dir, exist_ok=True)
+        self.report_cache = open_report_cache(results_dir)
 
         # Set default style
         sns.set_theme(style="whitegrid")
         plt.rcParams["figure.figsize"] = (12, 8)
 
+    def _model_documents(self, models: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Latest results of every model, or of those whose name contains one of `models`."""
+        documents = open_results_store(self.results_dir).model_documents()
+        if models:
+            documents = {name: data for name, data in documents.items()
+                         if name in models or any(m in name for m in models)}
+        return documents
+
     def create_radar_chart(self,
                       metrics: List[str],
                       models: Optional[List[str]] = None,
@@ -57,33 +69,17 @@ class Visualizer:
             with open(comparison_file, 'r') as f:
                 comparison_data = yaml.safe_load(f)
         else:
-            # Load data from individual YAML files
-            yaml_files = [f for f in os.listdir(self.yaml_dir) if f.endswith('.yaml')]
-
-            # Filter to specified models if provided
-            if models:
-                yaml_files = [f for f in yaml_files
-                             if f.replace(".yaml", "") in models
-                             or any(m in f for m in models)]
-
+            # Build it from the latest results of every model
             comparison_data = {"comparison_data": {}}
 
-            for yaml_file in yaml_files:
-                try:
-                    file_path = f"{self.yaml_dir}/{yaml_file}"
-                    with open(file_path, 'r') as f:
-                        data = yaml.safe_load(f)
-                        model_name = data.get("model", yaml_file.replace(".yaml", ""))
+            for model_name, data in self._model_documents(models).items():
+                # Extract metrics
+                model_metrics = {}
+                for metric in metrics:
+                    if "aggregate_metrics" in data and metric in data["aggregate_metrics"]:
+                        model_metrics[metric] = data["aggregate_metrics"][metric]
 
-                        # Extract metrics
-                        model_metrics = {}
-                        for metric in metrics:
-                            if "aggregate_metrics" in data and metric in data["aggregate_metrics"]:
-                                model_metrics[metric] = data["aggregate_metrics"][metric]
-
-                        comparison_data["comparison_data"][model_name] = model_metrics
-                except Exception as e:
-                    print(f"Error loading {yaml_file}: {e}")
+                comparison_data["comparison_data"][model_name] = model_metrics
 
         # Extract data for radar chart
         chart_data = {}
@@ -114,6 +110,11 @@ class Visualizer:
                     normalized.append(0)
             normalized_data[model] = normalized
 
+        # Nothing to redraw if the chart was last drawn from the same values
+        chart_key = fingerprint({"chart": "radar", "metrics": metrics, "data": normalized_data})
+        if self.report_cache.is_current(output_file, chart_key):
+            return output_file
+
         # Create radar chart
         fig = plt.figure(figsize=(10, 10))
         ax = fig.add_subplot(111, polar=True)
@@ -140,6 +141,7 @@ class Visualizer:
         # Save the chart
         plt.savefig(output_file, dpi=300, bbox_inches='tight')
         plt.close()
+        self.report_cache.record(output_file, chart_key)
 
         return output_file
 
@@ -165,47 +167,20 @@ class Visualizer:
             category_str = f"_{category}" if category else ""
             output_file = f"{self.visualizations_dir}/bar_chart_{metric}{category_str}.png"
 
-        # Load data from YAML files
-        yaml_files = [f for f in os.listdir(self.yaml_dir) if f.endswith('.yaml')]
-
-        # Filter to specified models if provided
-        if models:
-            yaml_files = [f for f in yaml_files
-                         if f.replace(".yaml", "") in models
-                         or any(m in f for m in models)]
-
-        # Extract data for bar chart
-        chart_data = []
-
-        for yaml_file in yaml_files:
-            try:
-                file_path = f"{self.yaml_dir}/{yaml_file}"
-                with open(file_path, 'r') as f:
-                    data = yaml.safe_load(f)
-                    model_name = data.get("model", yaml_file.replace(".yaml", ""))
-
-                    # Extract metric value
-                    if category:
-                        if "results_by_category" in data and category in data["results_by_category"]:
-                            category_data = data["results_by_category"][category]
-                            if metric in category_data:
-                                chart_data.append({
-                                    "model": model_name,
-                                    "value": category_data[metric]
-                                })
-                    else:
-                        if "aggregate_metrics" in data and metric in data["aggregate_metrics"]:
-                            chart_data.append({
-                                "model": model_name,
-                                "value": data["aggregate_metrics"][metric]
-                            })
-            except Exception as e:
-                print(f"Error loading {yaml_file}: {e}")
+        # Extract data for bar chart from the indexed metric rows
+        values = open_results_store(self.results_dir).metric_values(metric, suite=category)
+        chart_data = [{"model": model_name, "value": value} for model_name, value in values.items()
+                      if not models or model_name in models or any(m in model_name for m in models)]
 
         if not chart_data:
             raise ValueError(f"No data found for metric: {metric}" +
                             (f" in category: {category}" if category else ""))
 
+        # Nothing to redraw if the chart was last drawn from the same values
+        chart_key = fingerprint({"chart": "bar", "metric": metric, "category": category, "data": chart_data})
+        if self.report_cache.is_current(output_file, chart_key):
+            return output_file
+
         # Convert to DataFrame
         df = pd.DataFrame(chart_data)
 
@@ -234,6 +209,7 @@ class Visualizer:
         # Save the chart
         plt.savefig(output_file, dpi=300, bbox_inches='tight')
         plt.close()
+        self.report_cache.record(output_file, chart_key)
 
         return output_file
 
@@ -254,34 +230,28 @@ class Visualizer:
         if output_file is None:
             output_file = f"{self.visualizations_dir}/cost_vs_{performance_metric}.png"
 
-        # Load data from YAML files
-        yaml_files = [f for f in os.listdir(self.yaml_dir) if f.endswith('.yaml')]
-
         # Extract data for scatter plot
         scatter_data = []
 
-        for yaml_file in yaml_files:
-            try:
-                file_path = f"{self.yaml_dir}/{yaml_file}"
-                with open(file_path, 'r') as f:
-                    data = yaml.safe_load(f)
-                    model_name = data.get("model", yaml_file.replace(".yaml", ""))
-
-                    # Extract cost and performance metrics
-                    if "aggregate_metrics" in data:
-                        metrics = data["aggregate_metrics"]
-                        if "average_cost_per_request" in metrics and performance_metric in metrics:
-                            scatter_data.append({
-                                "model": model_name,
-                                "cost": metrics["average_cost_per_request"],
-                                "performance": metrics[performance_metric]
-                            })
-            except Exception as e:
-                print(f"Error loading {yaml_file}: {e}")
+        for model_name, data in self._model_documents().items():
+            # Extract cost and performance metrics
+            if "aggregate_metrics" in data:
+                metrics = data["aggregate_metrics"]
+                if "average_cost_per_request" in metrics and performance_metric in metrics:
+                    scatter_data.append({
+                        "model": model_name,
+                        "cost": metrics["average_cost_per_request"],
+                        "performance": metrics[performance_metric]
+                    })
 
         if not scatter_data:
             raise ValueError(f"No data found for performance metric: {performance_metric}")
 
+        # Nothing to redraw if the chart was last drawn from the same values
+        chart_key = fingerprint({"chart": "scatter", "metric": performance_metric, "data": scatter_data})
+        if self.report_cache.is_current(output_file, chart_key):
+            return output_file
+
         # Convert to DataFrame
         df = pd.DataFrame(scatter_data)
 
@@ -308,6 +278,7 @@ class Visualizer:
         # Save the chart
         plt.savefig(output_file, dpi=300, bbox_inches='tight')
         plt.close()
+        self.report_cache.record(output_file, chart_key)
 
         return output_file
 
@@ -331,43 +302,31 @@ class Visualizer:
             metrics_str = "_".join(metrics[:3]) + (f"_plus_{len(metrics)-3}" if len(metrics) > 3 else "")
             output_file = f"{self.visualizations_dir}/heatmap_{metrics_str}.png"
 
-        # Load data from YAML files
-        yaml_files = [f for f in os.listdir(self.yaml_dir) if f.endswith('.yaml')]
-
-        # Filter to specified models if provided
-        if models:
-            yaml_files = [f for f in yaml_files
-                         if f.replace(".yaml", "") in models
-                         or any(m in f for m in models)]
-
         # Extract data for heatmap
         heatmap_data = []
 
-        for yaml_file in yaml_files:
-            try:
-                file_path = f"{self.yaml_dir}/{yaml_file}"
-                with open(file_path, 'r') as f:
-                    data = yaml.safe_load(f)
-                    model_name = data.get("model", yaml_file.replace(".yaml", ""))
-
-                    # Extract metrics
-                    for metric in metrics:
-                        value = None
-                        if "aggregate_metrics" in data and metric in data["aggregate_metrics"]:
-                            value = data["aggregate_metrics"][metric]
-
-                        if value is not None:
-                            heatmap_data.append({
-                                "model": model_name,
-                                "metric": metric,
-                                "value": value
-                            })
-            except Exception as e:
-                print(f"Error loading {yaml_file}: {e}")
+        for model_name, data in self._model_documents(models).items():
+            # Extract metrics
+            for metric in metrics:
+                value = None
+                if "aggregate_metrics" in data and metric in data["aggregate_metrics"]:
+                    value = data["aggregate_metrics"][metric]
+
+                if value is not None:
+                    heatmap_data.append({
+                        "model": model_name,
+                        "metric": metric,
+                        "value": value
+                    })
 
         if not heatmap_data:
             raise ValueError(f"No data found for specified metrics")
 
+        # Nothing to redraw if the chart was last drawn from the same values
+        chart_key = fingerprint({"chart": "heatmap", "metrics": metrics, "data": heatmap_data})
+        if self.report_cache.is_current(output_file, chart_key):
+            return output_file
+
         # Convert to DataFrame
         df = pd.DataFrame(heatmap_data)
 
@@ -393,5 +352,6 @@ class Visualizer:
         # Save the heatmap
         plt.savefig(output_file, dpi=300, bbox_inches='tight')
         plt.close()
+        self.report_cache.record(output_file, chart_key)
 
         return output_file
\ No newline at end of file
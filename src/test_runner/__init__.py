@@ -4,5 +4,11 @@ from .executor import TestExecutor
 from .parallel import ParallelExecutor
 from .retry import RetryHandler
 from .logger import TestLogger
+from .adaptive import SequentialSampler
+from .planner import RunPlanner
+from .plan_compiler import ExecutionPlan, PlanShard, compile_plan
+from .case_expander import CaseExpander
+from .unit_scorer import UnitScorer
 
-__all__ = ["TestExecutor", "ParallelExecutor", "RetryHandler", "TestLogger"]
\ No newline at end of file
+__all__ = ["TestExecutor", "ParallelExecutor", "RetryHandler", "TestLogger", "SequentialSampler", "RunPlanner",
+           "ExecutionPlan", "compile_plan", "CaseExpander", "UnitScorer", "PlanShard"]
\ No newline at end of file
@@ -0,0 +1,256 @@
+"""Sequential sampling with early stopping for per-model suite scores."""
+
+import math
+from functools import lru_cache
+from statistics import NormalDist
+from typing import Dict, List, Any, Optional, Tuple
+
+
+def _t_central_probability(t: float, df: int) -> float:
+    """
+    P(|T| <= t) for Student's t with an integer number of degrees of freedom.
+
+    Uses the exact finite series in the angle atan(t / sqrt(df))
+    (Abramowitz & Stegun 26.7.3 and 26.7.4).
+    """
+    theta = math.atan(t / math.sqrt(df))
+    sin, cos2 = math.sin(theta), math.cos(theta) ** 2
+    if df % 2:
+        if df == 1:
+            return 2 * theta / math.pi
+        term = total = math.cos(theta)
+        for k in range(3, df, 2):
+            term *= cos2 * (k - 1) / k
+            total += term
+        return 2 / math.pi * (theta + sin * total)
+    term = total = 1.0
+    for k in range(2, df, 2):
+        term *= cos2 * (k - 1) / k
+        total += term
+    return sin * total
+
+
+@lru_cache(maxsize=1024)
+def _t_critical(confidence: float, df: int) -> float:
+    """
+    Two-sided Student t critical value.
+
+    Small samples are the common case here, so the value is exact for every
+    df (the series above, inverted by bisection) instead of an expansion
+    around the normal quantile; large df use the normal quantile's
+    Cornish-Fisher expansion, which is exact to four digits there.
+    """
+    if df <= 0:
+        return float("inf")
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    if df > 200:
+        return (z
+                + (z ** 3 + z) / (4 * df)
+                + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2))
+
+    low, high = z, 2 * z
+    while _t_central_probability(high, df) < confidence:
+        low, high = high, 2 * high
+    for _ in range(100):
+        middle = (low + high) / 2
+        if _t_central_probability(middle, df) < confidence:
+            low = middle
+        else:
+            high = middle
+        if high - low < 1e-10 * high:
+            break
+    return (low + high) / 2
+
+
+class SequentialSampler:
+    """
+    Tracks running confidence intervals and decides when a model can stop.
+
+    The stopping rules are checked after every case, so each check (look)
+    uses an interval at a stricter confidence level: the error rate
+    1 - confidence is split evenly over the possible looks when
+    `max_samples` is known, and as a convergent 6 / (pi^2 k^2) series
+    otherwise. Judge scores come in whole scale steps, so the standard
+    deviation is never taken below half of `score_resolution`; a few
+    identical scores do not make an interval collapse to zero width.
+    """
+
+    def __init__(self,
+                 min_samples: int = 3,
+                 max_samples: Optional[int] = None,
+                 ci_half_width: float = 0.25,
+                 confidence: float = 0.95,
+                 stop_on_rank: bool = True,
+                 score_resolution: float = 1.0):
+        """
+        Initialize the sampler.
+
+        Args:
+            min_samples: Cases every model runs before it may stop
+            max_samples: Hard cap on cases per model, or None for no cap
+            ci_half_width: Stop once the interval half-width is at most this (score units)
+            confidence: Overall confidence level of the stopping decisions
+            stop_on_rank: Also stop once a model's interval overlaps no other model's
+            score_resolution: Smallest difference between two scores (the judge's scale step)
+        """
+        self.min_samples = max(2, min_samples)
+        self.max_samples = max_samples
+        self.ci_half_width = ci_half_width
+        self.confidence = confidence
+        self.stop_on_rank = stop_on_rank
+        self.score_resolution = score_resolution
+
+        # Welford running statistics per model: [count, mean, M2]
+        self._stats: Dict[str, List[float]] = {}
+        self._stopped: Dict[str, str] = {}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], examples_count: Optional[int] = None) -> Optional["SequentialSampler"]:
+        """
+        Create a sampler from a suite `adaptive_sampling` settings block.
+
+        Args:
+            config: Settings dictionary, or None
+            examples_count: Suite examples_count, used as the default cap
+
+        Returns:
+            SequentialSampler instance, or None if adaptive sampling is disabled
+        """
+        if not config or not config.get("enabled", False):
+            return None
+
+        return cls(
+            min_samples=config.get("min_samples", 3),
+            max_samples=config.get("max_samples", examples_count),
+            ci_half_width=config.get("ci_half_width", 0.25),
+            confidence=config.get("confidence", 0.95),
+            stop_on_rank=config.get("stop_on_rank", True),
+            score_resolution=config.get("score_resolution", 1.0)
+        )
+
+    def add_model(self, model_id: str):
+        """Register a model so it takes part in rank comparisons before its first score."""
+        self._stats.setdefault(model_id, [0, 0.0, 0.0])
+
+    def record(self, model_id: str, score: float):
+        """
+        Record one case score for a model.
+
+        Args:
+            model_id: Model identifier
+            score: Per-case suite score
+        """
+        stats = self._stats.setdefault(model_id, [0, 0.0, 0.0])
+        stats[0] += 1
+        delta = score - stats[1]
+        stats[1] += delta / stats[0]
+        stats[2] += delta * (score - stats[1])
+
+    def look_confidence(self, count: int) -> float:
+        """
+        Confidence level of the interval checked after `count` cases.
+
+        Args:
+            count: Cases the model has run
+
+        Returns:
+            Confidence level adjusted for the number of looks
+        """
+        alpha = 1 - self.confidence
+        look = max(1, int(count) - self.min_samples + 1)
+        if self.max_samples is not None:
+            alpha /= max(1, self.max_samples - self.min_samples + 1)
+        else:
+            alpha *= 6 / (math.pi ** 2 * look ** 2)
+        return 1 - alpha
+
+    def interval(self, model_id: str) -> Tuple[float, float, float]:
+        """
+        Get the current confidence interval of a model's mean score.
+
+        Args:
+            model_id: Model identifier
+
+        Returns:
+            Tuple of (mean, lower bound, upper bound)
+        """
+        count, mean, m2 = self._stats.get(model_id, [0, 0.0, 0.0])
+        if count < 2:
+            return mean, float("-inf"), float("inf")
+
+        variance = max(m2 / (count - 1), (self.score_resolution / 2) ** 2)
+        std_error = math.sqrt(variance / count)
+        half_width = _t_critical(self.look_confidence(count), int(count) - 1) * std_error
+        return mean, mean - half_width, mean + half_width
+
+    def should_stop(self, model_id: str) -> Optional[str]:
+        """
+        Check whether a model needs no more cases.
+
+        Args:
+            model_id: Model identifier
+
+        Returns:
+            Stop reason ("max_samples", "precision" or "rank_settled"), or None to continue
+        """
+        if model_id in self._stopped:
+            return self._stopped[model_id]
+
+        count = self._stats.get(model_id, [0])[0]
+        reason = None
+
+        if self.max_samples is not None and count >= self.max_samples:
+            reason = "max_samples"
+        elif count >= self.min_samples:
+            mean, low, high = self.interval(model_id)
+            if (high - low) / 2 <= self.ci_half_width:
+                reason = "precision"
+            elif self.stop_on_rank and self._rank_settled(model_id, low, high):
+                reason = "rank_settled"
+
+        if reason:
+            self._stopped[model_id] = reason
+        return reason
+
+    def _rank_settled(self, model_id: str, low: float, high: float) -> bool:
+        """A model's rank is settled once its interval overlaps no other model's interval."""
+        others = [other for other in self._stats if other != model_id]
+        if not others:
+            return False
+
+        for other in others:
+            _, other_low, other_high = self.interval(other)
+            if low <= other_high and other_low <= high:
+                return False
+        return True
+
+    def active_models(self, model_ids: List[str]) -> List[str]:
+        """
+        Filter a list of models down to those that still need cases.
+
+        Args:
+            model_ids: Candidate model identifiers
+
+        Returns:
+            Models without a stop decision, in the given order
+        """
+        return [model_id for model_id in model_ids if not self.should_stop(model_id)]
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize samples, intervals and stop reasons per model.
+
+        Returns:
+            Dictionary keyed by model identifier
+        """
+        summary = {}
+        for model_id, (count, mean, _) in self._stats.items():
+            _, low, high = self.interval(model_id)
+            summary[model_id] = {
+                "cases_run": int(count),
+                "mean_score": mean,
+                "ci_low": low,
+                "ci_high": high,
+                "stop_reason": self._stopped.get(model_id)
+            }
+        return summary
@@ -0,0 +1,212 @@
+"""Lazily expand one prompt template over many variable sets into work units."""
+
+import json
+import random
+from typing import Dict, Iterator, List, Any, Optional
+
+from src.utils.context_store import ContextStore
+from src.utils.prompt_formatter import compile_template
+
+EXPANSION_MODES = ("examples", "product")
+
+
+def _distinct(values: List[Any]) -> List[Any]:
+    """Values in first-seen order without duplicates (values need not be hashable)."""
+    seen, distinct = set(), []
+    for value in values:
+        key = json.dumps(value, sort_keys=True, default=str)
+        if key not in seen:
+            seen.add(key)
+            distinct.append(value)
+    return distinct
+
+
+class CaseExpander:
+    """
+    Generator of rendered work units for one template.
+
+    In "examples" mode position i renders variable set i (cycling when more
+    units than sets are asked for). In "product" mode the variables span a
+    cross product of per-variable value lists and position i is decoded from
+    its mixed-radix digits, so a product of any size is never materialized;
+    with `sample`, a seeded subset of the product is drawn instead, which
+    holds only the chosen positions in memory.
+
+    Units carry content-hash IDs, so the same definition always yields the
+    same IDs, and shard k of n covers positions k, k + n, k + 2n, ...
+    without generating the others.
+    """
+
+    def __init__(self,
+                 template: str,
+                 variable_sets: Optional[List[Dict[str, Any]]] = None,
+                 axes: Optional[Dict[str, List[Any]]] = None,
+                 mode: str = "examples",
+                 count: Optional[int] = None,
+                 sample: Optional[int] = None,
+                 seed: int = 0,
+                 base: Optional[Dict[str, Any]] = None,
+                 context_ids: Optional[List[str]] = None,
+                 contexts: Optional[ContextStore] = None,
+                 shard_index: int = 0,
+                 shard_count: int = 1):
+        """
+        Initialize the expander.
+
+        Args:
+            template: Prompt template with {{name}} placeholders
+            variable_sets: Variable dictionaries, e.g. a prompt's examples[].variables
+            axes: Values per variable for "product" mode; added to the values found in `variable_sets`
+            mode: "examples" or "product"
+            count: Units to yield in "examples" mode (default: one per variable set)
+            sample: Units to draw from the product in "product" mode (default: all of it)
+            seed: Seed of the product sample
+            base: Fields copied into every unit (suite, case, method, metrics, ...)
+            context_ids: Contexts assigned to the units round-robin
+            contexts: Store holding `context_ids`, used for their digests
+            shard_index: Shard to yield, from 0
+            shard_count: Number of shards
+
+        Raises:
+            ValueError: If the mode, sample or shard is invalid
+        """
+        if mode not in EXPANSION_MODES:
+            raise ValueError(f"Unknown expansion mode '{mode}'; expected one of {', '.join(EXPANSION_MODES)}")
+        if not 0 <= shard_index < shard_count:
+            raise ValueError(f"Shard {shard_index} is out of range for {shard_count} shards")
+        if sample is not None and sample < 0:
+            raise ValueError("sample must not be negative")
+
+        self.template = template
+        self.variable_sets = list(variable_sets or [])
+        self.mode = mode
+        self.seed = seed
+        self.base = dict(base or {})
+        self.context_ids = list(context_ids or [])
+        self.contexts = contexts
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self._compiled = compile_template(template)
+
+        # Axes follow the template's placeholder order, then any extra variables
+        values = {}
+        for variables in self.variable_sets:
+            for name, value in variables.items():
+                values.setdefault(name, []).append(value)
+        for name, axis_values in (axes or {}).items():
+            values.setdefault(name, []).extend(axis_values)
+        names = [name for name in self._compiled.fields if name in values]
+        names += [name for name in values if name not in names]
+        self.axes: Dict[str, List[Any]] = {name: _distinct(values[name]) for name in names}
+
+        self._positions = None
+        if mode == "product":
+            self.size = 1
+            for axis_values in self.axes.values():
+                self.size *= len(axis_values)
+            if not self.axes:
+                self.size = 0
+            if sample is not None and sample < self.size:
+                # Sorted, so units still come out in product order
+                self._positions = sorted(random.Random(seed).sample(range(self.size), sample))
+            self.count = len(self._positions) if self._positions is not None else self.size
+        else:
+            self.size = len(self.variable_sets)
+            self.count = (count if count is not None else self.size) if self.size else 0
+        self.sample = sample
+
+    @classmethod
+    def from_prompt(cls, prompt: Dict[str, Any], **kwargs) -> "CaseExpander":
+        """
+        Create an expander for a prompt file entry ({"id", "template", "examples": [{"variables"}]}).
+
+        Args:
+            prompt: Prompt dictionary
+            **kwargs: Further CaseExpander arguments
+
+        Returns:
+            CaseExpander whose units carry the prompt ID
+        """
+        base = {"prompt_id": prompt.get("id"), **(kwargs.pop("base", None) or {})}
+        variable_sets = [example.get("variables") or {} for example in prompt.get("examples") or []]
+        return cls(prompt.get("template", ""), variable_sets, base=base, **kwargs)
+
+    def shard(self, shard_index: int, shard_count: int) -> "CaseExpander":
+        """
+        The expander restricted to one shard.
+
+        Args:
+            shard_index: Shard to yield, from 0
+            shard_count: Number of shards
+
+        Returns:
+            New CaseExpander over the same definition
+        """
+        return CaseExpander(self.template, self.variable_sets, self.axes, self.mode,
+                            self.count if self.mode == "examples" else None, self.sample, self.seed,
+                            self.base, self.context_ids, self.contexts, shard_index, shard_count)
+
+    def missing(self) -> List[str]:
+        """Placeholders no variable set or axis provides a value for."""
+        return [name for name in self._compiled.fields if name not in self.axes]
+
+    def variables(self, position: int) -> Dict[str, Any]:
+        """
+        Variable values of the unit at a position (0 <= position < count).
+
+        Args:
+            position: Position in the full, unsharded expansion
+
+        Returns:
+            Variable dictionary
+        """
+        if self.mode == "examples":
+            return self.variable_sets[position % self.size]
+        index = self._positions[position] if self._positions is not None else position
+        variables = {}
+        # The last axis varies fastest
+        for name in reversed(list(self.axes)):
+            index, digit = divmod(index, len(self.axes[name]))
+            variables[name] = self.axes[name][digit]
+        return {name: variables[name] for name in self.axes}
+
+    def unit(self, position: int) -> Dict[str, Any]:
+        """
+        The rendered work unit at a position.
+
+        Args:
+            position: Position in the full, unsharded expansion
+
+        Returns:
+            Work unit dictionary with a stable `id`
+        """
+        from src.test_runner.plan_compiler import unit_id
+
+        variables = self.variables(position)
+        unit = {
+            "prompt_id": None,
+            "context_id": None,
+            "context_digest": None,
+            "test_case_id": None,
+            "tests": [],
+            "language": None,
+            "expected_response_type": None,
+            **self.base,
+            "variables": variables,
+            "prompt": self._compiled.render(variables, strict=False),
+            "resolved": True,
+            "sample": position,
+            "has_tests": False,
+        }
+        if self.context_ids:
+            unit["context_id"] = self.context_ids[position % len(self.context_ids)]
+            unit["context_digest"] = self.contexts.digest(unit["context_id"]) if self.contexts else None
+        unit["id"] = unit_id(unit)
+        return unit
+
+    def __len__(self) -> int:
+        return len(range(self.shard_index, self.count, self.shard_count))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for position in range(self.shard_index, self.count, self.shard_count):
+            yield self.unit(position)
@@ -2,18 +2,31 @@
 import os
 import json
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, Iterable, List, Any, Optional
 
 from src.clients.base_client import BaseClient
 from src.utils.config import load_model_client
+from src.utils.context_store import resolve_context
+from src.utils.cost_tracker import BudgetExceededError
+from src.utils.prompt_formatter import layout_prompt
+from src.utils.results_store import ResultsStore
+from src.test_runner.adaptive import SequentialSampler
+from src.test_runner.plan_compiler import ExecutionPlan
+from src.test_runner.planner import RequestDeduplicator
 
 class TestExecutor:
     """Executes tests for different models and test categories."""
 
-    def __init__(self):
-        """Initialize the test executor."""
+    def __init__(self, results_store: Optional[ResultsStore] = None):
+        """
+        Initialize the test executor.
+
+        Args:
+            results_store: Store that work unit results are written to as they arrive, or None
+        """
         self.logger = logging.getLogger(__name__)
         self.results = {}
+        self.results_store = results_store
 
     def load_test_data(self, test_category: str, context_length: str) -> Dict[str, str]:
         """Load test data for a specific test category and context length."""
@@ -60,13 +73,14 @@ class TestExecutor:
                 "error": f"Failed to initialize client for {model_id} with provider {model_config.get('provider', 'unknown')}"
             }
 
-        # Form the full prompt
-        full_prompt = f"{test_data['context']}\n\n{test_data['prompt']}"
+        # Form the full prompt; the context is shared by every prompt of the category, so it goes first
+        full_prompt, cache_prefix = layout_prompt([test_data['context']], [test_data['prompt']])
 
         try:
             # Generate response
             self.logger.info(f"Generating response from {model_id}")
-            response = client.generate(full_prompt, model_config)
+            generation = client.generate_with_cost(full_prompt, cache_prefix=cache_prefix)
+            response = generation["text"]
 
             # Mock evaluation for demonstration
             accuracy_score = 0.85
@@ -88,8 +102,11 @@ class TestExecutor:
                     "quality": quality_score,
                     "formatting": formatting_score
                 },
-                "response_sample": response[:500] + "..." if len(response) > 500 else response
+                "response_sample": response[:500] + "..." if len(response) > 500 else response,
+                "cost": generation["cost"]
             }
+        except BudgetExceededError:
+            raise
         except Exception as e:
             self.logger.error(f"Error running test for {model_id}: {e}")
             return {
@@ -131,4 +148,289 @@ class TestExecutor:
             results[model_id] = model_results
             self.logger.info(f"Testing completed for {model_id}")
 
-        return results
\ No newline at end of file
+        return results
+
+    def run_plan(self,
+                 models: Dict[str, Dict[str, Any]],
+                 plan: ExecutionPlan,
+                 run_unit: Optional[Callable[[BaseClient, Dict[str, Any]], Dict[str, Any]]] = None,
+                 dedupe: bool = False,
+                 on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Send every resolved work unit of a compiled plan to each model.
+
+        The plan is the only input: prompts, contexts and settings come from
+        its units, and each result is tagged with its unit ID. Budget errors
+        end the model (or, for the run budget, the run) but keep its results.
+
+        Args:
+            models: Model configurations keyed by model ID
+            plan: Compiled execution plan (see `compile_plan`)
+            run_unit: Callable (client, unit) -> result, or None to generate a response
+            dedupe: Send each distinct request once per model and copy its result to the other units
+            on_result: Callable (model_id, result) called as each unit result arrives, e.g.
+                `JSONLReporter.write_result`
+
+        Returns:
+            Dictionary mapping model IDs to lists of unit results
+        """
+        return self.run_units(models, plan.resolved_units(), f"plan {plan.digest[:12]}", run_unit, dedupe, on_result)
+
+    def run_units(self,
+                  models: Dict[str, Dict[str, Any]],
+                  units: Iterable[Dict[str, Any]],
+                  label: str = "work units",
+                  run_unit: Optional[Callable[[BaseClient, Dict[str, Any]], Dict[str, Any]]] = None,
+                  dedupe: bool = False,
+                  on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Send work units to each model, as `run_plan` does.
+
+        Units are read one at a time, so a CaseExpander (or one of its
+        shards) can be run without materializing it. They are iterated once
+        per model and must therefore be re-iterable, not a one-shot generator.
+
+        With `dedupe`, a unit whose request (see `RequestDeduplicator`) was
+        already sent to the model gets a copy of that result instead of a new
+        call. Each unit keeps its own result entry for attribution; copies
+        record the unit they came from in `reused_from` and cost nothing.
+
+        With a results store, every result is written to it as it arrives
+        and the run is summarized per model once all models are done.
+
+        Args:
+            models: Model configurations keyed by model ID
+            units: Work units, e.g. plan.resolved_units() or a CaseExpander shard
+            label: What the units are, for logging
+            run_unit: Callable (client, unit) -> result, or None to generate a response
+            dedupe: Send each distinct request once per model and copy its result to the other units
+            on_result: Callable (model_id, result) called as each unit result arrives, e.g.
+                `JSONLReporter.write_result`
+
+        Returns:
+            Dictionary mapping model IDs to lists of unit results
+        """
+        run_unit = run_unit or self.run_unit
+        results = {}
+        store = self.results_store
+        run_id = store.start_run(label) if store else None
+
+        for model_id, model_config in models.items():
+            client = load_model_client(model_id, model_config)
+            if not client:
+                self.logger.error(f"Failed to initialize client for {model_id}")
+                results[model_id] = []
+                continue
+
+            self.logger.info(f"Running {len(units) if hasattr(units, '__len__') else 'all'} units of {label} "
+                             f"on {model_id}")
+            model_results = []
+            budget_scope = None
+            deduplicator = RequestDeduplicator() if dedupe else None
+            # Result of each request already sent to this model, with the unit that sent it
+            sent: Dict[str, tuple] = {}
+            for unit in units:
+                request_key = deduplicator.key(unit) if deduplicator else None
+                if request_key in sent:
+                    first_unit, first_result = sent[request_key]
+                    model_results.append({"unit_id": unit["id"], "suite": unit.get("suite"), "case": unit.get("case"),
+                                          **first_result, "cost": 0.0, "reused_from": first_unit})
+                    if store:
+                        store.add_result(run_id, model_id, model_results[-1], unit)
+                    if on_result:
+                        on_result(model_id, model_results[-1])
+                    continue
+                try:
+                    result = run_unit(client, unit)
+                except BudgetExceededError as e:
+                    # Keep what was generated; a model or provider budget only ends this model
+                    self.logger.error(f"Budget reached while running {model_id}: {e}")
+                    budget_scope = e.scope
+                    break
+                except Exception as e:
+                    self.logger.error(f"Error running unit {unit['id']} on {model_id}: {e}")
+                    result = {"error": str(e)}
+                model_results.append({"unit_id": unit["id"], "suite": unit.get("suite"), "case": unit.get("case"),
+                                      **result})
+                if store:
+                    store.add_result(run_id, model_id, model_results[-1], unit)
+                if on_result:
+                    on_result(model_id, model_results[-1])
+                if request_key is not None:
+                    sent[request_key] = (unit["id"], result)
+            if len(model_results) > len(sent) > 0:
+                self.logger.info(f"{len(model_results) - len(sent)} of {len(model_results)} units on {model_id} "
+                                 f"reused the response to an identical request")
+            results[model_id] = model_results
+            if budget_scope == "run":
+                break
+
+        if store:
+            store.finish_run(run_id)
+        return results
+
+    def run_plan_adaptive(self,
+                          models: Dict[str, Dict[str, Any]],
+                          plan: ExecutionPlan,
+                          samplers: Dict[str, SequentialSampler],
+                          score: Callable[[Dict[str, Any], Dict[str, Any]], Optional[float]],
+                          dedupe: bool = False,
+                          on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Run a compiled plan, sampling the suites that have a sampler adaptively.
+
+        Units of suites without a sampler are all sent, as `run_plan` does.
+        The units of each sampled suite are issued round-robin across models
+        through `run_adaptive`, and a model stops receiving them once its
+        judged score is precise enough or its rank is settled.
+
+        Args:
+            models: Model configurations keyed by model ID
+            plan: Compiled execution plan (see `compile_plan`)
+            samplers: Sequential sampler per suite name
+            score: Callable (unit, result) -> judged score, e.g. `UnitScorer.score`
+            dedupe: Send each distinct request of the fully run suites once per model
+            on_result: Callable (model_id, result) called as each unit result arrives
+
+        Returns:
+            Dictionary with the unit results per model and the "adaptive" summary per suite
+        """
+        label = f"plan {plan.digest[:12]}"
+        units = plan.resolved_units()
+        fixed = [unit for unit in units if unit["suite"] not in samplers]
+        results = self.run_units(models, fixed, label, dedupe=dedupe, on_result=on_result) if fixed else {}
+        results = {model_id: list(results.get(model_id, [])) for model_id in models}
+
+        store = self.results_store
+        run_id = store.start_run(f"{label} (adaptive)") if store else None
+        clients: Dict[str, Optional[BaseClient]] = {}
+
+        def run_case(model_id: str, model_config: Dict[str, Any], unit: Dict[str, Any]) -> Dict[str, Any]:
+            if model_id not in clients:
+                clients[model_id] = load_model_client(model_id, model_config)
+            try:
+                if clients[model_id] is None:
+                    raise ValueError(f"Failed to initialize client for {model_id}")
+                result = self.run_unit(clients[model_id], unit)
+            except BudgetExceededError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Error running unit {unit['id']} on {model_id}: {e}")
+                result = {"error": str(e)}
+            result = {"unit_id": unit["id"], "suite": unit.get("suite"), "case": unit.get("case"), **result,
+                      "overall_score": score(unit, result)}
+            if store:
+                store.add_result(run_id, model_id, result, unit)
+            if on_result:
+                on_result(model_id, result)
+            return result
+
+        summaries = {}
+        for suite, sampler in samplers.items():
+            suite_units = [unit for unit in units if unit["suite"] == suite]
+            if not suite_units:
+                continue
+            outcome = self.run_adaptive(models, suite_units, sampler, run_case)
+            for model_id, model_results in outcome["results"].items():
+                results[model_id].extend(model_results)
+            summaries[suite] = outcome["adaptive"]
+            if outcome["stopped"]:
+                # Later suites are not started once a budget is reached
+                self.logger.error(f"Budget reached while sampling suite {suite}; remaining suites skipped")
+                break
+
+        if store:
+            store.finish_run(run_id)
+        return {"results": results, "adaptive": summaries}
+
+    def run_unit(self, client: BaseClient, unit: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generate the response to one work unit.
+
+        Args:
+            client: Model client
+            unit: Work unit of an ExecutionPlan
+
+        Returns:
+            Dictionary with the response, usage, timing and cost
+        """
+        # Fetched lazily from the memory-mapped context store
+        full_prompt, cache_prefix = layout_prompt([resolve_context(unit)], [unit["prompt"]])
+        settings = {"max_tokens": unit["max_tokens"]} if unit.get("max_tokens") else {}
+        generation = client.generate_with_cost(full_prompt, temperature=unit.get("temperature"),
+                                               cache_prefix=cache_prefix, **settings)
+        return {"response": generation["text"], "usage": generation["usage"], "timing": generation["timing"],
+                "cost": generation["cost"]}
+
+    def run_adaptive(self,
+                     models: Dict[str, Dict[str, Any]],
+                     cases: List[Dict[str, Any]],
+                     sampler: Optional[SequentialSampler] = None,
+                     run_case: Optional[Callable[[str, Dict[str, Any], Dict[str, Any]], Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Run a suite's cases round-robin across models, stopping each model early
+        once its score interval is tight enough or its rank is settled.
+
+        Args:
+            models: Model configurations keyed by model ID
+            cases: Suite test cases, in the order they should be issued
+            sampler: Sequential sampler deciding when to stop, or None for defaults
+            run_case: Callable (model_id, model_config, case) -> result with "overall_score";
+                defaults to `run_test` with the case's test_category and context_length
+
+        Returns:
+            Dictionary of per-model case results plus an "adaptive" summary; when a
+            budget stops the run, the results so far and the budget scope as "stopped"
+        """
+        if sampler is None:
+            sampler = SequentialSampler(max_samples=len(cases))
+        if run_case is None:
+            run_case = lambda model_id, model_config, case: self.run_test(
+                model_id, model_config,
+                case.get("test_category", "ppt_generation"),
+                case.get("context_length", "short")
+            )
+
+        for model_id in models:
+            sampler.add_model(model_id)
+
+        results = {model_id: [] for model_id in models}
+        stopped = None
+
+        try:
+            for case in cases:
+                active = sampler.active_models(list(models))
+                if not active:
+                    break
+
+                for model_id in active:
+                    result = run_case(model_id, models[model_id], case)
+                    results[model_id].append(result)
+                    if result.get("overall_score") is not None:
+                        sampler.record(model_id, result["overall_score"])
+        except BudgetExceededError as e:
+            # Keep what was sampled; the caller decides whether to go on
+            self.logger.error(f"Budget reached during adaptive run: {e}")
+            stopped = e.scope
+
+        for model_id in models:
+            sampler.should_stop(model_id)
+        summary = sampler.summary()
+        for model_summary in summary.values():
+            # Models that never met a stopping rule simply ran out of cases, or of budget
+            model_summary["stop_reason"] = model_summary["stop_reason"] or (
+                f"{stopped}_budget" if stopped else "cases_exhausted")
+
+        issued = sum(len(model_results) for model_results in results.values())
+        self.logger.info(f"Adaptive run issued {issued} of {len(cases) * len(models)} possible cases")
+
+        return {
+            "results": results,
+            "stopped": stopped,
+            "adaptive": {
+                "models": summary,
+                "cases_issued": issued,
+                "cases_skipped": len(cases) * len(models) - issued,
+                "stopped": stopped
+            }
+        }
@@ -2,7 +2,10 @@
 
 import asyncio
 import os
-from typing import Callable, List, Any, Dict, TypeVar, Coroutine
+import time
+from typing import Callable, List, Any, Dict, Optional, TypeVar, Coroutine
+
+from src.utils.tokenizers import count_tokens_batch
 
 T = TypeVar('T')
 
@@ -13,41 +16,80 @@ class ParallelExecutor:
         """Initialize the parallel executor."""
         self.max_parallel = int(os.environ.get("MAX_PARALLEL_REQUESTS", "5"))
         self.delay_ms = int(os.environ.get("REQUEST_DELAY_MS", "500"))
+        self.tokens_per_minute = int(os.environ.get("TOKENS_PER_MINUTE", "0"))
         self.semaphore = asyncio.Semaphore(self.max_parallel)
 
-    async def execute_with_rate_limit(self, func: Callable[..., Coroutine[Any, Any, T]], *args, **kwargs) -> T:
+        # Token bucket for TOKENS_PER_MINUTE (0 disables token limiting)
+        self._bucket = float(self.tokens_per_minute)
+        self._bucket_time = time.monotonic()
+        self._bucket_lock = asyncio.Lock()
+
+    async def _acquire_tokens(self, tokens: int):
+        """Wait until the token bucket can cover a request of `tokens` prompt tokens."""
+        if self.tokens_per_minute <= 0:
+            return
+
+        # Requests larger than a whole minute's budget wait for a full bucket
+        tokens = min(tokens, self.tokens_per_minute)
+        refill_per_second = self.tokens_per_minute / 60
+        async with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                self._bucket = min(self.tokens_per_minute,
+                                   self._bucket + (now - self._bucket_time) * refill_per_second)
+                self._bucket_time = now
+                if self._bucket >= tokens:
+                    self._bucket -= tokens
+                    return
+                await asyncio.sleep((tokens - self._bucket) / refill_per_second)
+
+    async def execute_with_rate_limit(self, func: Callable[..., Coroutine[Any, Any, T]], *args,
+                                      prompt_tokens: int = 0, **kwargs) -> T:
         """
         Execute a function with rate limiting.
 
         Args:
             func: Coroutine function to execute
             *args: Positional arguments for the function
+            prompt_tokens: Prompt tokens the call will send, charged against TOKENS_PER_MINUTE
             **kwargs: Keyword arguments for the function
 
         Returns:
             Function result
         """
         async with self.semaphore:
+            await self._acquire_tokens(prompt_tokens)
             result = await func(*args, **kwargs)
             # Add delay to prevent hitting rate limits
             if self.delay_ms > 0:
                 await asyncio.sleep(self.delay_ms / 1000)
             return result
 
-    async def execute_batch(self, tasks: List[Dict[str, Any]], func: Callable[..., Coroutine[Any, Any, T]]) -> List[T]:
+    async def execute_batch(self, tasks: List[Dict[str, Any]], func: Callable[..., Coroutine[Any, Any, T]],
+                            model_name: Optional[str] = None) -> List[T]:
         """
         Execute a batch of tasks in parallel with rate limiting.
 
+        When TOKENS_PER_MINUTE is set, the `prompt` of every task is counted up
+        front in one batched call and charged against the token budget.
+
         Args:
             tasks: List of task dictionaries with args and kwargs
             func: Coroutine function to execute for each task
+            model_name: Model whose tokenizer is used for counting, or None for gpt-4
 
         Returns:
             List of function results
         """
+        if self.tokens_per_minute > 0:
+            prompt_tokens = count_tokens_batch([str(task.get("prompt", "")) for task in tasks],
+                                               model_name or "gpt-4")
+        else:
+            prompt_tokens = [0] * len(tasks)
+
         coroutines = [
-            self.execute_with_rate_limit(func, **task)
-            for task in tasks
+            self.execute_with_rate_limit(func, prompt_tokens=int(tokens), **task)
+            for task, tokens in zip(tasks, prompt_tokens)
         ]
 
         return await asyncio.gather(*coroutines)
\ No newline at end of file
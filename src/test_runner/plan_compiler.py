@@ -0,0 +1,598 @@
+"""Compile test suite YAMLs into a validated, hashed execution plan."""
+
+import glob
+import hashlib
+import json
+import os
+from itertools import cycle, islice
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+from src.utils.case_corpus import CaseCorpus
+from src.utils.config import load_config
+from src.utils.context_store import ContextStore, default_context_sources, open_context_store
+from src.utils.fingerprint import file_fingerprint
+from src.utils.prompt_formatter import compile_template
+from src.test_runner.case_expander import CaseExpander
+
+PLAN_FORMAT_VERSION = 1
+
+
+class PlanValidationError(Exception):
+    """Raised when a compiled plan references missing files or unknown methods and metrics."""
+
+    def __init__(self, problems: List[str]):
+        self.problems = list(problems)
+        super().__init__(f"{len(self.problems)} problem(s) in execution plan:\n  " + "\n  ".join(self.problems))
+
+
+class FrozenDict(dict):
+    """Read-only dictionary; work units and their nested mappings are FrozenDicts."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is immutable")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __hash__(self):
+        return hash(_canonical(self))
+
+    def __reduce__(self):
+        # Pickle through the constructor; the default protocol would call __setitem__
+        return (type(self), (dict(self),))
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return FrozenDict({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def content_digest(value: Any) -> str:
+    """
+    SHA-256 of a JSON-serializable value in canonical form.
+
+    Args:
+        value: Value to hash; key order does not matter
+
+    Returns:
+        Hex digest
+    """
+    return hashlib.sha256(_canonical(value).encode("utf-8")).hexdigest()
+
+
+class ExecutionPlan:
+    """
+    Immutable list of work units compiled from the test suites.
+
+    A work unit is one fully resolved request: suite and case, rendered
+    prompt with its template ID and variables, context ID and digest (the
+    text stays in the context store), generation settings and evaluation
+    method and metrics. Each unit carries an `id` hashed from its content,
+    and the plan's `digest` is hashed from the unit IDs, so executor workers
+    sharing a plan file can check they run the same work.
+    """
+
+    def __init__(self,
+                 units: List[Dict[str, Any]],
+                 missing_files: Optional[List[str]] = None,
+                 problems: Optional[List[str]] = None,
+                 sources: Optional[Dict[str, Any]] = None,
+                 inputs: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the plan.
+
+        Args:
+            units: Work units, in scheduling order
+            missing_files: Referenced data files that do not exist
+            problems: Validation problems (including one per missing file)
+            sources: Fingerprints of the files the plan was compiled from
+            inputs: Arguments the plan was compiled with
+        """
+        self.units: Tuple[FrozenDict, ...] = tuple(_freeze(unit) for unit in units)
+        self.missing_files: Tuple[str, ...] = tuple(missing_files or ())
+        self.problems: Tuple[str, ...] = tuple(problems or ())
+        self.sources = _freeze(sources or {})
+        self.inputs = _freeze(inputs or {})
+        self.digest = content_digest([unit["id"] for unit in self.units])
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+    def __iter__(self):
+        return iter(self.units)
+
+    @property
+    def valid(self) -> bool:
+        """Whether the plan compiled without problems."""
+        return not self.problems
+
+    def resolved_units(self) -> List[FrozenDict]:
+        """Units whose prompt could be resolved (the ones that can be sent)."""
+        return [unit for unit in self.units if unit["resolved"]]
+
+    def check(self):
+        """
+        Raise if the plan has problems, before anything is sent.
+
+        Raises:
+            PlanValidationError: If any file is missing or a method or metric is unknown
+        """
+        if self.problems:
+            raise PlanValidationError(self.problems)
+
+    def is_current(self) -> bool:
+        """Whether every source file is unchanged since the plan was compiled."""
+        return all(file_fingerprint(path) == (list(stamp) if stamp is not None else None)
+                   for path, stamp in self.sources.items())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": PLAN_FORMAT_VERSION,
+            "digest": self.digest,
+            "inputs": self.inputs,
+            "sources": self.sources,
+            "missing_files": list(self.missing_files),
+            "problems": list(self.problems),
+            "units": list(self.units),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ExecutionPlan":
+        """
+        Rebuild a plan from `to_dict` output, verifying its hashes.
+
+        Args:
+            data: Serialized plan
+
+        Returns:
+            ExecutionPlan instance
+
+        Raises:
+            ValueError: If the format version, a unit ID or the plan digest does not match
+        """
+        if data.get("version") != PLAN_FORMAT_VERSION:
+            raise ValueError(f"Unsupported execution plan version: {data.get('version')}")
+        for unit in data["units"]:
+            if unit["id"] != unit_id(unit):
+                raise ValueError(f"Work unit {unit['id']} does not match its content")
+        plan = cls(data["units"], data.get("missing_files"), data.get("problems"),
+                   data.get("sources"), data.get("inputs"))
+        if plan.digest != data.get("digest"):
+            raise ValueError("Execution plan digest does not match its work units")
+        return plan
+
+    def save(self, path: str):
+        """
+        Write the plan as JSON so other workers can load it.
+
+        Args:
+            path: Output file path
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ExecutionPlan":
+        """
+        Load a plan written by `save`.
+
+        Args:
+            path: Plan file path
+
+        Returns:
+            ExecutionPlan instance
+        """
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
+def unit_id(unit: Dict[str, Any]) -> str:
+    """
+    Content-derived ID of a work unit.
+
+    Args:
+        unit: Work unit; an existing `id` field is ignored
+
+    Returns:
+        First 16 hex characters of the digest of the unit's other fields
+    """
+    return content_digest({key: value for key, value in unit.items() if key != "id"})[:16]
+
+
+def load_suites(suite_dir: str = os.path.join("config", "test_suites"),
+                names: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Load test suite configurations.
+
+    Args:
+        suite_dir: Directory with the suite YAML files
+        names: Suite file names (without .yaml) to load, or None for all
+
+    Returns:
+        Suite configurations keyed by file name
+    """
+    suites = {}
+    for path in sorted(glob.glob(os.path.join(suite_dir, "*.yaml"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if names is None or name in names:
+            suites[name] = load_config(path) or {}
+    return suites
+
+
+def _load_json(path: str, key: str) -> List[Dict[str, Any]]:
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        data = json.load(f)
+    return data.get(key, []) if isinstance(data, dict) else data
+
+
+def _context_sources(suites: List[Dict[str, Any]], data_dir: str) -> List[str]:
+    """Context files a store must cover: data/contexts/*/contexts.json plus existing suite context files."""
+    sources = set(default_context_sources(data_dir))
+    for suite in suites:
+        for case in suite.get("test_cases") or []:
+            if case.get("context_file") and os.path.exists(case["context_file"]):
+                sources.add(case["context_file"])
+    return sorted(sources)
+
+
+def _unit_base(suite_name: str, settings: Dict[str, Any], case: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields every work unit of a suite case shares."""
+    evaluation = case.get("evaluation") or {}
+    return {
+        "suite": suite_name,
+        "case": case.get("id"),
+        "method": evaluation.get("method"),
+        "metrics": list(evaluation.get("metrics") or []),
+        "weight": case.get("weight", 1.0),
+        "temperature": settings.get("temperature"),
+        "max_tokens": settings.get("max_tokens"),
+        "evaluation_model": settings.get("evaluation_model"),
+        # Only units with constraints carry the field, so other unit IDs stay the same
+        **({"constraints": list(case["constraints"])} if case.get("constraints") else {}),
+    }
+
+
+def _item_constraints(base: Dict[str, Any], item: Dict[str, Any]) -> Dict[str, Any]:
+    """The `constraints` field of a unit: its suite case's constraints followed by its test case's."""
+    constraints = list(base.get("constraints") or []) + list(item.get("constraints") or [])
+    return {"constraints": constraints} if constraints else {}
+
+
+def case_expanders(suite_name: str,
+                   suite: Dict[str, Any],
+                   case: Dict[str, Any],
+                   data_dir: str = "data",
+                   contexts: Optional[ContextStore] = None) -> List[CaseExpander]:
+    """
+    Lazy unit generators for a suite case, one per prompt of its prompts file.
+
+    The case's `expand` block ({"mode": "product", "axes": {...}, "sample": n,
+    "seed": s}) selects how each template is expanded over its examples'
+    variables; without it the examples are used as they are, `examples_count`
+    units per prompt. Iterate the expanders (or their shards) directly to
+    stream a suite too large to compile into a plan.
+
+    Args:
+        suite_name: Suite file name (e.g. "ppt_writing")
+        suite: Suite configuration
+        case: One entry of the suite's test_cases
+        data_dir: Root of the data files
+        contexts: Context store covering the case's context file, or None to open one
+
+    Returns:
+        List of CaseExpander (empty if the prompts file does not exist)
+    """
+    prompts_file = case.get("prompts_file")
+    if not prompts_file or not os.path.exists(prompts_file):
+        return []
+    expand = dict(case.get("expand") or {})
+    context_ids = []
+    if case.get("context_file") and os.path.exists(case["context_file"]):
+        if contexts is None:
+            contexts = open_context_store(_context_sources([suite], data_dir), data_dir=data_dir)
+        context_ids = contexts.ids(case["context_file"])
+    base = _unit_base(suite_name, suite.get("settings") or {}, case)
+    return [CaseExpander.from_prompt(prompt, base=base, context_ids=context_ids, contexts=contexts,
+                                     mode=expand.get("mode", "examples"), axes=expand.get("axes"),
+                                     count=case.get("examples_count"), sample=expand.get("sample"),
+                                     seed=expand.get("seed", 0))
+            for prompt in (load_config(prompts_file) or {}).get("prompts", [])]
+
+
+def compile_suite(suite_name: str,
+                  suite: Dict[str, Any],
+                  data_dir: str = "data",
+                  contexts: Optional[ContextStore] = None,
+                  expand: bool = True) -> Tuple[List[Dict[str, Any]], List[str], List[str], List[str]]:
+    """
+    Resolve a suite into work units.
+
+    Each suite case contributes `examples_count` units built from the
+    examples of its prompts file and the matching entries (by category) of
+    data/test_cases/<suite>_test_cases.json (or the indexed .jsonl corpus
+    of the same name, when present), paired round-robin with the
+    contexts of its context file. A case without any prompt still yields
+    its units, marked unresolved.
+
+    Args:
+        suite_name: Suite file name (e.g. "ppt_writing")
+        suite: Suite configuration
+        data_dir: Root of the data files
+        contexts: Context store covering the suite's context files, or None to open one
+        expand: Include the units of cases with an `expand` block; False only validates
+            those cases, leaving their units to be streamed (see `PlanShard`)
+
+    Returns:
+        Tuple of (units, referenced files that do not exist, problems, files read)
+    """
+    if contexts is None:
+        contexts = open_context_store(_context_sources([suite], data_dir), data_dir=data_dir)
+    settings = suite.get("settings") or {}
+    cases = suite.get("test_cases") or []
+    missing, problems = [], []
+    test_cases_path = os.path.join(data_dir, "test_cases", f"{suite_name}_test_cases.json")
+    corpus_path = f"{test_cases_path}l"
+    read = [test_cases_path, corpus_path]
+
+    # Templates by prompt ID across the whole suite, and each case's own examples
+    templates, examples = {}, {}
+    for case in cases:
+        prompts_file = case.get("prompts_file")
+        if not prompts_file:
+            continue
+        read.append(prompts_file)
+        if not os.path.exists(prompts_file):
+            missing.append(prompts_file)
+            continue
+        case_examples = []
+        for prompt in (load_config(prompts_file) or {}).get("prompts", []):
+            templates[prompt.get("id")] = prompt.get("template", "")
+            for example in prompt.get("examples") or []:
+                case_examples.append({
+                    "prompt_id": prompt.get("id"),
+                    "variables": example.get("variables") or {},
+                    "context_id": None,
+                    "expected_response_type": example.get("expected_response_type"),
+                })
+        examples[case.get("id")] = case_examples
+
+    if os.path.exists(corpus_path):
+        # Large corpora: read only the rows of each case's category
+        corpus = CaseCorpus(corpus_path)
+        case_items = lambda category: corpus.iter_cases(category=category)
+    else:
+        test_cases = _load_json(test_cases_path, "test_cases")
+        case_items = lambda category: (item for item in test_cases if item.get("category") == category)
+
+    units = []
+    seen_cases = set()
+    for case in cases:
+        case_id = case.get("id")
+        if case_id in seen_cases:
+            problems.append(f"{suite_name}: duplicate test case id '{case_id}'")
+        seen_cases.add(case_id)
+
+        if case.get("expand"):
+            # Expanded cases are generated straight from their templates
+            expanders = case_expanders(suite_name, suite, case, data_dir, contexts)
+            for expander in expanders:
+                unfilled = expander.missing()
+                if unfilled:
+                    problems.append(f"{suite_name}/{case_id}: prompt '{expander.base['prompt_id']}' "
+                                    f"has no value for {', '.join(unfilled)}")
+                if expand:
+                    units.extend(expander)
+            if not any(len(expander) for expander in expanders):
+                problems.append(f"{suite_name}/{case_id}: no prompts could be resolved")
+            if case.get("context_file"):
+                read.append(case["context_file"])
+                if not os.path.exists(case["context_file"]):
+                    missing.append(case["context_file"])
+            continue
+
+        items = []
+        for item in case_items(case_id):
+            if item.get("prompt_id") in templates:
+                items.append({"prompt_id": item["prompt_id"], "variables": item.get("variables") or {},
+                              "context_id": item.get("context_id"), "tests": item.get("tests") or [],
+                              "language": item.get("language"), "test_case_id": item.get("id"),
+                              "constraints": item.get("constraints") or []})
+            elif item.get("prompt_template") or item.get("prompt"):
+                items.append({"prompt": item.get("prompt_template") or item.get("prompt"),
+                              "variables": item.get("variables") or {}, "context_id": item.get("context_id"),
+                              "tests": item.get("tests") or [], "language": item.get("language"),
+                              "test_case_id": item.get("id"), "constraints": item.get("constraints") or []})
+            else:
+                problems.append(f"{suite_name}/{case_id}: test case {item.get('id')} references unknown "
+                                f"prompt '{item.get('prompt_id')}'")
+        items.extend(examples.get(case_id, []))
+
+        # Render once per item; unfilled placeholders are a data error, not a prompt
+        rendered = []
+        for item in items:
+            template = compile_template(templates.get(item.get("prompt_id"), item.get("prompt", "")))
+            prompt = template.render(item["variables"], strict=False)
+            unfilled = template.missing(item["variables"])
+            if unfilled:
+                problems.append(f"{suite_name}/{case_id}: prompt '{item.get('prompt_id')}' "
+                                f"has no value for {', '.join(unfilled)}")
+            context_id = item.get("context_id")
+            if context_id and context_id not in contexts:
+                problems.append(f"{suite_name}/{case_id}: unknown context '{context_id}'")
+            rendered.append({**item, "prompt": prompt, "context_id": context_id if context_id in contexts else None})
+
+        context_file = case.get("context_file")
+        if context_file:
+            read.append(context_file)
+            if os.path.exists(context_file):
+                file_contexts = contexts.ids(context_file)
+                if file_contexts and rendered:
+                    for item, context_id in zip(rendered, islice(cycle(file_contexts), len(rendered))):
+                        item["context_id"] = context_id
+            else:
+                missing.append(context_file)
+
+        base = _unit_base(suite_name, settings, case)
+        count = case.get("examples_count") or len(rendered)
+        if not rendered:
+            problems.append(f"{suite_name}/{case_id}: no prompts could be resolved")
+            pool = [{"prompt": "", "context_id": None, "context_digest": None, "resolved": False}]
+        else:
+            pool = [{"prompt_id": item.get("prompt_id"), "variables": item["variables"],
+                     "prompt": item["prompt"], "context_id": item["context_id"],
+                     "context_digest": contexts.digest(item["context_id"]) if item["context_id"] else None,
+                     "test_case_id": item.get("test_case_id"), "tests": item.get("tests") or [],
+                     "language": item.get("language"), "expected_response_type": item.get("expected_response_type"),
+                     "resolved": True, **_item_constraints(base, item)} for item in rendered]
+        for sample, item in enumerate(islice(cycle(pool), count)):
+            unit = {**base, **item, "sample": sample, "has_tests": bool(item.get("tests"))}
+            unit["id"] = unit_id(unit)
+            units.append(unit)
+
+    return units, sorted(set(missing)), problems, read
+
+
+def _validate_evaluation(units: List[Dict[str, Any]], metrics_config: Optional[Dict[str, Any]]) -> List[str]:
+    """Problems with the evaluation methods and metrics the units reference."""
+    from src.evaluators.base_evaluator import EVALUATOR_REGISTRY, get_metrics_config
+
+    known_metrics = (metrics_config or get_metrics_config())["metrics"]
+    problems = []
+    for suite, case, method, metrics in sorted({(unit["suite"], unit["case"], unit["method"], tuple(unit["metrics"]))
+                                                 for unit in units}, key=str):
+        if method and method not in EVALUATOR_REGISTRY:
+            problems.append(f"{suite}/{case}: no evaluator registered for method '{method}'")
+        unknown = [metric for metric in metrics if metric not in known_metrics]
+        if unknown:
+            problems.append(f"{suite}/{case}: unknown metrics {', '.join(unknown)}")
+    return problems
+
+
+def compile_plan(suite_dir: str = os.path.join("config", "test_suites"),
+                 names: Optional[List[str]] = None,
+                 data_dir: str = "data",
+                 metrics_config: Optional[Dict[str, Any]] = None,
+                 cache_path: Optional[str] = None,
+                 expand: bool = True) -> ExecutionPlan:
+    """
+    Compile test suites into one execution plan.
+
+    Every referenced file is checked at compile time, so a run can refuse to
+    start instead of failing halfway through. With `cache_path`, a previously
+    compiled plan is reused while none of its source files has changed.
+
+    Args:
+        suite_dir: Directory with the suite YAML files
+        names: Suite file names (without .yaml) to compile, or None for all
+        data_dir: Root of the data files
+        metrics_config: Metrics configuration used for validation, or None for the shared one
+        cache_path: Plan file to reuse and update, or None to always compile
+        expand: Compile the units of expanded cases into the plan; False leaves them out,
+            to be generated shard by shard with `PlanShard`
+
+    Returns:
+        ExecutionPlan; check `valid` or call `check()` before running it
+    """
+    inputs = {"suite_dir": suite_dir, "names": sorted(names) if names is not None else None, "data_dir": data_dir,
+              "expand": expand}
+    if cache_path and os.path.exists(cache_path):
+        try:
+            cached = ExecutionPlan.load(cache_path)
+            if _canonical(cached.inputs) == _canonical(inputs) and cached.is_current():
+                return cached
+        except (ValueError, KeyError, json.JSONDecodeError):
+            pass
+
+    suites = load_suites(suite_dir, names)
+    contexts = open_context_store(_context_sources(list(suites.values()), data_dir), data_dir=data_dir)
+    sources = [os.path.join(suite_dir, f"{name}.yaml") for name in suites]
+    sources += default_context_sources(data_dir)
+    if names is not None:
+        sources += [os.path.join(suite_dir, f"{name}.yaml") for name in names if name not in suites]
+
+    units, missing, problems, streamed = [], [], [], []
+    for name in names or []:
+        if name not in suites:
+            problems.append(f"Test suite '{name}' not found in {suite_dir}")
+    for suite_name, suite in suites.items():
+        suite_units, suite_missing, suite_problems, read = compile_suite(suite_name, suite, data_dir, contexts,
+                                                                         expand)
+        if not expand:
+            # Streamed cases still have their evaluation checked
+            streamed += [_unit_base(suite_name, suite.get("settings") or {}, case)
+                         for case in suite.get("test_cases") or [] if case.get("expand")]
+        units.extend(suite_units)
+        missing.extend(suite_missing)
+        problems.extend(suite_problems)
+        sources.extend(read)
+
+    missing = sorted(set(missing))
+    problems = ([f"Missing file: {path}" for path in missing] + problems
+                + _validate_evaluation(units + streamed, metrics_config))
+
+    plan = ExecutionPlan(units, missing, problems, {path: file_fingerprint(path) for path in sorted(set(sources))}, inputs)
+    if cache_path:
+        plan.save(cache_path)
+    return plan
+
+
+class PlanShard:
+    """
+    Shard k of n of a plan's work units, generated as they are read.
+
+    Covers every n-th resolved unit of the plan and, for a plan compiled with
+    `expand=False`, the matching shard of each expanded case, decoded by its
+    CaseExpander without materializing the expansion. The shard is
+    re-iterable, so it can be passed to `TestExecutor.run_units`.
+    """
+
+    def __init__(self, plan: ExecutionPlan, shard_index: int = 0, shard_count: int = 1):
+        """
+        Initialize the shard.
+
+        Args:
+            plan: Execution plan; its inputs select the suites whose expanded cases are streamed
+            shard_index: Shard to yield, from 0
+            shard_count: Number of shards
+
+        Raises:
+            ValueError: If the shard is out of range
+        """
+        if not 0 <= shard_index < shard_count:
+            raise ValueError(f"Shard {shard_index} is out of range for {shard_count} shards")
+        self.plan = plan
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.expanders: List[CaseExpander] = []
+        if plan.inputs.get("expand", True) is False:
+            suite_dir, data_dir = plan.inputs["suite_dir"], plan.inputs["data_dir"]
+            names = list(plan.inputs["names"]) if plan.inputs.get("names") is not None else None
+            suites = load_suites(suite_dir, names)
+            contexts = open_context_store(_context_sources(list(suites.values()), data_dir), data_dir=data_dir)
+            for suite_name, suite in suites.items():
+                for case in suite.get("test_cases") or []:
+                    if case.get("expand"):
+                        self.expanders += [expander.shard(shard_index, shard_count) for expander in
+                                           case_expanders(suite_name, suite, case, data_dir, contexts)]
+
+    def __len__(self) -> int:
+        fixed = len(range(self.shard_index, len(self.plan.resolved_units()), self.shard_count))
+        return fixed + sum(len(expander) for expander in self.expanders)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        yield from self.plan.resolved_units()[self.shard_index::self.shard_count]
+        for expander in self.expanders:
+            yield from expander
@@ -0,0 +1,402 @@
+"""Dry-run planning: predict tokens, cost and wall-clock of a run before spending."""
+
+import inspect
+import json
+import logging
+import os
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from src.utils.context_store import resolve_context
+from src.utils.cost_tracker import get_cost_rates
+from src.test_runner.plan_compiler import compile_suite, content_digest
+from src.utils.tokenizers import chars_per_token, count_tokens, count_tokens_batch, get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+# Predictions used for models without historical responses
+DEFAULT_OUTPUT_TOKENS = 600
+DEFAULT_JUDGE_OUTPUT_TOKENS = 150
+DEFAULT_TTFT = 0.5
+DEFAULT_OUTPUT_TOKENS_PER_SECOND = 50.0
+
+# Judge template overhead when an evaluator's template cannot be rendered
+_FALLBACK_TEMPLATE_TOKENS = 150
+
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    """
+    Load historical response records (JSON list or JSONL).
+
+    Records use the `responses_to_arrays` format: `model`, `usage` and `timing`.
+
+    Args:
+        path: Path to the history file
+
+    Returns:
+        List of response records
+    """
+    with open(path, "r") as f:
+        content = f.read()
+    if content.lstrip().startswith("["):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def expand_suite(suite_name: str, suite: Dict[str, Any], data_dir: str = "data",
+                 contexts: Optional[Dict[str, str]] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Expand a suite into the concrete requests a run would send.
+
+    Args:
+        suite_name: Suite file name (e.g. "ppt_writing")
+        suite: Suite configuration
+        data_dir: Root of the data files
+        contexts: Context contents by ID, or None to load them
+
+    Returns:
+        Tuple of (requests, referenced files that do not exist); see `compile_suite`
+    """
+    units, missing, _, _ = compile_suite(suite_name, suite, data_dir, contexts)
+    return units, missing
+
+
+def _normalize_text(text: str) -> str:
+    """Text with line endings, trailing spaces and surrounding blank lines normalized."""
+    return "\n".join(line.rstrip() for line in text.strip().splitlines())
+
+
+class RequestDeduplicator:
+    """
+    Keys work units by the request they send, so identical requests run once.
+
+    Two units send the same request when their normalized prompt, context
+    content (by digest, so the same text under two context IDs matches) and
+    generation parameters are equal; the model is the remaining part of the
+    key and is kept apart by deduplicating each model's units separately.
+    Repeats of one request within a suite case are deliberate samples unless
+    the temperature is 0, so the n-th repeat in a case only shares its
+    response with the n-th repeat in other cases.
+    """
+
+    def __init__(self):
+        self._occurrences: Dict[tuple, int] = {}
+
+    def key(self, unit: Dict[str, Any]) -> str:
+        """
+        Key of the request a unit sends; call once per unit, in run order.
+
+        Args:
+            unit: Work unit
+
+        Returns:
+            Hex digest shared by every unit sending the same request
+        """
+        if unit.get("context_digest"):
+            context = unit["context_digest"]
+        else:
+            context = content_digest(_normalize_text(resolve_context(unit))) if unit.get("context") else None
+        request = content_digest([_normalize_text(unit.get("prompt") or ""), context,
+                           unit.get("temperature"), unit.get("max_tokens")])
+        replica = 0
+        if unit.get("temperature") != 0:
+            occurrence = (unit.get("suite"), unit.get("case"), request)
+            replica = self._occurrences.get(occurrence, 0)
+            self._occurrences[occurrence] = replica + 1
+        return content_digest([request, replica])[:16]
+
+
+def dedupe_requests(requests: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Group work units that send the same request.
+
+    Args:
+        requests: Work units, in run order
+
+    Returns:
+        Groups of units in first-seen order; the first unit of each group is the one sent.
+        Unresolved units have no real prompt and stay in groups of their own.
+    """
+    deduplicator = RequestDeduplicator()
+    groups: Dict[Any, List[Dict[str, Any]]] = {}
+    for i, request in enumerate(requests):
+        key = deduplicator.key(request) if request.get("resolved", True) else i
+        groups.setdefault(key, []).append(request)
+    return list(groups.values())
+
+
+class RunPlanner:
+    """Predicts the tokens, cost and wall-clock of a run without calling any model."""
+
+    def __init__(self,
+                 models: Dict[str, Dict[str, Any]],
+                 max_parallel: Optional[int] = None,
+                 delay_ms: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None,
+                 history: Optional[List[Dict[str, Any]]] = None,
+                 metrics_config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the planner.
+
+        Args:
+            models: Model configurations keyed by model ID (entries of config/models/*.yaml)
+            max_parallel: Concurrent requests, or None for MAX_PARALLEL_REQUESTS
+            delay_ms: Delay held after each request, or None for REQUEST_DELAY_MS
+            tokens_per_minute: Prompt token rate limit, or None for TOKENS_PER_MINUTE (0 disables)
+            history: Historical response records used for latency and output length
+            metrics_config: Metrics configuration, or None for the shared one
+        """
+        self.models = models
+        self.max_parallel = max_parallel or int(os.environ.get("MAX_PARALLEL_REQUESTS", "5"))
+        self.delay_ms = delay_ms if delay_ms is not None else int(os.environ.get("REQUEST_DELAY_MS", "500"))
+        self.tokens_per_minute = (tokens_per_minute if tokens_per_minute is not None
+                                  else int(os.environ.get("TOKENS_PER_MINUTE", "0")))
+        self.profiles = self._history_profiles(history or [])
+        self._metrics_config = metrics_config
+        self._template_tokens: Dict[tuple, int] = {}
+
+    def _history_profiles(self, history: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+        """Median time to first token, output rate and mean output length per model."""
+        by_model: Dict[str, List[tuple]] = {}
+        for record in history:
+            timing = record.get("timing") or {}
+            completion = (record.get("usage") or {}).get("completion_tokens") or 0
+            if timing.get("total_time") and completion:
+                by_model.setdefault(record.get("model", "unknown"), []).append(
+                    (timing["total_time"], timing.get("time_to_first_token"), completion)
+                )
+
+        profiles = {}
+        for model, rows in by_model.items():
+            latency = np.array([row[0] for row in rows], dtype=float)
+            ttft = np.array([row[1] if row[1] is not None else np.nan for row in rows], dtype=float)
+            completion = np.array([row[2] for row in rows], dtype=float)
+            known_ttft = ttft[~np.isnan(ttft)]
+            first = float(np.median(known_ttft)) if known_ttft.size else DEFAULT_TTFT
+            generating = np.maximum(latency - np.where(np.isnan(ttft), first, ttft), 1e-3)
+            profiles[model] = {
+                "ttft": first,
+                "tokens_per_second": float(np.median(completion / generating)),
+                "output_tokens": float(np.mean(completion)),
+            }
+        return profiles
+
+    def _profile(self, model_id: str) -> Dict[str, Any]:
+        config = self.models.get(model_id, {})
+        for key in (model_id, config.get("version")):
+            if key in self.profiles:
+                return {**self.profiles[key], "historical": True}
+        return {"ttft": DEFAULT_TTFT, "tokens_per_second": DEFAULT_OUTPUT_TOKENS_PER_SECOND,
+                "output_tokens": DEFAULT_OUTPUT_TOKENS, "historical": False}
+
+    def _rates(self, model_id: str) -> Dict[str, float]:
+        config = self.models.get(model_id, {})
+        return config.get("cost") or get_cost_rates(config.get("version") or model_id)
+
+    def _count(self, texts: List[str], model_id: str, cache: Dict[Any, np.ndarray]) -> np.ndarray:
+        """Token counts of the unique texts, shared between models with the same tokenizer."""
+        model_name = self.models.get(model_id, {}).get("version") or model_id
+        tokenizer = get_tokenizer(model_name)
+        key = tokenizer.name if tokenizer else ("estimate", chars_per_token(model_name))
+        if key not in cache:
+            cache[key] = count_tokens_batch(texts, model_name)
+        return cache[key]
+
+    def _judge_template_tokens(self, method: str, metric: str, judge: str) -> int:
+        """Tokens of a judge template rendered with empty sections."""
+        key = (method, metric, judge)
+        if key not in self._template_tokens:
+            from src.evaluators.base_evaluator import get_evaluator
+
+            tokens = _FALLBACK_TEMPLATE_TOKENS
+            try:
+                evaluator = get_evaluator(method, None, self._metrics_config)
+                build_prompt = evaluator._create_evaluation_prompt
+                sections = {name: "" for name in inspect.signature(build_prompt).parameters if name != "metric"}
+                system_prompt = getattr(evaluator, "system_prompt", "") or ""
+                tokens = count_tokens(system_prompt + build_prompt(metric=metric, **sections), judge)
+            except Exception as e:
+                logger.debug(f"Cannot render the {method}/{metric} judge template, "
+                             f"assuming {_FALLBACK_TEMPLATE_TOKENS} tokens: {e}")
+            self._template_tokens[key] = tokens
+        return self._template_tokens[key]
+
+    def _judged_metrics(self, method: str, metrics: List[str], has_tests: bool) -> List[str]:
+        """Metrics of a case that need a judge call (model-based and not scored locally)."""
+        from src.evaluators.base_evaluator import EVALUATOR_REGISTRY, get_metrics_config
+
+        config = (self._metrics_config or get_metrics_config())["metrics"]
+        cls = EVALUATOR_REGISTRY.get(method, (None,))[0]
+        local = set(getattr(cls, "structural_metrics", set()))
+        if has_tests:
+            local |= set(getattr(cls, "execution_metrics", set()))
+        return [metric for metric in metrics
+                if config.get(metric, {}).get("evaluation_method") == "model_based" and metric not in local]
+
+    def plan(self,
+             requests: List[Dict[str, Any]],
+             model_ids: Optional[List[str]] = None,
+             dedupe: bool = False) -> Dict[str, Any]:
+        """
+        Predict tokens, cost and wall-clock of sending `requests` to every model.
+
+        Every distinct prompt and context is tokenized once per tokenizer in a
+        single batched call; the per-request arithmetic is vectorized.
+
+        Args:
+            requests: Work units of an ExecutionPlan (or output of `expand_suite`)
+            model_ids: Models to plan for, or None for all planner models
+            dedupe: Send each distinct request once (see `RequestDeduplicator`); every unit is still judged
+
+        Returns:
+            Dictionary with per-model predictions and run totals
+        """
+        model_ids = model_ids or list(self.models)
+        count = len(requests)
+        # Units whose generation request is actually sent
+        sent = np.ones(count, dtype=bool)
+        if dedupe:
+            positions = {id(request): i for i, request in enumerate(requests)}
+            sent[:] = False
+            for group in dedupe_requests(requests):
+                sent[positions[id(group[0])]] = True
+        unique = int(sent.sum())
+
+        # Unique texts, with index 0 reserved for the empty text
+        texts, text_index = [""], {"": 0}
+        prompt_idx = np.empty(count, dtype=np.int64)
+        context_idx = np.empty(count, dtype=np.int64)
+        groups, group_index = [], {}
+        group_idx = np.empty(count, dtype=np.int64)
+        max_tokens = np.empty(count, dtype=np.float64)
+        for i, request in enumerate(requests):
+            for text, target in ((request["prompt"], prompt_idx), (resolve_context(request), context_idx)):
+                if text not in text_index:
+                    text_index[text] = len(texts)
+                    texts.append(text)
+                target[i] = text_index[text]
+            group_key = (request.get("method"), tuple(request.get("metrics") or ()),
+                         request.get("has_tests", False), request.get("evaluation_model"))
+            if group_key not in group_index:
+                group_index[group_key] = len(groups)
+                groups.append(group_key)
+            group_idx[i] = group_index[group_key]
+            max_tokens[i] = request.get("max_tokens") or np.inf
+
+        token_cache: Dict[Any, np.ndarray] = {}
+        results = {}
+        for model_id in model_ids:
+            text_tokens = self._count(texts, model_id, token_cache)
+            input_tokens = text_tokens[prompt_idx] + text_tokens[context_idx]
+            profile = self._profile(model_id)
+            model_max = (self.models.get(model_id, {}).get("defaults") or {}).get("max_output_tokens") or np.inf
+            output_tokens = np.minimum(np.minimum(max_tokens, model_max), profile["output_tokens"])
+            rates = self._rates(model_id)
+            generation_cost = (input_tokens[sent].sum() * rates.get("input_per_1k", 0)
+                               + output_tokens[sent].sum() * rates.get("output_per_1k", 0)) / 1000
+            latency = (profile["ttft"] + output_tokens / profile["tokens_per_second"]) * sent
+
+            # Judge calls per group: (calls per request, template tokens per request, judge model)
+            calls = np.zeros(len(groups))
+            template_tokens = np.zeros(len(groups))
+            judge_cost_in = np.zeros(len(groups))
+            judge_cost_out = np.zeros(len(groups))
+            judge_latency = np.zeros(len(groups))
+            for g, (method, metrics, has_tests, judge) in enumerate(groups):
+                judged = self._judged_metrics(method, list(metrics), has_tests) if method else []
+                if not judged:
+                    continue
+                judge = judge or model_id
+                judge_name = self.models.get(judge, {}).get("version") or judge
+                judge_rates = self._rates(judge)
+                judge_profile = self._profile(judge)
+                calls[g] = len(judged)
+                template_tokens[g] = sum(self._judge_template_tokens(method, metric, judge_name) for metric in judged)
+                judge_cost_in[g] = judge_rates.get("input_per_1k", 0) / 1000
+                judge_cost_out[g] = judge_rates.get("output_per_1k", 0) / 1000
+                judge_latency[g] = judge_profile["ttft"] + DEFAULT_JUDGE_OUTPUT_TOKENS / judge_profile["tokens_per_second"]
+
+            request_calls = calls[group_idx]
+            judge_input = request_calls * (input_tokens + output_tokens) + template_tokens[group_idx]
+            judge_output = request_calls * DEFAULT_JUDGE_OUTPUT_TOKENS
+            judge_cost = float(np.sum(judge_input * judge_cost_in[group_idx] + judge_output * judge_cost_out[group_idx]))
+
+            total_calls = unique + request_calls.sum()
+            busy = latency.sum() + (request_calls * judge_latency[group_idx]).sum() + total_calls * self.delay_ms / 1000
+            wall = busy / self.max_parallel
+            sent_tokens = input_tokens[sent].sum() + judge_input.sum()
+            if self.tokens_per_minute > 0:
+                wall = max(wall, sent_tokens / self.tokens_per_minute * 60)
+
+            results[model_id] = {
+                "requests": unique,
+                "judge_calls": int(request_calls.sum()),
+                "input_tokens": int(input_tokens[sent].sum() + judge_input.sum()),
+                "output_tokens": int(output_tokens[sent].sum() + judge_output.sum()),
+                "generation_cost": float(generation_cost),
+                "judge_cost": judge_cost,
+                "cost": float(generation_cost) + judge_cost,
+                "wall_clock_seconds": float(wall),
+                "historical_latency": profile["historical"],
+            }
+
+        return {
+            "models": results,
+            "totals": {
+                "requests": unique * len(model_ids),
+                "judge_calls": sum(result["judge_calls"] for result in results.values()),
+                "input_tokens": sum(result["input_tokens"] for result in results.values()),
+                "output_tokens": sum(result["output_tokens"] for result in results.values()),
+                "cost": sum(result["cost"] for result in results.values()),
+                # Models are run one after another
+                "wall_clock_seconds": sum(result["wall_clock_seconds"] for result in results.values()),
+            },
+            "unresolved_requests": sum(1 for request in requests if not request.get("resolved", True)),
+            "deduplicated_requests": count - unique,
+            "settings": {"max_parallel": self.max_parallel, "delay_ms": self.delay_ms,
+                         "tokens_per_minute": self.tokens_per_minute},
+        }
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def format_plan_table(plan: Dict[str, Any]) -> str:
+    """
+    Render a plan as a plain-text table.
+
+    Args:
+        plan: Output of `RunPlanner.plan`
+
+    Returns:
+        Table with one row per model and a total row
+    """
+    header = f"{'Model':<28} {'Requests':>9} {'Judge':>8} {'Input tok':>13} {'Output tok':>12} {'Cost ($)':>11} {'Wall':>10}"
+    lines = [header, "-" * len(header)]
+
+    def row(name, values, estimated=""):
+        return (f"{name:<28} {values['requests']:>9,} {values['judge_calls']:>8,} {values['input_tokens']:>13,} "
+                f"{values['output_tokens']:>12,} {values['cost']:>11,.2f} "
+                f"{_format_duration(values['wall_clock_seconds']):>10}{estimated}")
+
+    for model_id, values in plan["models"].items():
+        lines.append(row(model_id, values, "" if values["historical_latency"] else " *"))
+    lines.append("-" * len(header))
+    lines.append(row("Total", plan["totals"]))
+
+    settings = plan["settings"]
+    lines.append("")
+    lines.append(f"Concurrency {settings['max_parallel']}, delay {settings['delay_ms']} ms, "
+                 f"token limit {settings['tokens_per_minute'] or 'none'}/min; models run sequentially.")
+    if any(not values["historical_latency"] for values in plan["models"].values()):
+        lines.append(f"* No latency history: assumes {DEFAULT_TTFT}s to first token, "
+                     f"{DEFAULT_OUTPUT_TOKENS_PER_SECOND:.0f} tokens/s and {DEFAULT_OUTPUT_TOKENS} output tokens.")
+    if plan.get("deduplicated_requests"):
+        lines.append(f"{plan['deduplicated_requests']:,} requests per model repeat another one and reuse its response.")
+    if plan["unresolved_requests"]:
+        lines.append(f"{plan['unresolved_requests']:,} requests reference missing prompt files; "
+                     f"their prompt tokens are not counted.")
+    return "\n".join(lines)
@@ -4,6 +4,8 @@ import asyncio
 import time
 from typing import Callable, Any, TypeVar, Coroutine, Optional
 
+from src.utils.cost_tracker import BudgetExceededError
+
 T = TypeVar('T')
 
 class RetryHandler:
@@ -42,6 +44,9 @@ class RetryHandler:
         for attempt in range(self.max_retries + 1):
             try:
                 return await func(*args, **kwargs)
+            except BudgetExceededError:
+                # Retrying cannot make room in a budget
+                raise
             except Exception as e:
                 last_exception = e
 
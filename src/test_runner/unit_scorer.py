@@ -0,0 +1,170 @@
+"""Judge scores for work unit responses, used to decide when sampling can stop."""
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+from typing import Dict, List, Any, Optional
+
+import yaml
+
+from src.utils.config import load_model_client, load_model_config
+from src.utils.context_store import resolve_context
+from src.utils.cost_tracker import BudgetExceededError
+
+logger = logging.getLogger(__name__)
+
+# Evaluator arguments filled by the scorer itself or only meaningful for direct calls
+_RESERVED_PARAMETERS = {"self", "prompt", "response", "metrics", "context", "tests", "language", "constraints",
+                        "constraint_results", "context_reducer", "full_context", "slides", "execution", "timeout"}
+
+
+class UnitScorer:
+    """
+    Scores unit responses with the evaluator registered for each unit's method.
+
+    Judges and evaluators are created once per evaluation model and per
+    (suite, method), with the suite's settings, and reused for every unit.
+    Other evaluator arguments (e.g. a presentation's `duration` or
+    `slide_range`) are taken from the unit, its template variables or the
+    suite settings, in that order. A unit's `constraints` go to its
+    evaluator when it accepts them; otherwise they are scored by the
+    instruction compliance evaluator, which checks the objective ones
+    locally, and the two scores are averaged.
+    """
+
+    def __init__(self,
+                 suites: Dict[str, Dict[str, Any]],
+                 metrics_config: Optional[Dict[str, Any]] = None,
+                 stats_dir: Optional[str] = None):
+        """
+        Initialize the scorer.
+
+        Args:
+            suites: Suite configurations keyed by suite name, for their settings
+            metrics_config: Metrics configuration, or None to use the shared one
+            stats_dir: Directory `close` writes cascade_stats.yaml and context_reduction.yaml to, or None
+        """
+        self.suites = suites
+        self.metrics_config = metrics_config
+        self.stats_dir = stats_dir
+        self._judges: Dict[str, Any] = {}
+        self._evaluators: Dict[tuple, Any] = {}
+
+    def _judge(self, model_id: str):
+        if model_id not in self._judges:
+            model_config = load_model_config(model_id)
+            self._judges[model_id] = load_model_client(model_id, model_config) if model_config else None
+        return self._judges[model_id]
+
+    def _evaluator(self, unit: Dict[str, Any], method: Optional[str] = None):
+        from src.evaluators.base_evaluator import get_evaluator
+
+        key = (unit.get("suite"), method or unit.get("method"))
+        if key not in self._evaluators:
+            settings = (self.suites.get(unit.get("suite")) or {}).get("settings") or {}
+            judge = self._judge(unit.get("evaluation_model") or settings.get("evaluation_model"))
+            if judge is None:
+                raise ValueError(f"No judge client for suite '{key[0]}'")
+            self._evaluators[key] = get_evaluator(key[1], judge, self.metrics_config, settings=settings)
+        return self._evaluators[key]
+
+    def _compliance_score(self, unit: Dict[str, Any], response: str, constraints: List[Dict[str, Any]]) -> Optional[float]:
+        """Score a response against constraints its own evaluator does not check."""
+        from src.evaluators.constraints import compile_constraints
+
+        compiled = compile_constraints(constraints)
+        metrics = sorted({metric for _, metric, _ in compiled.checkers} | set(compiled.subjective))
+        evaluator = self._evaluator(unit, "instruction_compliance")
+        evaluation = asyncio.run(evaluator.evaluate(unit["prompt"], response, metrics=metrics,
+                                                    constraints=constraints))
+        return evaluation.get("overall_score")
+
+    def score(self, unit: Dict[str, Any], result: Dict[str, Any]) -> Optional[float]:
+        """
+        Judge the response to a unit.
+
+        Args:
+            unit: Work unit
+            result: Unit result with the model's `response`
+
+        Returns:
+            The evaluator's overall score, or None if the unit has no response or cannot be judged
+        """
+        if not unit.get("method") or result.get("response") is None:
+            return None
+        try:
+            evaluator = self._evaluator(unit)
+            parameters = inspect.signature(evaluator.evaluate).parameters
+            kwargs = {"metrics": list(unit.get("metrics") or []) or None}
+            if "context" in parameters:
+                kwargs["context"] = resolve_context(unit)
+            if "tests" in parameters and unit.get("tests"):
+                kwargs["tests"] = list(unit["tests"])
+                kwargs["language"] = unit.get("language") or "python"
+            settings = (self.suites.get(unit.get("suite")) or {}).get("settings") or {}
+            for name in parameters:
+                if name in _RESERVED_PARAMETERS:
+                    continue
+                for source in (unit, unit.get("variables") or {}, settings):
+                    if source.get(name) is not None:
+                        # Units are frozen; evaluators get plain values
+                        kwargs[name] = json.loads(json.dumps(source[name]))
+                        break
+            constraints = [dict(spec) for spec in unit.get("constraints") or []]
+            if "constraints" in parameters and constraints:
+                kwargs["constraints"] = constraints
+            evaluation = asyncio.run(evaluator.evaluate(unit["prompt"], result["response"], **kwargs))
+            score = evaluation.get("overall_score")
+            if constraints and "constraints" not in parameters:
+                compliance = self._compliance_score(unit, result["response"], constraints)
+                if compliance is not None:
+                    score = compliance if score is None else (score + compliance) / 2
+            return score
+        except BudgetExceededError:
+            raise
+        except Exception as e:
+            logger.error(f"Could not score unit {unit.get('id')}: {e}")
+            return None
+
+    def cascade_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Statistics of the judge cascades used so far.
+
+        Returns:
+            Escalation rate, cost saved and audit agreement (see `CascadeJudge.get_stats`),
+            keyed by "<suite>/<method>"
+        """
+        return {f"{suite}/{method}": evaluator.cascade.get_stats()
+                for (suite, method), evaluator in self._evaluators.items()
+                if getattr(evaluator, "cascade", None) is not None}
+
+    def context_savings(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Judge input tokens saved by the context reducers used so far.
+
+        Returns:
+            Savings (see `ContextReducer.get_savings`), keyed by "<suite>/<method>"
+        """
+        return {f"{suite}/{method}": evaluator.context_reducer.get_savings()
+                for (suite, method), evaluator in self._evaluators.items()
+                if getattr(evaluator, "context_reducer", None) is not None}
+
+    def close(self):
+        """Write the judge statistics, then release the resources held by the evaluators created so far."""
+        if self.stats_dir:
+            for name, stats in (("cascade_stats.yaml", self.cascade_stats()),
+                                ("context_reduction.yaml", self.context_savings())):
+                if stats:
+                    with open(os.path.join(self.stats_dir, name), "w") as file:
+                        yaml.safe_dump(stats, file, sort_keys=False)
+        for evaluator in self._evaluators.values():
+            evaluator.close()
+        self._evaluators = {}
+
+    def __enter__(self) -> "UnitScorer":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
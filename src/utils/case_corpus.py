@@ -0,0 +1,307 @@
+"""Streaming JSONL test-case corpora with a sidecar index by id, category and tags."""
+
+import argparse
+import json
+import os
+from typing import Dict, Iterator, List, Any, Optional
+
+import yaml
+
+from src.utils.fingerprint import file_fingerprint
+
+INDEX_FORMAT_VERSION = 1
+
+# Field holding what is needed to convert a row back to its source file
+ORIGIN_KEY = "_origin"
+
+
+def _row(case: Dict[str, Any], origin: Dict[str, Any], **defaults) -> Dict[str, Any]:
+    """A corpus row: the case plus any missing default fields, remembering which were added."""
+    added = [key for key, value in defaults.items() if key not in case and value is not None]
+    row = {**case, **{key: defaults[key] for key in added}}
+    if added:
+        origin = {**origin, "added": added}
+    row[ORIGIN_KEY] = origin
+    return row
+
+
+def read_case_source(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Convert one existing case file into corpus rows.
+
+    Supported layouts are test-case files ({"test_cases": [...]}), ground
+    truth files ({category: [...]}) and prompt files ({"prompts": [{...,
+    "examples": [...]}]}, one row per example). Every row has an `id` and a
+    `category`; `_origin` records how to rebuild the source file exactly.
+
+    Args:
+        path: JSON or YAML file
+
+    Yields:
+        Corpus rows in file order
+    """
+    with open(path, "r") as f:
+        data = yaml.safe_load(f) if path.endswith((".yaml", ".yml")) else json.load(f)
+
+    if isinstance(data, dict) and isinstance(data.get("prompts"), list):
+        for prompt in data["prompts"]:
+            header = {key: value for key, value in prompt.items() if key != "examples"}
+            origin = {"file": path, "layout": "prompts", "prompt": header, "examples": "examples" in prompt}
+            examples = prompt.get("examples") or []
+            if not examples:
+                # A template without examples still has to survive the round trip
+                yield _row({}, {**origin, "index": None}, id=f"{prompt.get('id')}:template",
+                           category=prompt.get("id"), prompt_id=prompt.get("id"))
+            for index, example in enumerate(examples):
+                # Only the first row carries the prompt header
+                row_origin = {**origin, "index": index} if index == 0 else {"file": path, "layout": "prompts",
+                                                                              "index": index}
+                yield _row(example, row_origin, id=f"{prompt.get('id')}:{index}",
+                           category=prompt.get("id"), prompt_id=prompt.get("id"))
+        extra = {key: value for key, value in data.items() if key != "prompts"}
+    elif isinstance(data, dict) and isinstance(data.get("test_cases"), list):
+        for case in data["test_cases"]:
+            yield _row(case, {"file": path, "layout": "test_cases"})
+        extra = {key: value for key, value in data.items() if key != "test_cases"}
+    elif isinstance(data, dict):
+        for group, cases in data.items():
+            for case in cases:
+                yield _row(case, {"file": path, "layout": "grouped", "group": group}, category=group)
+        extra = {}
+    else:
+        raise ValueError(f"Unsupported case file layout: {path}")
+
+    if extra:
+        # Top-level keys besides the case list ride on a marker row
+        yield {"id": f"{path}:extra", ORIGIN_KEY: {"file": path, "layout": "extra", "extra": extra}}
+
+
+class CaseCorpus:
+    """
+    JSONL file of cases with a sidecar index (`<path>.idx.json`).
+
+    The index holds each row's byte offset and the rows of every id,
+    category and tag, so filtered iteration seeks straight to the matching
+    rows. It is rebuilt in one streaming pass whenever the JSONL file
+    changes.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a corpus, building or refreshing its index if needed.
+
+        Args:
+            path: JSONL file path
+        """
+        self.path = path
+        self.index_path = f"{path}.idx.json"
+        index = None
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        if (index is None or index.get("version") != INDEX_FORMAT_VERSION
+                or index.get("stamp") != file_fingerprint(path)):
+            index = self.build_index(path)
+        self._offsets: List[int] = index["offsets"]
+        self._ids: Dict[str, int] = index["ids"]
+        self._categories: Dict[str, List[int]] = index["categories"]
+        self._tags: Dict[str, List[int]] = index["tags"]
+
+    @staticmethod
+    def build_index(path: str) -> Dict[str, Any]:
+        """
+        Index a JSONL corpus in one pass and write the sidecar file.
+
+        Args:
+            path: JSONL file path
+
+        Returns:
+            Index dictionary
+        """
+        offsets, ids, categories, tags = [], {}, {}, {}
+        offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    row = len(offsets)
+                    offsets.append(offset)
+                    case = json.loads(line)
+                    if case.get("id") is not None:
+                        ids[str(case["id"])] = row
+                    if case.get("category") is not None:
+                        categories.setdefault(str(case["category"]), []).append(row)
+                    for tag in case.get("tags") or []:
+                        tags.setdefault(str(tag), []).append(row)
+                offset += len(line)
+        offsets.append(offset)
+
+        index = {"version": INDEX_FORMAT_VERSION, "stamp": file_fingerprint(path), "offsets": offsets,
+                 "ids": ids, "categories": categories, "tags": tags}
+        with open(f"{path}.idx.json.tmp", "w") as f:
+            json.dump(index, f)
+        os.replace(f"{path}.idx.json.tmp", f"{path}.idx.json")
+        return index
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def categories(self) -> Dict[str, int]:
+        """Number of cases per category."""
+        return {category: len(rows) for category, rows in self._categories.items()}
+
+    def tags(self) -> Dict[str, int]:
+        """Number of cases per tag."""
+        return {tag: len(rows) for tag, rows in self._tags.items()}
+
+    def select(self,
+               category: Optional[str] = None,
+               tags: Optional[List[str]] = None,
+               ids: Optional[List[str]] = None) -> List[int]:
+        """
+        Rows matching every given filter, using only the index.
+
+        Args:
+            category: Category the cases must belong to
+            tags: Tags the cases must all have
+            ids: Case IDs to select
+
+        Returns:
+            Sorted row numbers
+        """
+        selected = None
+        if category is not None:
+            selected = set(self._categories.get(category, ()))
+        for tag in tags or []:
+            rows = set(self._tags.get(tag, ()))
+            selected = rows if selected is None else selected & rows
+        if ids is not None:
+            rows = {self._ids[case_id] for case_id in ids if case_id in self._ids}
+            selected = rows if selected is None else selected & rows
+        return sorted(selected) if selected is not None else list(range(len(self)))
+
+    def iter_cases(self,
+                   category: Optional[str] = None,
+                   tags: Optional[List[str]] = None,
+                   ids: Optional[List[str]] = None,
+                   keep_origin: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate the matching cases, reading only their rows.
+
+        Args:
+            category: Category the cases must belong to
+            tags: Tags the cases must all have
+            ids: Case IDs to select
+            keep_origin: Keep the `_origin` conversion field
+
+        Yields:
+            Case dictionaries in file order
+        """
+        rows = self.select(category, tags, ids)
+        with open(self.path, "rb") as f:
+            position = None
+            for row in rows:
+                if position != self._offsets[row]:
+                    f.seek(self._offsets[row])
+                line = f.read(self._offsets[row + 1] - self._offsets[row])
+                position = self._offsets[row + 1]
+                case = json.loads(line)
+                layout = case.get(ORIGIN_KEY, {}).get("layout")
+                if layout == "extra":
+                    if keep_origin:
+                        yield case
+                    continue
+                if not keep_origin:
+                    case.pop(ORIGIN_KEY, None)
+                yield case
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_cases()
+
+    def get(self, case_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch one case by ID.
+
+        Args:
+            case_id: Case ID
+
+        Returns:
+            Case dictionary, or None if the ID is unknown
+        """
+        return next(self.iter_cases(ids=[case_id]), None)
+
+
+def convert_to_jsonl(source_paths: List[str], path: str) -> CaseCorpus:
+    """
+    Convert existing JSON/YAML case files into one indexed JSONL corpus.
+
+    Args:
+        source_paths: Test-case, ground-truth and prompt files
+        path: Output JSONL path
+
+    Returns:
+        The new corpus
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        for source_path in source_paths:
+            for row in read_case_source(source_path):
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    os.replace(f"{path}.tmp", path)
+    return CaseCorpus(path)
+
+
+def export_source(corpus: CaseCorpus, source_path: str) -> Any:
+    """
+    Rebuild the content of an original case file from a corpus.
+
+    Args:
+        corpus: Corpus converted with `convert_to_jsonl`
+        source_path: Path of the original file, as given at conversion
+
+    Returns:
+        The JSON/YAML data the file held
+    """
+    layout, cases, groups, prompts, extra = None, [], {}, [], {}
+    for row in corpus.iter_cases(keep_origin=True):
+        origin = row.pop(ORIGIN_KEY, {})
+        if origin.get("file") != source_path:
+            continue
+        for key in origin.get("added", []):
+            row.pop(key)
+        if origin["layout"] == "extra":
+            extra = origin["extra"]
+            continue
+        layout = origin["layout"]
+        if layout == "test_cases":
+            cases.append(row)
+        elif layout == "grouped":
+            groups.setdefault(origin["group"], []).append(row)
+        elif "prompt" in origin:
+            prompt = dict(origin["prompt"])
+            if origin["examples"]:
+                prompt["examples"] = [row] if origin["index"] is not None else []
+            prompts.append(prompt)
+        else:
+            prompts[-1]["examples"].append(row)
+
+    if layout == "grouped":
+        return groups
+    if layout == "prompts":
+        return {"prompts": prompts, **extra}
+    return {"test_cases": cases, **extra}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert JSON/YAML case files into an indexed JSONL corpus")
+    parser.add_argument("sources", nargs="+", help="Test-case, ground-truth or prompt files")
+    parser.add_argument("--output", "-o", required=True, help="JSONL corpus to write")
+    args = parser.parse_args()
+
+    corpus = convert_to_jsonl(args.sources, args.output)
+    print(f"{len(corpus):,} rows in {len(corpus.categories()):,} categories written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -37,7 +37,14 @@ def load_model_config(model_id):
         if file_name.endswith('.yaml'):
             file_path = os.path.join(model_dir, file_name)
             config = load_config(file_path)
-            if config and 'models' in config and model_id in config['models']:
+            if not config or 'models' not in config:
+                continue
+            # List-style files name each model and take the provider from the file name
+            if isinstance(config['models'], list):
+                for model in config['models']:
+                    if model.get('name') == model_id:
+                        return {'provider': file_name.replace('.yaml', '').lower(), **model}
+            elif model_id in config['models']:
                 return config['models'][model_id]
 
     # If not found, try the main models.yaml file
@@ -67,36 +74,44 @@ def load_model_client(model_id, model_config):
 
         if provider == 'openai':
             from src.clients.openai_client import OpenAIClient
-            return OpenAIClient(api_key=os.environ.get('OPENAI_API_KEY'))
+            client = OpenAIClient(api_key=os.environ.get('OPENAI_API_KEY'))
 
         elif provider == 'anthropic':
             from src.clients.anthropic_client import AnthropicClient
-            return AnthropicClient(api_key=os.environ.get('ANTHROPIC_API_KEY'))
+            client = AnthropicClient(api_key=os.environ.get('ANTHROPIC_API_KEY'))
 
         elif provider == 'google':
             from src.clients.google_client import GoogleClient
-            return GoogleClient(api_key=os.environ.get('GOOGLE_API_KEY'))
+            client = GoogleClient(api_key=os.environ.get('GOOGLE_API_KEY'))
 
         elif provider == 'mistral':
             from src.clients.mistral_client import MistralClient
-            return MistralClient(api_key=os.environ.get('MISTRAL_API_KEY'))
+            client = MistralClient(api_key=os.environ.get('MISTRAL_API_KEY'))
 
         elif provider == 'meta':
             from src.clients.meta_client import MetaClient
-            return MetaClient(api_key=os.environ.get('META_API_KEY'))
+            client = MetaClient(api_key=os.environ.get('META_API_KEY'))
 
         elif provider == 'databricks':
             from src.clients.others import DatabricksClient
-            return DatabricksClient(api_key=os.environ.get('DATABRICKS_API_KEY'))
+            client = DatabricksClient(api_key=os.environ.get('DATABRICKS_API_KEY'))
 
         elif provider == 'cohere':
             from src.clients.others import CohereClient
-            return CohereClient(api_key=os.environ.get('COHERE_API_KEY'))
+            client = CohereClient(api_key=os.environ.get('COHERE_API_KEY'))
+
+        elif provider == 'mock':
+            from src.clients.mock_client import MockClient
+            client = MockClient()
 
         else:
             logger.error(f"Unsupported provider: {provider}")
             return None
 
+        # Rates, limits and defaults from config/models/*.yaml (used by the cost ledger)
+        client.configure({"name": model_id, **model_config})
+        return client
+
     except Exception as e:
         logger.error(f"Error creating client for model {model_id}: {e}")
         return None
\ No newline at end of file
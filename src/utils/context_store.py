@@ -0,0 +1,319 @@
+"""Memory-mapped store of test contexts, fetched lazily by context ID."""
+
+import glob
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from typing import Callable, Dict, List, Any, Optional
+
+from src.utils.fingerprint import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+STORE_FORMAT_VERSION = 2
+
+# Data file header: magic, format version and the build ID the index must match
+_MAGIC = b"CTXSTORE"
+_HEADER = struct.Struct("<8sI16s")
+
+# Stores opened in this process, keyed by path
+_OPEN_STORES: Dict[str, "ContextStore"] = {}
+_OPEN_LOCK = threading.Lock()
+
+
+def default_context_sources(data_dir: str = "data") -> List[str]:
+    """Every contexts.json file under data/contexts."""
+    return sorted(glob.glob(os.path.join(data_dir, "contexts", "*", "contexts.json")))
+
+
+def default_store_path(data_dir: str = "data") -> str:
+    """Store path from CONTEXT_STORE_PATH, or data/contexts/.store/contexts."""
+    return os.environ.get("CONTEXT_STORE_PATH", os.path.join(data_dir, "contexts", ".store", "contexts"))
+
+
+def _store_key(source_paths: List[str]) -> str:
+    """Digest of a source set and the current state of its files."""
+    state = [STORE_FORMAT_VERSION, [[path, file_fingerprint(path)] for path in sorted(set(source_paths))]]
+    return hashlib.blake2b(json.dumps(state).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _replace_atomically(directory: str, target: str, write: Callable[[Any], None]):
+    """Write a file under a unique temporary name, then move it into place."""
+    fd, temporary = tempfile.mkstemp(dir=directory or ".", prefix=f".{os.path.basename(target)}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(temporary, target)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+class ContextStore:
+    """
+    Packed context contents with an offset index keyed by context ID.
+
+    The contents live in `<path>.bin` as concatenated UTF-8 after a header
+    holding a build ID; `<path>.idx.json` maps each ID to (offset, length,
+    digest), records the source files with the IDs they contributed, in
+    order, and must carry the same build ID. Files are only ever replaced,
+    never rewritten, and a store keeps its data file open from the moment it
+    is opened, so a rebuild never changes what an open store reads. The data
+    file is mapped read-only on first access, so worker processes share its
+    pages through the OS page cache and a context costs one slice and decode
+    to fetch.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a store written by `build`.
+
+        Args:
+            path: Store path without the .bin/.idx.json suffix
+
+        Raises:
+            ValueError: If the index has an unsupported format version or does
+                not belong to the data file
+        """
+        self.path = path
+        with open(f"{path}.idx.json", "r") as f:
+            index = json.load(f)
+        if index.get("version") != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported context store version: {index.get('version')}")
+        self.sources: Dict[str, Dict[str, Any]] = index["sources"]
+        self._index: Dict[str, List[Any]] = index["contexts"]
+
+        self._file = open(f"{path}.bin", "rb")
+        magic, version, build_id = _HEADER.unpack(self._file.read(_HEADER.size).ljust(_HEADER.size, b"\0"))
+        if magic != _MAGIC or version != STORE_FORMAT_VERSION or build_id.hex() != index.get("build_id"):
+            self._file.close()
+            raise ValueError(f"Context store index {path}.idx.json does not match its data file")
+        self._map = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, source_paths: List[str], path: str) -> "ContextStore":
+        """
+        Pack context JSON files ({"contexts": [{"id", "content", ...}]}) into a store.
+
+        Later files win when a context ID appears more than once. Both files
+        are written under unique temporary names and moved into place, the
+        index last, so concurrent builds and readers never see partial files.
+
+        Args:
+            source_paths: Context JSON files
+            path: Store path without the .bin/.idx.json suffix
+
+        Returns:
+            The new store
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        contexts, sources = {}, {}
+        build_id = hashlib.blake2b(digest_size=16)
+
+        def write_data(data):
+            data.write(b"\0" * _HEADER.size)
+            offset = 0
+            for source in source_paths:
+                with open(source, "r") as f:
+                    entries = json.load(f)
+                if isinstance(entries, dict):
+                    entries = entries.get("contexts", [])
+                ids = []
+                for entry in entries:
+                    encoded = (entry.get("content") or "").encode("utf-8")
+                    data.write(encoded)
+                    build_id.update(encoded)
+                    metadata = {key: value for key, value in entry.items() if key not in ("id", "content")}
+                    contexts[entry.get("id")] = [offset, len(encoded),
+                                                 hashlib.blake2b(encoded, digest_size=16).hexdigest(), metadata]
+                    offset += len(encoded)
+                    ids.append(entry.get("id"))
+                sources[source] = {"stamp": file_fingerprint(source), "ids": ids}
+            # The ID covers the index as well as the contents
+            build_id.update(json.dumps([sources, contexts], sort_keys=True).encode("utf-8"))
+            data.seek(0)
+            data.write(_HEADER.pack(_MAGIC, STORE_FORMAT_VERSION, build_id.digest()))
+
+        def write_index(f):
+            index = {"version": STORE_FORMAT_VERSION, "build_id": build_id.hexdigest(),
+                     "sources": sources, "contexts": contexts}
+            f.write(json.dumps(index).encode("utf-8"))
+
+        _replace_atomically(directory, f"{path}.bin", write_data)
+        _replace_atomically(directory, f"{path}.idx.json", write_index)
+        return cls(path)
+
+    def _data(self):
+        """The mapped data file, opened on first use."""
+        if self._map is None:
+            with self._lock:
+                if self._map is None:
+                    if self._file is None:
+                        raise ValueError(f"Context store {self.path} is closed")
+                    self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def get_bytes(self, context_id: str) -> memoryview:
+        """
+        UTF-8 content of a context, without copying it out of the mapping.
+
+        Args:
+            context_id: Context ID
+
+        Returns:
+            Read-only view of the content bytes
+
+        Raises:
+            KeyError: If the ID is not in the store
+        """
+        offset, length = self._index[context_id][:2]
+        start = _HEADER.size + offset
+        return memoryview(self._data())[start:start + length]
+
+    def get(self, context_id: str, default: Optional[str] = None) -> Optional[str]:
+        """
+        Content of a context.
+
+        Args:
+            context_id: Context ID
+            default: Value returned for unknown IDs
+
+        Returns:
+            Context text, or `default`
+        """
+        if context_id not in self._index:
+            return default
+        offset, length = self._index[context_id][:2]
+        start = _HEADER.size + offset
+        return self._data()[start:start + length].decode("utf-8")
+
+    def digest(self, context_id: str) -> str:
+        """Content hash of a context (changes whenever its text does)."""
+        return self._index[context_id][2]
+
+    def metadata(self, context_id: str) -> Dict[str, Any]:
+        """Every field of a context entry except its ID and content (e.g. title, metadata)."""
+        return self._index[context_id][3]
+
+    def ids(self, source_path: Optional[str] = None) -> List[str]:
+        """
+        Context IDs, in file order.
+
+        Args:
+            source_path: Source file to list, or None for every context
+
+        Returns:
+            List of context IDs
+        """
+        if source_path is None:
+            return list(self._index)
+        return list(self.sources[source_path]["ids"])
+
+    def __contains__(self, context_id: str) -> bool:
+        return context_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def is_current(self, source_paths: Optional[List[str]] = None) -> bool:
+        """
+        Whether the store was built from exactly these files, none of which has changed.
+
+        Args:
+            source_paths: Expected source files, or None to only check the recorded ones
+
+        Returns:
+            True if the store can be used as is
+        """
+        if source_paths is not None and set(source_paths) != set(self.sources):
+            return False
+        return all(file_fingerprint(path) == source["stamp"] for path, source in self.sources.items())
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+            if self._file is not None:
+                self._file.close()
+            self._map = self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def __reduce__(self):
+        # Worker processes reopen the store and map the same pages
+        return (type(self), (self.path,))
+
+
+def open_context_store(source_paths: Optional[List[str]] = None,
+                       path: Optional[str] = None,
+                       data_dir: str = "data") -> ContextStore:
+    """
+    Get the process-wide store for a set of context files, building it if needed.
+
+    Each source set, in the current state of its files, has its own store at
+    `<path>-<key>`, so changing a source leads to a new store and stores that
+    are already open keep serving what they were opened with.
+
+    Args:
+        source_paths: Context JSON files the store must be built from, or None
+            for every data/contexts/*/contexts.json
+        path: Store path prefix, or None for `default_store_path`
+        data_dir: Root of the data files
+
+    Returns:
+        ContextStore instance
+    """
+    sources = sorted(set(source_paths)) if source_paths is not None else default_context_sources(data_dir)
+    path = f"{path or default_store_path(data_dir)}-{_store_key(sources)}"
+
+    with _OPEN_LOCK:
+        store = _OPEN_STORES.get(path)
+        if store is not None and store.is_current(sources):
+            return store
+        store = None
+        if os.path.exists(f"{path}.idx.json"):
+            try:
+                store = ContextStore(path)
+            except (OSError, ValueError, KeyError, json.JSONDecodeError):
+                store = None
+        if store is None or not store.is_current(sources):
+            logger.info(f"Building context store {path} from {len(sources)} files")
+            store = ContextStore.build(sources, path)
+            # Forget older builds of this store without closing them; their holders keep using them
+            prefix = path.rsplit("-", 1)[0]
+            for stale in [key for key in _OPEN_STORES if key.rsplit("-", 1)[0] == prefix]:
+                del _OPEN_STORES[stale]
+        _OPEN_STORES[path] = store
+        return store
+
+
+def resolve_context(unit: Dict[str, Any], store: Optional[ContextStore] = None) -> str:
+    """
+    Context text of a work unit: inline `context`, or `context_id` looked up in the store.
+
+    Args:
+        unit: Work unit or request dictionary
+        store: Context store, or None for the default one
+
+    Returns:
+        Context text ("" if the unit has none)
+    """
+    if unit.get("context") is not None:
+        return unit["context"]
+    if not unit.get("context_id"):
+        return ""
+    return (store or open_context_store()).get(unit["context_id"], "")
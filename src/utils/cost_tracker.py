@@ -1,6 +1,78 @@
 """Cost tracking utilities."""
 
-from typing import Dict, Any
+import asyncio
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Union
+
+import numpy as np
+
+from .config import load_config
+from .tokenizers import count_tokens_batch
+
+# Rates for models without a `cost:` block in config/models/*.yaml
+DEFAULT_COST_RATES = {"input_per_1k": 5.0, "output_per_1k": 15.0}
+
+_COST_RATES: Optional[Dict[str, Dict[str, float]]] = None
+
+
+def load_model_cost_rates(model_dir: str = os.path.join("config", "models")) -> Dict[str, Dict[str, float]]:
+    """
+    Load the `cost:` block of every model in the model configuration files.
+
+    Each model is indexed by its name, its name with hyphens (e.g. "gpt-4o" for
+    gpt_4o) and its API version string, all lower-cased.
+
+    Args:
+        model_dir: Directory with the provider YAML files
+
+    Returns:
+        Dictionary mapping model names to cost rates (input_per_1k, output_per_1k)
+    """
+    rates = {}
+    if not os.path.isdir(model_dir):
+        return rates
+
+    for file_name in sorted(os.listdir(model_dir)):
+        if not file_name.endswith(".yaml"):
+            continue
+        models = (load_config(os.path.join(model_dir, file_name)) or {}).get("models") or []
+        if isinstance(models, dict):
+            models = [{"name": model_id, **model} for model_id, model in models.items()]
+        for model in models:
+            if not model.get("cost") or not model.get("name"):
+                continue
+            for key in (model["name"], model["name"].replace("_", "-"), model.get("version")):
+                if key:
+                    rates[str(key).lower()] = model["cost"]
+    return rates
+
+
+def get_cost_rates(model_name: str) -> Dict[str, float]:
+    """
+    Get the cost rates of a model from its configuration.
+
+    Args:
+        model_name: Model name, configuration name or API version
+
+    Returns:
+        Dictionary with input_per_1k and output_per_1k
+    """
+    global _COST_RATES
+    if _COST_RATES is None:
+        _COST_RATES = load_model_cost_rates()
+
+    name = (model_name or "").lower()
+    for key in (name, name.replace("_", "-")):
+        if key in _COST_RATES:
+            return _COST_RATES[key]
+
+    # Dated or suffixed variants of a configured model (e.g. "gpt-4o-mini-2024-07-18")
+    prefixes = [key for key in _COST_RATES if name.replace("_", "-").startswith(key)]
+    if prefixes:
+        return _COST_RATES[max(prefixes, key=len)]
+    return DEFAULT_COST_RATES
 
 def calculate_cost(usage: Dict[str, int], cost_config: Dict[str, float]) -> float:
     """
@@ -36,25 +108,252 @@ def estimate_cost(input_tokens: int, output_tokens: int, model_name: str) -> flo
     Returns:
         Estimated cost in USD
     """
-    # Define cost rates for different models
-    cost_rates = {
-        "gpt-4o": {"input_per_1k": 5.0, "output_per_1k": 15.0},
-        "gpt-4-turbo": {"input_per_1k": 10.0, "output_per_1k": 30.0},
-        "gpt-4-1106-preview": {"input_per_1k": 10.0, "output_per_1k": 30.0},
-        "gpt-4.5-preview": {"input_per_1k": 10.0, "output_per_1k": 30.0},
-        "claude-3-opus": {"input_per_1k": 15.0, "output_per_1k": 75.0},
-        "claude-3-5-sonnet": {"input_per_1k": 3.0, "output_per_1k": 15.0},
-        "claude-3-5-haiku": {"input_per_1k": 0.25, "output_per_1k": 1.25},
-        "claude-3-7-sonnet": {"input_per_1k": 5.0, "output_per_1k": 25.0},
-        "gemini-1.5-pro": {"input_per_1k": 3.5, "output_per_1k": 10.0},
-        "gemini-1.5-flash": {"input_per_1k": 0.35, "output_per_1k": 1.05},
-        "mistral-small": {"input_per_1k": 0.2, "output_per_1k": 0.6},
-        "mistral-medium": {"input_per_1k": 2.7, "output_per_1k": 8.1},
-        "mistral-large": {"input_per_1k": 8.0, "output_per_1k": 24.0},
-        "default": {"input_per_1k": 5.0, "output_per_1k": 15.0}
-    }
-
-    # Get cost rates for the specified model
-    model_cost = cost_rates.get(model_name.lower(), cost_rates["default"])
-
-    return calculate_cost({"prompt_tokens": input_tokens, "completion_tokens": output_tokens}, model_cost)
\ No newline at end of file
+    model_cost = get_cost_rates(model_name)
+
+    return calculate_cost({"prompt_tokens": input_tokens, "completion_tokens": output_tokens}, model_cost)
+
+def estimate_cost_batch(prompts: List[str],
+                        output_tokens: Union[int, np.ndarray],
+                        model_name: str) -> np.ndarray:
+    """
+    Estimate the cost of many requests from their prompt texts.
+
+    Args:
+        prompts: Prompt texts, one per request
+        output_tokens: Expected output tokens, per request or shared
+        model_name: Name of the model
+
+    Returns:
+        Array of estimated costs in USD, one per prompt
+    """
+    model_cost = get_cost_rates(model_name)
+    input_tokens = count_tokens_batch(prompts, model_name)
+
+    return (input_tokens / 1000 * model_cost["input_per_1k"]
+            + np.asarray(output_tokens) / 1000 * model_cost["output_per_1k"])
+
+
+class BudgetExceededError(Exception):
+    """Raised when a call would take spend past a run, model or provider budget."""
+
+    def __init__(self, scope: str, name: str, budget: float, spent: float, requested: float):
+        self.scope = scope
+        self.name = name
+        self.budget = budget
+        self.spent = spent
+        self.requested = requested
+        super().__init__(
+            f"{scope} budget for {name} would be exceeded: "
+            f"${spent:.4f} spent + ${requested:.4f} requested > ${budget:.4f}"
+        )
+
+
+class CostLedger:
+    """
+    Thread- and async-safe record of spend, enforcing run, model and provider budgets.
+
+    Every call reserves its estimated cost before it is sent and settles the
+    actual cost afterwards. A call that would exceed a budget only once
+    in-flight reservations are counted waits for them to settle (throttling);
+    one that would exceed it on settled spend alone raises BudgetExceededError.
+    """
+
+    def __init__(self,
+                 run_budget: Optional[float] = None,
+                 model_budgets: Optional[Dict[str, float]] = None,
+                 provider_budgets: Optional[Dict[str, float]] = None,
+                 poll_interval: float = 0.05):
+        """
+        Initialize the ledger.
+
+        Args:
+            run_budget: Maximum USD for the whole run, or None for no limit
+            model_budgets: Maximum USD per model name
+            provider_budgets: Maximum USD per provider
+            poll_interval: Seconds between budget checks while an async call is throttled
+        """
+        self.run_budget = run_budget
+        self.model_budgets = dict(model_budgets or {})
+        self.provider_budgets = dict(provider_budgets or {})
+        self.poll_interval = poll_interval
+
+        self._condition = threading.Condition()
+        self._spent = {"run": 0.0, "model": defaultdict(float), "provider": defaultdict(float)}
+        self._reserved = {"run": 0.0, "model": defaultdict(float), "provider": defaultdict(float)}
+        self._calls = defaultdict(int)
+        self._reservations: Dict[int, tuple] = {}
+        self._next_reservation = 0
+        self.stopped: Optional[str] = None
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "CostLedger":
+        """
+        Create a ledger from a `budgets` settings block.
+
+        Args:
+            config: Dictionary with optional run, models and providers budgets
+
+        Returns:
+            CostLedger instance (without limits if config is empty)
+        """
+        config = config or {}
+        return cls(
+            run_budget=config.get("run"),
+            model_budgets=config.get("models"),
+            provider_budgets=config.get("providers")
+        )
+
+    def _budgets(self, model_name: str, provider: str):
+        """(scope, name, budget, spent, reserved) for every budget that applies to a call."""
+        checks = []
+        if self.run_budget is not None:
+            checks.append(("run", "run", self.run_budget, self._spent["run"], self._reserved["run"]))
+        if model_name in self.model_budgets:
+            checks.append(("model", model_name, self.model_budgets[model_name],
+                           self._spent["model"][model_name], self._reserved["model"][model_name]))
+        if provider in self.provider_budgets:
+            checks.append(("provider", provider, self.provider_budgets[provider],
+                           self._spent["provider"][provider], self._reserved["provider"][provider]))
+        return checks
+
+    def _try_reserve(self, model_name: str, provider: str, estimated_cost: float) -> Optional[int]:
+        """Reserve under the lock; returns a reservation ID, or None if the call must wait."""
+        for scope, name, budget, spent, reserved in self._budgets(model_name, provider):
+            if spent + estimated_cost > budget:
+                self.stopped = self.stopped or f"{scope} budget exceeded for {name}"
+                raise BudgetExceededError(scope, name, budget, spent, estimated_cost)
+            if spent + reserved + estimated_cost > budget:
+                return None
+
+        self._next_reservation += 1
+        self._reservations[self._next_reservation] = (model_name, provider, estimated_cost)
+        self._reserved["run"] += estimated_cost
+        self._reserved["model"][model_name] += estimated_cost
+        self._reserved["provider"][provider] += estimated_cost
+        return self._next_reservation
+
+    def reserve(self, model_name: str, provider: str, estimated_cost: float) -> int:
+        """
+        Reserve the estimated cost of a call, blocking while it is throttled.
+
+        Args:
+            model_name: Model the call is sent to
+            provider: Provider of the model
+            estimated_cost: Upper estimate of the call's cost in USD
+
+        Returns:
+            Reservation ID to pass to `settle` or `release`
+
+        Raises:
+            BudgetExceededError: If the call would exceed a budget on settled spend alone
+        """
+        with self._condition:
+            while True:
+                reservation = self._try_reserve(model_name, provider, estimated_cost)
+                if reservation is not None:
+                    return reservation
+                self._condition.wait()
+
+    async def reserve_async(self, model_name: str, provider: str, estimated_cost: float) -> int:
+        """Async version of `reserve` that yields to the event loop while throttled."""
+        while True:
+            with self._condition:
+                reservation = self._try_reserve(model_name, provider, estimated_cost)
+            if reservation is not None:
+                return reservation
+            await asyncio.sleep(self.poll_interval)
+
+    def _unreserve(self, reservation: int):
+        model_name, provider, estimated_cost = self._reservations.pop(reservation)
+        self._reserved["run"] -= estimated_cost
+        self._reserved["model"][model_name] -= estimated_cost
+        self._reserved["provider"][provider] -= estimated_cost
+        return model_name, provider
+
+    def settle(self, reservation: int, cost: float):
+        """
+        Replace a reservation with the actual cost of the call.
+
+        Args:
+            reservation: ID returned by `reserve`
+            cost: Actual cost in USD
+        """
+        with self._condition:
+            model_name, provider = self._unreserve(reservation)
+            self._record(model_name, provider, cost)
+            self._condition.notify_all()
+
+    def release(self, reservation: int):
+        """Drop a reservation for a call that failed before incurring cost."""
+        with self._condition:
+            self._unreserve(reservation)
+            self._condition.notify_all()
+
+    def charge(self, model_name: str, provider: str, cost: float):
+        """
+        Record the cost of a call that was not reserved in advance.
+
+        Args:
+            model_name: Model the call was sent to
+            provider: Provider of the model
+            cost: Cost in USD
+        """
+        with self._condition:
+            self._record(model_name, provider, cost)
+            self._condition.notify_all()
+
+    def _record(self, model_name: str, provider: str, cost: float):
+        self._spent["run"] += cost
+        self._spent["model"][model_name] += cost
+        self._spent["provider"][provider] += cost
+        self._calls[model_name] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get spend so far, per model and per provider, with remaining budgets.
+
+        Returns:
+            Dictionary suitable for a (partial) cost report
+        """
+        with self._condition:
+            budgets = {}
+            if self.run_budget is not None:
+                budgets["run"] = {"budget": self.run_budget, "remaining": self.run_budget - self._spent["run"]}
+            for scope, limits in (("model", self.model_budgets), ("provider", self.provider_budgets)):
+                for name, budget in limits.items():
+                    budgets[f"{scope}:{name}"] = {"budget": budget, "remaining": budget - self._spent[scope][name]}
+
+            return {
+                "total_cost": self._spent["run"],
+                "by_model": {name: {"cost": cost, "calls": self._calls[name]}
+                             for name, cost in self._spent["model"].items()},
+                "by_provider": dict(self._spent["provider"]),
+                "in_flight": len(self._reservations),
+                "budgets": budgets,
+                "stopped": self.stopped
+            }
+
+
+# Shared ledger charged by every client call
+_COST_LEDGER = CostLedger()
+
+
+def get_cost_ledger() -> CostLedger:
+    """
+    Get the shared cost ledger.
+
+    Returns:
+        CostLedger charged by BaseClient calls
+    """
+    return _COST_LEDGER
+
+
+def set_cost_ledger(ledger: CostLedger):
+    """
+    Replace the shared cost ledger (e.g. with one that has the run's budgets).
+
+    Args:
+        ledger: Ledger to charge from now on
+    """
+    global _COST_LEDGER
+    _COST_LEDGER = ledger
@@ -0,0 +1,21 @@
+"""Cheap change detection for source files."""
+
+import os
+from typing import List, Optional
+
+
+def file_fingerprint(path: str) -> Optional[List[int]]:
+    """
+    Size and modification time of a file, used to tell whether it changed.
+
+    Args:
+        path: File path
+
+    Returns:
+        [size, mtime in nanoseconds], or None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
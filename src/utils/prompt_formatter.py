@@ -1,11 +1,128 @@
 """Prompt formatting utilities."""
 
-from typing import Dict, Any, Optional
+import os
+import re
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, List, Any, Optional, Tuple
+
+# {{variable}} placeholders; the name is captured so re.split keeps it
+_PLACEHOLDER_RE = re.compile(r"\{\{([^{}]+)\}\}")
+
+class MissingVariableError(KeyError):
+    """Raised when a template is rendered without a value for one of its placeholders."""
+
+    def __init__(self, missing: List[str], index: Optional[int] = None):
+        self.missing = missing
+        self.index = index
+        where = f" in variables #{index}" if index is not None else ""
+        super().__init__(f"No value for {', '.join(missing)}{where}")
+
+class PromptTemplate:
+    """
+    Prompt template parsed once into literal and placeholder segments.
+
+    Rendering looks up all values in one call and joins them with the
+    literals in a single pass, instead of one full-string replace per variable.
+    """
+
+    def __init__(self, template: str):
+        """
+        Parse a template.
+
+        Args:
+            template: Prompt template with {{variable}} placeholders
+        """
+        self.template = template
+        # Literals sit at even positions and placeholder names at odd ones
+        self._pieces = _PLACEHOLDER_RE.split(template)
+        self._literals = self._pieces[0::2]
+        self._names = self._pieces[1::2]
+        self.fields: Tuple[str, ...] = tuple(dict.fromkeys(self._names))
+        if len(self._names) > 1:
+            self._values = itemgetter(*self._names)
+        else:
+            self._values = lambda variables: tuple(variables[name] for name in self._names)
+
+    def missing(self, variables: Dict[str, Any]) -> List[str]:
+        """Placeholders that `variables` has no value for."""
+        return [name for name in self.fields if name not in variables]
+
+    def _join(self, values) -> str:
+        parts = self._pieces.copy()
+        parts[1::2] = map(str, values)
+        return "".join(parts)
+
+    def render(self, variables: Dict[str, Any], strict: bool = True) -> str:
+        """
+        Render the template.
+
+        Args:
+            variables: Dictionary of variable names and values
+            strict: Raise on missing variables; otherwise leave their placeholders as is
+
+        Returns:
+            Rendered prompt
+
+        Raises:
+            MissingVariableError: If `strict` and a placeholder has no value
+        """
+        try:
+            return self._join(self._values(variables))
+        except KeyError:
+            if strict:
+                raise MissingVariableError(self.missing(variables)) from None
+        return self._join(variables[name] if name in variables else "{{" + name + "}}" for name in self._names)
+
+    def render_many(self, variables_list: List[Dict[str, Any]], strict: bool = True) -> List[str]:
+        """
+        Render the template once per variables dictionary (e.g. a prompt's examples).
+
+        In strict mode the first dictionary missing a value raises before any result is returned.
+
+        Args:
+            variables_list: Variables for each render
+            strict: Raise on missing variables; otherwise leave their placeholders as is
+
+        Returns:
+            Rendered prompts in the same order
+
+        Raises:
+            MissingVariableError: If `strict` and any dictionary lacks a placeholder's value
+        """
+        pieces, values = self._pieces, self._values
+        rendered = []
+        try:
+            for variables in variables_list:
+                parts = pieces.copy()
+                parts[1::2] = map(str, values(variables))
+                rendered.append("".join(parts))
+            return rendered
+        except KeyError:
+            if strict:
+                index = len(rendered)
+                raise MissingVariableError(self.missing(variables_list[index]), index) from None
+        return rendered + [self.render(variables, strict=False) for variables in variables_list[len(rendered):]]
+
+@lru_cache(maxsize=1024)
+def compile_template(template: str) -> PromptTemplate:
+    """
+    Get the compiled form of a template, parsing each distinct template only once.
+
+    Args:
+        template: Prompt template with {{variable}} placeholders
+
+    Returns:
+        PromptTemplate instance
+    """
+    return PromptTemplate(template)
 
 def format_prompt(template: str, variables: Dict[str, Any]) -> str:
     """
     Format a prompt template with variables.
 
+    Placeholders without a value are left in place.
+
     Args:
         template: Prompt template with {{variable}} placeholders
         variables: Dictionary of variable names and values
@@ -13,13 +130,7 @@ def format_prompt(template: str, variables: Dict[str, Any]) -> str:
     Returns:
         Formatted prompt
     """
-    formatted = template
-
-    for var_name, var_value in variables.items():
-        placeholder = f"{{{{{var_name}}}}}"
-        formatted = formatted.replace(placeholder, str(var_value))
-
-    return formatted
+    return compile_template(template).render(variables, strict=False)
 
 def create_system_prompt(base_prompt: Optional[str] = None,
                        instructions: Optional[Dict[str, Any]] = None) -> str:
@@ -45,4 +156,40 @@ def create_system_prompt(base_prompt: Optional[str] = None,
     for key, value in instructions.items():
         formatted += f"{key.replace('_', ' ').title()}: {value}\n"
 
-    return formatted
\ No newline at end of file
+    return formatted
+
+def layout_prompt(stable_parts: List[str], variable_parts: List[str], separator: str = "\n\n") -> Tuple[str, str]:
+    """
+    Lay out a prompt with its stable parts first so providers can cache them.
+
+    Args:
+        stable_parts: Parts shared by many requests (e.g. a long context), in order
+        variable_parts: Parts that change per request (e.g. the question)
+        separator: Text placed between parts
+
+    Returns:
+        Tuple of (full prompt, cacheable prefix); the prefix is empty when there are no stable parts
+    """
+    stable = [part for part in stable_parts if part]
+    variable = [part for part in variable_parts if part]
+    if not stable:
+        return separator.join(variable), ""
+
+    prefix = separator.join(stable) + (separator if variable else "")
+    return prefix + separator.join(variable), prefix
+
+def shared_prefix(prompts: List[str]) -> str:
+    """
+    Longest common prefix of several prompts, cut back to a line break.
+
+    Args:
+        prompts: Prompts built from the same sections (e.g. one judge prompt per metric)
+
+    Returns:
+        Cacheable prefix shared by every prompt, or "" for fewer than two prompts
+    """
+    if len(prompts) < 2:
+        return ""
+    prefix = os.path.commonprefix(prompts)
+    cut = prefix.rfind("\n")
+    return prefix[:cut + 1] if cut >= 0 else ""
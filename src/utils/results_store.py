@@ -0,0 +1,366 @@
+"""SQLite store of test results, shared by the executor and every reporter."""
+
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Any, Optional
+
+import yaml
+
+from src.utils.fingerprint import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+try:
+    _YAML_LOADER = yaml.CSafeLoader
+except AttributeError:
+    _YAML_LOADER = yaml.SafeLoader
+
+# Stores opened in this process, keyed by database path
+_OPEN_STORES: Dict[str, "ResultsStore"] = {}
+_OPEN_LOCK = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    label TEXT,
+    source TEXT,
+    stamp TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    suite TEXT,
+    case_id TEXT,
+    unit_id TEXT,
+    score REAL,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    cost REAL,
+    latency REAL,
+    error TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    suite TEXT,
+    metric TEXT NOT NULL,
+    value REAL,
+    result_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS documents (
+    run_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (run_id, model)
+);
+CREATE INDEX IF NOT EXISTS results_model ON results (model);
+CREATE INDEX IF NOT EXISTS results_suite ON results (suite);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+CREATE INDEX IF NOT EXISTS metrics_model ON metrics (model);
+CREATE INDEX IF NOT EXISTS metrics_suite ON metrics (suite);
+CREATE INDEX IF NOT EXISTS metrics_metric ON metrics (metric);
+CREATE INDEX IF NOT EXISTS metrics_run ON metrics (run_id);
+CREATE INDEX IF NOT EXISTS runs_source ON runs (source);
+"""
+
+
+def _stamp(path: str) -> str:
+    return ":".join(str(part) for part in file_fingerprint(path))
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+class ResultsStore:
+    """
+    Results of every run in one SQLite database.
+
+    The executor appends one row per result as it goes; `finish_run` then
+    writes a per-model summary document in the results/yaml layout
+    (`model`, `aggregate_metrics`, `results_by_category`). Per-model YAML
+    files are imported once and re-read only when they change, so reporters
+    get every model's latest document from a single query instead of
+    parsing the YAML files in each method. Metrics are also stored as rows
+    indexed by model, suite, metric and run, for reporters that need one
+    metric across models.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) a results database.
+
+        Args:
+            path: SQLite file path, or ":memory:"
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and path != ":memory:":
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def start_run(self, label: Optional[str] = None, run_id: Optional[str] = None) -> str:
+        """
+        Register a new run.
+
+        Args:
+            label: Free-form description (e.g. the plan digest)
+            run_id: Run ID, or None to generate one
+
+        Returns:
+            The run ID
+        """
+        run_id = run_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO runs (run_id, created_at, label) VALUES (?, ?, ?)",
+                               (run_id, time.time(), label))
+        return run_id
+
+    def add_result(self,
+                   run_id: str,
+                   model: str,
+                   result: Dict[str, Any],
+                   unit: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Append one result.
+
+        Args:
+            run_id: Run from `start_run`
+            model: Model ID
+            result: Result dictionary (response, usage, timing, cost, metrics, overall_score, error, ...)
+            unit: Work unit the result answers, for its suite, case and ID
+
+        Returns:
+            Row ID of the result
+        """
+        unit = unit or {}
+        # A reused response was paid for by the unit it came from
+        usage = result.get("usage") or {} if not result.get("reused_from") else {}
+        timing = result.get("timing") or {}
+        suite = unit.get("suite") or result.get("suite") or result.get("test_category")
+        metrics = result.get("metrics")
+        scores = {metric: _number(value) for metric, value in metrics.items()} if isinstance(metrics, dict) else {}
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO results (run_id, model, suite, case_id, unit_id, score, input_tokens, output_tokens, "
+                "cost, latency, error, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, model, suite, unit.get("case") or result.get("case") or result.get("context_length"),
+                 unit.get("id") or result.get("unit_id"), _number(result.get("overall_score")),
+                 usage.get("prompt_tokens"), usage.get("completion_tokens"), _number(result.get("cost")),
+                 timing.get("total_time"), result.get("error"), json.dumps(result, default=str))
+            )
+            self._conn.executemany(
+                "INSERT INTO metrics (run_id, model, suite, metric, value, result_id) VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, model, suite, metric, value, cursor.lastrowid)
+                 for metric, value in scores.items() if value is not None]
+            )
+        return cursor.lastrowid
+
+    def finish_run(self, run_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarize a run's results into one document per model.
+
+        Args:
+            run_id: Run from `start_run`
+
+        Returns:
+            Documents keyed by model
+        """
+        aggregate = ("COUNT(*), COALESCE(SUM(input_tokens), 0) + COALESCE(SUM(output_tokens), 0), "
+                     "COALESCE(SUM(cost), 0), AVG(latency), AVG(score), SUM(error IS NOT NULL)")
+        with self._lock:
+            totals = self._conn.execute(
+                f"SELECT model, NULL, {aggregate} FROM results WHERE run_id = ? GROUP BY model", (run_id,)
+            ).fetchall()
+            by_suite = self._conn.execute(
+                f"SELECT model, suite, {aggregate} FROM results WHERE run_id = ? AND suite IS NOT NULL "
+                f"GROUP BY model, suite", (run_id,)
+            ).fetchall()
+            scores = self._conn.execute(
+                "SELECT model, suite, metric, AVG(value) FROM metrics WHERE run_id = ? AND result_id IS NOT NULL "
+                "GROUP BY model, suite, metric", (run_id,)
+            ).fetchall()
+
+        def summary(count, tokens, cost, latency, score, errors):
+            values = {"test_count": count, "error_count": errors, "total_tokens": tokens, "total_cost_usd": cost,
+                      "average_tokens_per_request": tokens / count, "average_cost_per_request": cost / count}
+            if latency is not None:
+                values["average_processing_time_seconds"] = latency
+            if score is not None:
+                values["overall_score"] = score
+            return values
+
+        documents = {model: {"model": model, "run_id": run_id, "aggregate_metrics": summary(*row),
+                             "results_by_category": {}} for model, _, *row in totals}
+        for model, suite, *row in by_suite:
+            documents[model]["results_by_category"][suite] = summary(*row)
+        per_metric: Dict[tuple, List[float]] = {}
+        for model, suite, metric, value in scores:
+            if suite is not None:
+                documents[model]["results_by_category"].setdefault(suite, {})[metric] = value
+            per_metric.setdefault((model, metric), []).append(value)
+        for (model, metric), values in per_metric.items():
+            documents[model]["aggregate_metrics"][metric] = sum(values) / len(values)
+
+        with self._lock, self._conn:
+            self._write_documents(run_id, documents)
+        return documents
+
+    def _write_documents(self, run_id: str, documents: Dict[str, Dict[str, Any]]):
+        """Store summary documents and their numeric metrics (caller holds the lock and transaction)."""
+        self._conn.execute("DELETE FROM documents WHERE run_id = ?", (run_id,))
+        self._conn.execute("DELETE FROM metrics WHERE run_id = ? AND result_id IS NULL", (run_id,))
+        rows = []
+        for model, document in documents.items():
+            for metric, value in (document.get("aggregate_metrics") or {}).items():
+                rows.append((run_id, model, None, metric, _number(value)))
+            for suite, values in (document.get("results_by_category") or {}).items():
+                for metric, value in (values or {}).items():
+                    rows.append((run_id, model, suite, metric, _number(value)))
+        self._conn.executemany("INSERT INTO documents (run_id, model, data) VALUES (?, ?, ?)",
+                               [(run_id, model, json.dumps(document, default=str))
+                                for model, document in documents.items()])
+        self._conn.executemany("INSERT INTO metrics (run_id, model, suite, metric, value) VALUES (?, ?, ?, ?, ?)",
+                               [row for row in rows if row[4] is not None])
+
+    def sync_yaml_dir(self, yaml_dir: str) -> int:
+        """
+        Import per-model result YAML files, re-reading only new and changed ones.
+
+        Each file becomes a run of its own; runs of deleted files are dropped.
+
+        Args:
+            yaml_dir: Directory of per-model YAML files (results/yaml)
+
+        Returns:
+            Number of files (re)imported
+        """
+        yaml_dir = os.path.normpath(yaml_dir)
+        paths = sorted(glob.glob(os.path.join(yaml_dir, "*.yaml")))
+        with self._lock:
+            known = {source: stamp for source, stamp in self._conn.execute(
+                "SELECT source, stamp FROM runs WHERE source IS NOT NULL"
+            ).fetchall() if os.path.dirname(source) == os.path.normpath(yaml_dir)}
+        changed = [path for path in paths if known.get(path) != _stamp(path)]
+        removed = set(known) - set(paths)
+
+        imported = []
+        for path in changed:
+            try:
+                with open(path, "r") as f:
+                    data = yaml.load(f, Loader=_YAML_LOADER)
+            except (OSError, yaml.YAMLError) as e:
+                logger.error(f"Error loading {path}: {e}")
+                continue
+            if isinstance(data, dict):
+                imported.append((path, data))
+
+        with self._lock, self._conn:
+            for path in removed | {path for path, _ in imported}:
+                run_id = f"yaml:{path}"
+                for table in ("documents", "metrics", "runs"):
+                    self._conn.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+            for path, data in imported:
+                run_id = f"yaml:{path}"
+                model = data.get("model", os.path.basename(path).replace(".yaml", ""))
+                self._conn.execute("INSERT INTO runs (run_id, created_at, label, source, stamp) VALUES (?, ?, ?, ?, ?)",
+                                   (run_id, os.stat(path).st_mtime, os.path.basename(path), path, _stamp(path)))
+                self._write_documents(run_id, {model: data})
+        return len(imported)
+
+    def model_documents(self, models: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Summary document of every model, merged over all of its runs.
+
+        Runs are applied oldest first and the latest value wins per aggregate
+        metric and per category metric, so a run that covers only some suites
+        or scores nothing (e.g. generation only) does not hide metrics from
+        earlier runs.
+
+        Args:
+            models: Models to return, or None for all
+
+        Returns:
+            Documents ({"model", "aggregate_metrics", "results_by_category", ...}) keyed by model
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT documents.model, documents.data FROM documents JOIN runs USING (run_id) "
+                "ORDER BY runs.created_at, runs.run_id"
+            ).fetchall()
+        documents: Dict[str, Dict[str, Any]] = {}
+        for model, data in rows:
+            if models is not None and model not in models:
+                continue
+            merged = documents.setdefault(model, {})
+            for key, value in json.loads(data).items():
+                if key == "aggregate_metrics" and isinstance(value, dict):
+                    merged.setdefault(key, {}).update(value)
+                elif key == "results_by_category" and isinstance(value, dict):
+                    categories = merged.setdefault(key, {})
+                    for category, values in value.items():
+                        if isinstance(values, dict) and isinstance(categories.get(category), dict):
+                            categories[category].update(values)
+                        else:
+                            categories[category] = values
+                else:
+                    merged[key] = value
+        return documents
+
+    def metric_values(self, metric: str, suite: Optional[str] = None) -> Dict[str, float]:
+        """
+        A summary metric of every model, from the latest run that has it.
+
+        Args:
+            metric: Metric name
+            suite: Suite or category, or None for the aggregate value
+
+        Returns:
+            Values keyed by model
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT metrics.model, metrics.value FROM metrics JOIN runs USING (run_id) "
+                "WHERE metrics.metric = ? AND metrics.suite IS ? AND metrics.result_id IS NULL "
+                "ORDER BY runs.created_at, runs.run_id", (metric, suite)
+            ).fetchall()
+        return dict(rows)
+
+
+def open_results_store(results_dir: str = "results", path: Optional[str] = None) -> ResultsStore:
+    """
+    Get the process-wide store of a results directory, with its YAML files imported.
+
+    Args:
+        results_dir: Results directory; per-model YAML files are read from its yaml/ folder
+        path: Database path, or None for RESULTS_DB_PATH or <results_dir>/results.db
+
+    Returns:
+        ResultsStore instance
+    """
+    path = path or os.environ.get("RESULTS_DB_PATH") or os.path.join(results_dir, "results.db")
+    with _OPEN_LOCK:
+        store = _OPEN_STORES.get(path)
+        if store is None:
+            store = _OPEN_STORES[path] = ResultsStore(path)
+    store.sync_yaml_dir(os.path.join(results_dir, "yaml"))
+    return store
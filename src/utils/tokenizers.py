@@ -1,10 +1,306 @@
 """Token counting utilities."""
 
+import atexit
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
 import tiktoken
-from typing import Dict, Optional, Any
 
-# Cache tokenizers for efficiency
+from .config import load_config
+
+logger = logging.getLogger(__name__)
+
+# Cache tokenizers for efficiency (None marks a model without an exact encoding)
 _TOKENIZERS = {}
+_ENCODINGS: Dict[str, Any] = {}
+_ENCODING_LOCK = threading.Lock()
+_SETTINGS: Optional[Dict[str, Any]] = None
+
+# Everything but the ranks for encodings that can be loaded from a vendored BPE file
+_ENCODING_SPECS = {
+    "cl100k_base": {
+        "pat_str": r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+| ?[^\s\p{L}\p{N}]++[\r\n]*+|\s++$|\s*[\r\n]|\s+(?!\S)|\s""",
+        "special_tokens": {
+            "<|endoftext|>": 100257,
+            "<|fim_prefix|>": 100258,
+            "<|fim_middle|>": 100259,
+            "<|fim_suffix|>": 100260,
+            "<|endofprompt|>": 100276,
+        },
+    },
+    "o200k_base": {
+        "pat_str": "|".join([
+            r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+            r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+            r"""\p{N}{1,3}""",
+            r""" ?[^\s\p{L}\p{N}]+[\r\n/]*""",
+            r"""\s*[\r\n]+""",
+            r"""\s+(?!\S)""",
+            r"""\s+""",
+        ]),
+        "special_tokens": {"<|endoftext|>": 199999, "<|endofprompt|>": 200018},
+    },
+}
+
+# Substring of a lower-cased model name -> provider family for chars-per-token ratios
+_FAMILY_PATTERNS = (
+    ("gpt", "openai"), ("o1", "openai"), ("o3", "openai"),
+    ("claude", "anthropic"),
+    ("gemini", "google"), ("gemma", "google"),
+    ("llama", "meta"),
+    ("mistral", "mistral"), ("mixtral", "mistral"), ("codestral", "mistral"),
+    ("command", "cohere"), ("cohere", "cohere"),
+)
+
+
+class TokenCountCache:
+    """
+    Bounded LRU memo of token counts keyed by (encoding, text digest).
+
+    Only a 16-byte digest of each text is stored, never the text itself, so
+    memory stays bounded by `max_entries` no matter how long the texts are.
+    """
+
+    def __init__(self, max_entries: int = 50000, min_chars: int = 256, path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum cached counts before least recently used ones are evicted
+            min_chars: Shorter texts are not cached (encoding them is as cheap as hashing)
+            path: JSON file to load counts from and save them to, or None for memory only
+        """
+        self.max_entries = max_entries
+        self.min_chars = min_chars
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._counts: "OrderedDict[Tuple[str, bytes], int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @staticmethod
+    def key(encoding_name: str, text: str) -> Tuple[str, bytes]:
+        """Cache key of a text for an encoding."""
+        return encoding_name, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[int]:
+        """Look up a count, marking it as recently used."""
+        with self._lock:
+            count = self._counts.get(key)
+            if count is None:
+                self.misses += 1
+                return None
+            self._counts.move_to_end(key)
+            self.hits += 1
+            return count
+
+    def put(self, key: Tuple[str, bytes], count: int):
+        """Store a count, evicting the least recently used entries beyond max_entries."""
+        with self._lock:
+            self._counts[key] = count
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with entries, hits, misses and hit_rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._counts),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def clear(self):
+        """Drop all cached counts and reset statistics."""
+        with self._lock:
+            self._counts.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def load(self, path: str):
+        """Load counts saved by `save`; unreadable files are ignored."""
+        try:
+            with open(path, "r") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        for encoding_name, digest, count in entries[-self.max_entries:]:
+            self.put((encoding_name, bytes.fromhex(digest)), count)
+
+    def save(self, path: Optional[str] = None):
+        """Save counts in LRU order (most recent last) to a JSON file."""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            entries = [[encoding_name, digest.hex(), count] for (encoding_name, digest), count in self._counts.items()]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+
+
+# Shared token count memo; TOKEN_CACHE_PATH persists it between runs
+_TOKEN_COUNT_CACHE = TokenCountCache(
+    max_entries=int(os.environ.get("TOKEN_CACHE_SIZE", "50000")),
+    path=os.environ.get("TOKEN_CACHE_PATH") or None
+)
+if _TOKEN_COUNT_CACHE.path:
+    atexit.register(_TOKEN_COUNT_CACHE.save)
+
+
+def get_token_cache() -> TokenCountCache:
+    """
+    Get the shared token count cache (e.g. to read its stats or save it).
+
+    Returns:
+        TokenCountCache instance used by count_tokens and count_tokens_batch
+    """
+    return _TOKEN_COUNT_CACHE
+
+def _load_settings() -> Dict[str, Any]:
+    """Tokenizer settings from config/tokenizers.yaml, loaded once."""
+    global _SETTINGS
+    if _SETTINGS is None:
+        _SETTINGS = (load_config(os.path.join("config", "tokenizers.yaml")) or {}).get("tokenizers") or {}
+    return _SETTINGS
+
+
+def provider_family(model_name: str) -> str:
+    """
+    Map a model name to its provider family.
+
+    Args:
+        model_name: Name or type of the model, or a family name
+
+    Returns:
+        Family name ("openai", "anthropic", "google", "meta", "mistral", ...) or "default"
+    """
+    lowered = (model_name or "").lower()
+    if lowered in {family for _, family in _FAMILY_PATTERNS}:
+        return lowered
+    for pattern, family in _FAMILY_PATTERNS:
+        if pattern in lowered:
+            return family
+    return "default"
+
+
+def chars_per_token(model_name: str) -> float:
+    """
+    Calibrated characters-per-token ratio for a model's provider family.
+
+    Args:
+        model_name: Name or type of the model
+
+    Returns:
+        Ratio from the `chars_per_token` block of config/tokenizers.yaml
+    """
+    ratios = _load_settings().get("chars_per_token") or {}
+    return float(ratios.get(provider_family(model_name), ratios.get("default", 4.0)))
+
+
+def estimate_tokens(text: str, model_name: str) -> int:
+    """
+    Estimate a token count in O(1) from the text length.
+
+    Args:
+        text: Text to estimate tokens for
+        model_name: Name or type of the model
+
+    Returns:
+        Estimated number of tokens
+    """
+    return int(len(text) / chars_per_token(model_name))
+
+
+def fit_chars_per_token(texts: List[str], token_counts: List[int]) -> float:
+    """
+    Fit a characters-per-token ratio from texts and their token counts.
+
+    Counts can come from a local encoding or from provider-reported usage.
+
+    Args:
+        texts: Sample texts
+        token_counts: Token count of each text
+
+    Returns:
+        Total characters divided by total tokens
+    """
+    total_tokens = int(np.sum(token_counts))
+    if total_tokens <= 0:
+        raise ValueError("Cannot fit a ratio without any tokens")
+    return sum(len(text) for text in texts) / total_tokens
+
+
+def _read_bpe_file(path: str) -> Dict[bytes, int]:
+    """Read a .tiktoken file (base64 token and rank per line)."""
+    with open(path, "rb") as f:
+        return {base64.b64decode(token): int(rank) for token, rank in (line.split() for line in f if line.strip())}
+
+
+def _bpe_dir() -> str:
+    return os.environ.get("TOKENIZER_BPE_DIR") or _load_settings().get("bpe_dir") or os.path.join("data", "tokenizers")
+
+
+def load_encoding(encoding_name: str) -> Any:
+    """
+    Load a tiktoken encoding, preferring a vendored BPE file.
+
+    `<bpe_dir>/<encoding_name>.tiktoken` is used when present; otherwise tiktoken
+    loads it from its cache (TIKTOKEN_CACHE_DIR) or downloads it. A failed load is
+    remembered, so air-gapped runs do not retry the download on every call.
+
+    Args:
+        encoding_name: tiktoken encoding name (e.g. "cl100k_base")
+
+    Returns:
+        tiktoken Encoding, or None if it cannot be loaded
+    """
+    if encoding_name in _ENCODINGS:
+        return _ENCODINGS[encoding_name]
+
+    with _ENCODING_LOCK:
+        if encoding_name in _ENCODINGS:
+            return _ENCODINGS[encoding_name]
+
+        encoding = None
+        local_path = os.path.join(_bpe_dir(), f"{encoding_name}.tiktoken")
+        try:
+            if os.path.exists(local_path) and encoding_name in _ENCODING_SPECS:
+                encoding = tiktoken.Encoding(
+                    encoding_name,
+                    mergeable_ranks=_read_bpe_file(local_path),
+                    **_ENCODING_SPECS[encoding_name]
+                )
+            else:
+                encoding = tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            logger.warning(f"Tokenizer {encoding_name} unavailable ({e}); "
+                           f"using the calibrated chars-per-token estimate")
+
+        _ENCODINGS[encoding_name] = encoding
+        return encoding
+
 
 def get_tokenizer(model_name: str) -> Any:
     """
@@ -14,7 +310,7 @@ def get_tokenizer(model_name: str) -> Any:
         model_name: Name or type of the model
 
     Returns:
-        Tokenizer instance
+        Tokenizer instance, or None if no encoding can be loaded
     """
     if model_name in _TOKENIZERS:
         return _TOKENIZERS[model_name]
@@ -33,20 +329,22 @@ def get_tokenizer(model_name: str) -> Any:
     else:
         encoding_name = "cl100k_base"  # Default fallback
 
-    try:
-        tokenizer = tiktoken.get_encoding(encoding_name)
-        _TOKENIZERS[model_name] = tokenizer
-        return tokenizer
-    except:
-        # Fall back to a default tokenizer if specific one not available
-        try:
-            if "encoding" not in _TOKENIZERS:
-                _TOKENIZERS["encoding"] = tiktoken.get_encoding("cl100k_base")
-            return _TOKENIZERS["encoding"]
-        except:
-            # Ultimate fallback: just count characters and divide by 4
-            # (rough approximation of tokens)
-            return None
+    tokenizer = load_encoding(encoding_name)
+    _TOKENIZERS[model_name] = tokenizer
+    return tokenizer
+
+
+def prewarm_tokenizers(model_names: List[str]) -> Dict[str, bool]:
+    """
+    Load the tokenizers of the given models up front (e.g. at startup).
+
+    Args:
+        model_names: Names of the models that will be counted
+
+    Returns:
+        Dictionary mapping each model name to whether an exact encoding is available
+    """
+    return {model_name: get_tokenizer(model_name) is not None for model_name in model_names}
 
 def count_tokens(text: str, model_name: str) -> int:
     """
@@ -57,12 +355,78 @@ def count_tokens(text: str, model_name: str) -> int:
         model_name: Name or type of the model
 
     Returns:
-        Number of tokens
+        Number of tokens; special-token text is counted as ordinary text, as in `count_tokens_batch`
     """
     tokenizer = get_tokenizer(model_name)
 
     if tokenizer:
-        return len(tokenizer.encode(text))
+        if len(text) < _TOKEN_COUNT_CACHE.min_chars:
+            return len(tokenizer.encode_ordinary(text))
+        key = _TOKEN_COUNT_CACHE.key(tokenizer.name, text)
+        count = _TOKEN_COUNT_CACHE.get(key)
+        if count is None:
+            count = len(tokenizer.encode_ordinary(text))
+            _TOKEN_COUNT_CACHE.put(key, count)
+        return count
     else:
-        # Fallback: rough approximation (4 chars ≈ 1 token)
-        return len(text) // 4
\ No newline at end of file
+        return estimate_tokens(text, model_name)
+
+def count_tokens_batch(texts: List[str], model_name: str, num_threads: Optional[int] = None) -> np.ndarray:
+    """
+    Count the tokens of many texts at once.
+
+    Texts are split into one contiguous chunk per thread; tiktoken releases the
+    GIL while encoding, so the chunks are encoded in parallel. Only the counts
+    are kept, not the token lists. Special-token text is counted as ordinary text.
+    Long texts are looked up in, and added to, the shared token count cache.
+
+    Args:
+        texts: Texts to count tokens for
+        model_name: Name or type of the model
+        num_threads: Worker threads, or None for one per CPU core
+
+    Returns:
+        Array of token counts (int64), one per text
+    """
+    tokenizer = get_tokenizer(model_name)
+
+    if not tokenizer:
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.float64, count=len(texts))
+        return (lengths / chars_per_token(model_name)).astype(np.int64)
+
+    # Serve long texts from the memo and only encode the misses
+    counts = np.zeros(len(texts), dtype=np.int64)
+    pending, pending_keys = [], []
+    for position, text in enumerate(texts):
+        if len(text) >= _TOKEN_COUNT_CACHE.min_chars:
+            key = _TOKEN_COUNT_CACHE.key(tokenizer.name, text)
+            count = _TOKEN_COUNT_CACHE.get(key)
+            if count is not None:
+                counts[position] = count
+                continue
+            pending_keys.append((position, key))
+        else:
+            pending_keys.append((position, None))
+        pending.append(text)
+
+    encoded = _encode_counts(tokenizer, pending, num_threads or os.cpu_count() or 1)
+    for (position, key), count in zip(pending_keys, encoded.tolist()):
+        counts[position] = count
+        if key is not None:
+            _TOKEN_COUNT_CACHE.put(key, count)
+    return counts
+
+
+def _encode_counts(tokenizer: Any, texts: List[str], num_threads: int) -> np.ndarray:
+    """Encode texts across a thread pool, keeping only their token counts."""
+    def count_chunk(chunk: List[str]) -> np.ndarray:
+        return np.fromiter((len(tokenizer.encode_ordinary(text)) for text in chunk),
+                           dtype=np.int64, count=len(chunk))
+
+    if num_threads <= 1 or len(texts) < 2 * num_threads:
+        return count_chunk(texts)
+
+    chunk_size = -(-len(texts) // num_threads)
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+    with ThreadPoolExecutor(max_workers=num_threads) as pool:
+        return np.concatenate(list(pool.map(count_chunk, chunks)))
@@ -0,0 +1,423 @@
+import asyncio
+import json
+import pickle
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.test_runner.adaptive import SequentialSampler, _t_critical
+from src.test_runner.case_expander import CaseExpander
+from src.test_runner.executor import TestExecutor
+from src.test_runner.parallel import ParallelExecutor
+from src.test_runner.unit_scorer import UnitScorer
+from src.test_runner.plan_compiler import ExecutionPlan, PlanShard, PlanValidationError, compile_plan, compile_suite, load_suites
+from src.utils.cost_tracker import BudgetExceededError
+from src.utils.results_store import ResultsStore
+from src.test_runner.planner import RunPlanner, dedupe_requests, expand_suite, format_plan_table
+
+
+class TestSequentialSampler(unittest.TestCase):
+    def test_interval_narrows_with_more_samples(self):
+        sampler = SequentialSampler()
+        for score in [3, 4, 3, 4]:
+            sampler.record("model_a", score)
+        _, low_4, high_4 = sampler.interval("model_a")
+        for score in [3, 4] * 10:
+            sampler.record("model_a", score)
+        mean, low_24, high_24 = sampler.interval("model_a")
+        self.assertAlmostEqual(mean, 3.5)
+        self.assertLess(high_24 - low_24, high_4 - low_4)
+
+    def test_stops_once_precise(self):
+        sampler = SequentialSampler(min_samples=3, ci_half_width=0.5, stop_on_rank=False, score_resolution=0.1)
+        for score in [4.0, 4.1, 3.9]:
+            sampler.record("model_a", score)
+        self.assertEqual(sampler.should_stop("model_a"), "precision")
+
+    def test_identical_scale_scores_do_not_stop_for_precision(self):
+        sampler = SequentialSampler(min_samples=3, ci_half_width=0.5, stop_on_rank=False)
+        for score in [4, 4, 4]:
+            sampler.record("model_a", score)
+        mean, low, high = sampler.interval("model_a")
+        self.assertGreater(high - low, 1.0)
+        self.assertIsNone(sampler.should_stop("model_a"))
+
+    def test_t_critical_is_exact_for_small_samples(self):
+        self.assertAlmostEqual(_t_critical(0.95, 1), 12.706, places=3)
+        self.assertAlmostEqual(_t_critical(0.95, 2), 4.303, places=3)
+        self.assertAlmostEqual(_t_critical(0.99, 3), 5.841, places=3)
+        self.assertAlmostEqual(_t_critical(0.95, 30), 2.042, places=3)
+
+    def test_later_looks_use_stricter_intervals(self):
+        capped = SequentialSampler(min_samples=3, max_samples=12)
+        self.assertAlmostEqual(capped.look_confidence(3), 1 - 0.05 / 10)
+        open_ended = SequentialSampler(min_samples=3)
+        self.assertGreater(open_ended.look_confidence(10), open_ended.look_confidence(4))
+        self.assertGreater(open_ended.look_confidence(3), 0.95)
+
+    def test_stops_once_rank_settled(self):
+        sampler = SequentialSampler(min_samples=3, ci_half_width=0.01)
+        for high, low in [(4.8, 1.0), (4.2, 1.4), (4.5, 1.2), (4.9, 1.1)]:
+            sampler.record("strong", high)
+            sampler.record("weak", low)
+        self.assertEqual(sampler.should_stop("strong"), "rank_settled")
+
+
+class TestAdaptiveExecution(unittest.TestCase):
+    def test_separated_models_stop_early(self):
+        scores = {"strong": [4.8, 4.6, 4.9, 4.7], "weak": [1.2, 1.0, 1.4, 1.1]}
+
+        def run_case(model_id, model_config, case):
+            return {"overall_score": scores[model_id][case["index"] % 4]}
+
+        cases = [{"index": i} for i in range(10)]
+        models = {"strong": {}, "weak": {}}
+        sampler = SequentialSampler(min_samples=3, ci_half_width=0.01)
+        outcome = TestExecutor().run_adaptive(models, cases, sampler, run_case)
+
+        self.assertLess(outcome["adaptive"]["cases_issued"], 20)
+        self.assertEqual(outcome["adaptive"]["models"]["strong"]["stop_reason"], "rank_settled")
+        self.assertGreater(outcome["adaptive"]["models"]["strong"]["mean_score"],
+                           outcome["adaptive"]["models"]["weak"]["mean_score"])
+
+    def test_plan_suites_with_a_sampler_stop_early(self):
+        units = [{"id": f"{suite}{i}", "suite": suite, "case": "c", "prompt": "p", "resolved": True}
+                 for suite, count in (("sampled", 10), ("fixed", 2)) for i in range(count)]
+        plan = ExecutionPlan(units)
+        models = {"strong": {"provider": "mock"}, "weak": {"provider": "mock"}}
+        samplers = {"sampled": SequentialSampler(min_samples=3, max_samples=10, ci_half_width=0.01)}
+        streamed = []
+
+        def score(unit, result):
+            return 5 if result["response"] == "strong" else 1
+
+        with patch.object(TestExecutor, "run_unit", lambda self, client, unit: {"response": client.model_name}):
+            outcome = TestExecutor().run_plan_adaptive(models, plan, samplers, score,
+                                                       on_result=lambda model_id, result: streamed.append(result))
+
+        summary = outcome["adaptive"]["sampled"]
+        self.assertEqual(summary["models"]["strong"]["stop_reason"], "rank_settled")
+        self.assertLess(summary["cases_issued"], 20)
+        for model_id in models:
+            self.assertEqual([r["unit_id"] for r in outcome["results"][model_id] if r["suite"] == "fixed"],
+                             ["fixed0", "fixed1"])
+        self.assertEqual(len(streamed), sum(len(results) for results in outcome["results"].values()))
+
+    def test_budget_stop_keeps_the_sampled_results(self):
+        units = [{"id": f"{suite}{i}", "suite": suite, "case": "c", "prompt": "p", "resolved": True}
+                 for suite in ("first", "second") for i in range(5)]
+        models = {"a": {"provider": "mock"}, "b": {"provider": "mock"}}
+        samplers = {suite: SequentialSampler(min_samples=5, max_samples=5) for suite in ("first", "second")}
+        calls = []
+
+        def run_unit(self, client, unit):
+            calls.append(unit["id"])
+            if len(calls) > 3:
+                raise BudgetExceededError("run", "run", 1.0, 1.0, 0.1)
+            return {"response": "ok"}
+
+        with patch.object(TestExecutor, "run_unit", run_unit):
+            outcome = TestExecutor().run_plan_adaptive(models, ExecutionPlan(units), samplers, lambda unit, result: 3)
+
+        self.assertEqual(sum(len(results) for results in outcome["results"].values()), 3)
+        self.assertEqual(outcome["adaptive"]["first"]["stopped"], "run")
+        self.assertEqual(outcome["adaptive"]["first"]["models"]["a"]["stop_reason"], "run_budget")
+        self.assertNotIn("second", outcome["adaptive"])
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class TestTokenRateLimit(unittest.TestCase):
+    @patch.dict(os.environ, {"TOKENS_PER_MINUTE": "6000", "REQUEST_DELAY_MS": "0"})
+    def test_batch_waits_once_token_budget_is_spent(self):
+        executor = ParallelExecutor()
+
+        async def echo(prompt):
+            return prompt
+
+        async def run():
+            # 24,000 chars ≈ 6,000 tokens empties the bucket; the next 200 tokens refill at 100/s
+            return await executor.execute_batch([{"prompt": "a" * 24000}, {"prompt": "b" * 800}], echo)
+
+        with patch("src.utils.tokenizers.get_tokenizer", return_value=None):
+            start = time.monotonic()
+            results = asyncio.run(run())
+            elapsed = time.monotonic() - start
+        self.assertEqual(len(results), 2)
+        self.assertGreater(elapsed, 1.5)
+
+
+class TestRunPlanner(unittest.TestCase):
+    MODELS = {"m": {"cost": {"input_per_1k": 1.0, "output_per_1k": 2.0}}}
+    HISTORY = [{"model": "m", "usage": {"completion_tokens": 50},
+                "timing": {"total_time": 2.0, "time_to_first_token": 1.0}}]
+
+    def request(self, **overrides):
+        return {"suite": "s", "case": "c", "method": None, "metrics": [], "has_tests": False,
+                "max_tokens": 1000, "evaluation_model": None, "prompt": "a" * 400, "context": "", **overrides}
+
+    def test_expand_suite_counts_examples_and_missing_files(self):
+        suite = load_suites(names=["ppt_writing"])["ppt_writing"]
+        requests, missing = expand_suite("ppt_writing", suite)
+        structure = [request for request in requests if request["case"] == "slide_structure"]
+        # No prompts file and no test cases for this category in the tree
+        notes = [request for request in requests if request["case"] == "speaker_notes"]
+        self.assertEqual(len(structure), 5)
+        self.assertTrue(all(request["resolved"] and request["prompt"] for request in structure))
+        self.assertEqual(len(notes), 5)
+        self.assertFalse(any(request["resolved"] for request in notes))
+        self.assertIn("data/prompts/ppt_writing/speaker_notes.yaml", missing)
+
+    def test_predicts_tokens_cost_and_wall_clock(self):
+        planner = RunPlanner(self.MODELS, max_parallel=2, delay_ms=0, tokens_per_minute=0, history=self.HISTORY)
+        with patch("src.utils.tokenizers.get_tokenizer", return_value=None):
+            plan = planner.plan([self.request(), self.request()])
+            limited = RunPlanner(self.MODELS, max_parallel=2, delay_ms=0, tokens_per_minute=600,
+                                 history=self.HISTORY).plan([self.request(), self.request()])
+        model = plan["models"]["m"]
+        self.assertEqual(model["input_tokens"], 200)
+        self.assertEqual(model["output_tokens"], 100)
+        self.assertAlmostEqual(model["cost"], 0.4)
+        # Two 2 s requests over two slots
+        self.assertAlmostEqual(model["wall_clock_seconds"], 2.0)
+        # 200 prompt tokens at 600 tokens/minute
+        self.assertAlmostEqual(limited["models"]["m"]["wall_clock_seconds"], 20.0)
+        self.assertIn("Total", format_plan_table(plan))
+
+    def test_counts_judge_calls_for_judged_metrics_only(self):
+        planner = RunPlanner(self.MODELS, delay_ms=0, history=self.HISTORY)
+        request = self.request(method="ppt_quality", metrics=["structure", "flow"], evaluation_model="m")
+        with patch("src.utils.tokenizers.get_tokenizer", return_value=None):
+            plan = planner.plan([request] * 3)
+        model = plan["models"]["m"]
+        self.assertEqual(model["judge_calls"], 3)
+        self.assertGreater(model["judge_cost"], 0)
+
+
+    def test_dedupe_sends_identical_requests_once_per_case_sample(self):
+        requests = [self.request(case="a", context="Same text"), self.request(case="b", context="Same text  \n"),
+                    self.request(case="a", context="Same text"), self.request(case="b", context="Other"),
+                    self.request(case="a", temperature=0), self.request(case="a", temperature=0)]
+        groups = dedupe_requests(requests)
+        # a#1 and b#1 share a request; a#2 is a second sample; b#2 differs; the temperature 0 repeats collapse
+        self.assertEqual([len(group) for group in groups], [2, 1, 1, 2])
+        with patch("src.utils.tokenizers.get_tokenizer", return_value=None):
+            plan = RunPlanner(self.MODELS, delay_ms=0, history=self.HISTORY).plan(requests, dedupe=True)
+        self.assertEqual(plan["models"]["m"]["requests"], 4)
+        self.assertEqual(plan["deduplicated_requests"], 2)
+
+    def test_executor_fans_shared_responses_out_to_every_unit(self):
+        units = [{"id": f"u{i}", "suite": "s", "case": case, "prompt": "Same", "temperature": 0}
+                 for i, case in enumerate(["a", "b", "a"])]
+        calls = []
+
+        def run_unit(client, unit):
+            calls.append(unit["id"])
+            return {"response": "ok", "cost": 0.5}
+
+        results = TestExecutor().run_units({"mock_model": {"provider": "mock"}}, units, run_unit=run_unit, dedupe=True)
+        self.assertEqual(calls, ["u0"])
+        self.assertEqual([(result["unit_id"], result["case"], result["response"]) for result in results["mock_model"]],
+                         [("u0", "a", "ok"), ("u1", "b", "ok"), ("u2", "a", "ok")])
+        self.assertEqual([result["cost"] for result in results["mock_model"]], [0.5, 0.0, 0.0])
+        self.assertEqual(results["mock_model"][1]["reused_from"], "u0")
+
+    def test_executor_writes_results_to_the_store_as_it_goes(self):
+        store = ResultsStore(":memory:")
+        units = [{"id": f"u{i}", "suite": "s", "case": "c", "prompt": f"Prompt {i}"} for i in range(3)]
+        stored = []
+
+        def run_unit(client, unit):
+            stored.append(store._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0])
+            return {"response": "ok", "cost": 0.5}
+
+        TestExecutor(store).run_units({"mock_model": {"provider": "mock"}}, units, run_unit=run_unit)
+        self.assertEqual(stored, [0, 1, 2])
+        self.assertEqual([row[0] for row in store._conn.execute(
+            "SELECT unit_id FROM results WHERE model = 'mock_model' ORDER BY id")], ["u0", "u1", "u2"])
+        self.assertAlmostEqual(store.model_documents()["mock_model"]["results_by_category"]["s"]["total_cost_usd"], 1.5)
+
+
+class TestPlanCompiler(unittest.TestCase):
+    def test_compiles_hashed_units_and_reports_problems_up_front(self):
+        plan = compile_plan(names=["ppt_writing"])
+        structure = [unit for unit in plan if unit["case"] == "slide_structure"]
+        self.assertEqual(len(plan), 25)
+        self.assertEqual(len(structure), 5)
+        self.assertTrue(all(unit["resolved"] and "{{" not in unit["prompt"] for unit in structure))
+        self.assertEqual(len({unit["id"] for unit in plan}), len(plan))
+        self.assertEqual(plan.digest, compile_plan(names=["ppt_writing"]).digest)
+
+        self.assertFalse(plan.valid)
+        self.assertIn("Missing file: data/prompts/ppt_writing/speaker_notes.yaml", plan.problems)
+        with self.assertRaises(PlanValidationError):
+            plan.check()
+        self.assertIn("Test suite 'no_such_suite' not found in config/test_suites",
+                      compile_plan(names=["no_such_suite"]).problems)
+
+    def test_units_are_immutable_and_shareable(self):
+        plan = compile_plan(names=["ppt_writing"])
+        unit = plan.units[0]
+        with self.assertRaises(TypeError):
+            unit["prompt"] = "changed"
+        with self.assertRaises(TypeError):
+            unit["variables"].update(topic="changed")
+        self.assertEqual(pickle.loads(pickle.dumps(unit)), unit)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "plan.json")
+            plan.save(path)
+            loaded = ExecutionPlan.load(path)
+            self.assertEqual(loaded.digest, plan.digest)
+            self.assertEqual(loaded.units, plan.units)
+
+            data = loaded.to_dict()
+            data["units"] = [dict(unit, prompt="tampered") if i == 0 else unit for i, unit in enumerate(data["units"])]
+            with self.assertRaises(ValueError):
+                ExecutionPlan.from_dict(data)
+
+    def test_cached_plan_is_reused_until_a_source_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            suite_dir = os.path.join(tmp, "suites")
+            os.makedirs(suite_dir)
+            prompts_file = os.path.join(tmp, "prompts.yaml")
+            with open(prompts_file, "w") as f:
+                f.write('prompts:\n  - id: p\n    template: "Hi {{name}}"\n    examples:\n'
+                        '      - variables: {name: "Ann"}\n')
+            with open(os.path.join(suite_dir, "s.yaml"), "w") as f:
+                f.write(f"test_cases:\n  - id: c\n    prompts_file: {prompts_file}\n")
+            cache_path = os.path.join(tmp, "plan.json")
+
+            first = compile_plan(suite_dir=suite_dir, data_dir=tmp, cache_path=cache_path)
+            self.assertEqual([unit["prompt"] for unit in first], ["Hi Ann"])
+            self.assertTrue(first.valid)
+            with patch("src.test_runner.plan_compiler.compile_suite") as compile_suite:
+                self.assertEqual(compile_plan(suite_dir=suite_dir, data_dir=tmp, cache_path=cache_path).digest,
+                                 first.digest)
+                compile_suite.assert_not_called()
+
+            with open(prompts_file, "a") as f:
+                f.write('      - variables: {}\n')
+            second = compile_plan(suite_dir=suite_dir, data_dir=tmp, cache_path=cache_path)
+            self.assertNotEqual(second.digest, first.digest)
+            self.assertIn("s/c: prompt 'p' has no value for name", second.problems)
+
+    def test_executor_runs_only_resolved_units(self):
+        plan = compile_plan(names=["ppt_writing"])
+        seen = []
+
+        def run_unit(client, unit):
+            seen.append(unit["id"])
+            return {"response": "ok"}
+
+        results = TestExecutor().run_plan({"mock_model": {"provider": "mock"}}, plan, run_unit=run_unit)
+        self.assertEqual(len(results["mock_model"]), len(plan.resolved_units()))
+        self.assertEqual(seen, [unit["id"] for unit in plan.resolved_units()])
+        self.assertEqual(results["mock_model"][0]["unit_id"], seen[0])
+
+    def test_jsonl_case_corpus_replaces_test_case_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "test_cases"))
+            with open(os.path.join(tmp, "test_cases", "s_test_cases.jsonl"), "w") as f:
+                f.write(json.dumps({"id": "x1", "category": "c", "prompt": "From the corpus"}) + "\n")
+                f.write(json.dumps({"id": "x2", "category": "other", "prompt": "Not this one"}) + "\n")
+            suite = {"test_cases": [{"id": "c", "examples_count": 1}]}
+            units, missing, problems, _ = compile_suite("s", suite, data_dir=tmp)
+        self.assertEqual([unit["prompt"] for unit in units], ["From the corpus"])
+        self.assertEqual(units[0]["test_case_id"], "x1")
+        self.assertEqual(problems, [])
+
+    def test_test_case_constraints_reach_the_unit_score(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "test_cases"))
+            with open(os.path.join(tmp, "test_cases", "s_test_cases.jsonl"), "w") as f:
+                f.write(json.dumps({"id": "x1", "category": "c", "prompt": "Capital of France?",
+                                    "constraints": [{"type": "required_phrases", "phrases": ["paris"]}]}) + "\n")
+            suite = {"test_cases": [{"id": "c", "examples_count": 1,
+                                     "evaluation": {"method": "accuracy", "metrics": ["factual_accuracy"]}}],
+                     "settings": {"evaluation_model": "judge"}}
+            units, _, problems, _ = compile_suite("s", suite, data_dir=tmp)
+        plan = ExecutionPlan(units)
+        unit = plan.units[0]
+        self.assertEqual(problems, [])
+        self.assertEqual(unit["constraints"][0]["type"], "required_phrases")
+
+        with patch("src.test_runner.unit_scorer.load_model_config", return_value={"provider": "mock"}), \
+                UnitScorer({"s": suite}) as scorer:
+            passing = scorer.score(unit, {"response": "It is Paris."})
+            failing = scorer.score(unit, {"response": "It is Lyon."})
+        self.assertGreater(passing, failing)
+
+
+class TestCaseExpander(unittest.TestCase):
+    PROMPT = {"id": "p", "template": "{{topic}} for {{audience}}",
+              "examples": [{"variables": {"topic": "AI", "audience": "CEOs"}},
+                           {"variables": {"topic": "Cloud", "audience": "CTOs"}}]}
+
+    def test_product_is_decoded_lazily_with_stable_ids(self):
+        expander = CaseExpander.from_prompt(self.PROMPT, mode="product", axes={"audience": ["CFOs"]})
+        self.assertEqual(len(expander), 6)
+        self.assertEqual([unit["prompt"] for unit in expander][:3], ["AI for CEOs", "AI for CTOs", "AI for CFOs"])
+        self.assertEqual([unit["id"] for unit in expander],
+                         [unit["id"] for unit in CaseExpander.from_prompt(self.PROMPT, mode="product",
+                                                                         axes={"audience": ["CFOs"]})])
+
+        huge = CaseExpander("{{a}}-{{b}}-{{c}}", axes={name: list(range(1000)) for name in "abc"}, mode="product")
+        self.assertEqual(len(huge), 10 ** 9)
+        self.assertEqual(huge.unit(10 ** 9 - 1)["prompt"], "999-999-999")
+
+    def test_seeded_sample_and_shards_partition_the_units(self):
+        sampled = CaseExpander("{{a}}-{{b}}", axes={"a": list(range(100)), "b": list(range(100))},
+                               mode="product", sample=50, seed=7)
+        ids = [unit["id"] for unit in sampled]
+        self.assertEqual(len(set(ids)), 50)
+        self.assertEqual(ids, [unit["id"] for unit in sampled.shard(0, 1)])
+        shards = [[unit["id"] for unit in sampled.shard(index, 3)] for index in range(3)]
+        self.assertEqual(sorted(sum(shards, [])), sorted(ids))
+        self.assertEqual([len(sampled.shard(index, 3)) for index in range(3)], [17, 17, 16])
+        with self.assertRaises(ValueError):
+            sampled.shard(3, 3)
+
+    def test_suite_case_expands_into_plan_units(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            prompts_file = os.path.join(tmp, "prompts.yaml")
+            with open(prompts_file, "w") as f:
+                json.dump({"prompts": [{**self.PROMPT, "template": "{{topic}} for {{audience}} in {{year}}"}]}, f)
+            suite = {"test_cases": [{"id": "c", "prompts_file": prompts_file,
+                                     "expand": {"mode": "product", "sample": 3, "seed": 1}}]}
+            units, _, problems, _ = compile_suite("s", suite, data_dir=tmp)
+        self.assertEqual(len(units), 3)
+        self.assertEqual({unit["case"] for unit in units}, {"c"})
+        self.assertIn("s/c: prompt 'p' has no value for year", problems)
+
+        results = TestExecutor().run_units({"mock_model": {"provider": "mock"}}, CaseExpander.from_prompt(self.PROMPT),
+                                           run_unit=lambda client, unit: {"response": unit["prompt"]})
+        self.assertEqual([result["response"] for result in results["mock_model"]], ["AI for CEOs", "Cloud for CTOs"])
+
+    def test_plan_shards_stream_expanded_cases(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            suite_dir = os.path.join(tmp, "suites")
+            os.makedirs(suite_dir)
+            prompts_file = os.path.join(tmp, "prompts.yaml")
+            with open(prompts_file, "w") as f:
+                json.dump({"prompts": [self.PROMPT]}, f)
+            with open(os.path.join(suite_dir, "s.yaml"), "w") as f:
+                json.dump({"test_cases": [
+                    {"id": "c", "prompts_file": prompts_file, "expand": {"mode": "product"}},
+                    {"id": "d", "prompts_file": prompts_file, "examples_count": 3}]}, f)
+            full = compile_plan(suite_dir=suite_dir, data_dir=tmp)
+            lazy = compile_plan(suite_dir=suite_dir, data_dir=tmp, expand=False)
+            shards = [PlanShard(lazy, k, 3) for k in range(3)]
+            streamed = [unit["id"] for shard in shards for unit in shard]
+
+        self.assertEqual(len(lazy.units), 3)
+        self.assertEqual(sorted(streamed), sorted(unit["id"] for unit in full.resolved_units()))
+        self.assertEqual(sum(len(shard) for shard in shards), len(full.resolved_units()))
+        self.assertEqual(list(shards[0]), list(shards[0]))
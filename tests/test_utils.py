@@ -0,0 +1,576 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+import base64
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import glob
+
+import numpy as np
+import tiktoken
+import yaml
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import tokenizers
+from src.utils.tokenizers import (TokenCountCache, count_tokens, count_tokens_batch, estimate_tokens,
+                                  fit_chars_per_token, get_token_cache, load_encoding, provider_family)
+from src.clients.base_client import BaseClient
+from src.clients.mock_client import MockClient
+from src.utils.cost_tracker import (BudgetExceededError, CostLedger, estimate_cost, estimate_cost_batch,
+                                    get_cost_ledger, get_cost_rates, set_cost_ledger)
+from src.utils.prompt_formatter import (MissingVariableError, compile_template, format_prompt, layout_prompt,
+                                         shared_prefix)
+from src.utils.context_store import ContextStore, open_context_store, resolve_context
+from src.utils.case_corpus import CaseCorpus, convert_to_jsonl, export_source
+from src.utils.results_store import ResultsStore, open_results_store
+from src.reporting.comparisons_reporter import ModelComparison
+from src.reporting import jsonl_generator
+from src.reporting.jsonl_generator import JSONLReporter
+from src.reporting.report_cache import ReportCache
+from src.reporting.visualizations_reporter import Visualizer
+
+
+def byte_level_encoding():
+    """Small real tiktoken encoding that needs no download."""
+    ranks = {bytes([i]): i for i in range(256)}
+    for word in ("the", "model", "token"):
+        encoded = word.encode()
+        for end in range(2, len(encoded) + 1):
+            ranks.setdefault(encoded[:end], len(ranks))
+    return tiktoken.Encoding(
+        "test_bytes",
+        pat_str=r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+""",
+        mergeable_ranks=ranks,
+        special_tokens={}
+    )
+
+
+TEXTS = [f"the model counts token {i} " * (i % 7 + 1) for i in range(50)]
+
+
+class TestCountTokensBatch(unittest.TestCase):
+    def test_matches_per_string_counts(self):
+        with patch("src.utils.tokenizers.get_tokenizer", return_value=byte_level_encoding()):
+            expected = [count_tokens(text, "gpt-4") for text in TEXTS]
+            counts = count_tokens_batch(TEXTS, "gpt-4", num_threads=4)
+        self.assertIsInstance(counts, np.ndarray)
+        self.assertEqual(counts.tolist(), expected)
+
+    def test_special_token_text_counts_as_ordinary_text(self):
+        plain = byte_level_encoding()
+        encoding = tiktoken.Encoding("test_special", pat_str=plain._pat_str, mergeable_ranks=plain._mergeable_ranks,
+                                     special_tokens={"<|endoftext|>": 1000})
+        texts = ["short <|endoftext|>", "the model <|endoftext|> " * 40]
+        with patch("src.utils.tokenizers.get_tokenizer", return_value=encoding):
+            get_token_cache().clear()
+            single = [count_tokens(text, "gpt-4") for text in texts]
+            get_token_cache().clear()
+            batch = count_tokens_batch(texts, "gpt-4", num_threads=1).tolist()
+        self.assertEqual(single, batch)
+        self.assertEqual(single, [len(encoding.encode_ordinary(text)) for text in texts])
+
+    def test_fallback_without_tokenizer(self):
+        with patch("src.utils.tokenizers.get_tokenizer", return_value=None):
+            counts = count_tokens_batch(["abcdefgh", ""], "gpt-4")
+        self.assertEqual(counts.tolist(), [2, 0])
+
+    def test_estimate_cost_batch(self):
+        with patch("src.utils.tokenizers.get_tokenizer", return_value=None):
+            costs = estimate_cost_batch(["a" * 4000, "a" * 8000], 100, "gpt-4o")
+        self.assertAlmostEqual(costs[0], estimate_cost(1000, 100, "gpt-4o"))
+        self.assertAlmostEqual(costs[1], estimate_cost(2000, 100, "gpt-4o"))
+
+
+class TestTokenCountCache(unittest.TestCase):
+    def setUp(self):
+        get_token_cache().clear()
+
+    def test_repeated_long_text_is_served_from_cache(self):
+        encoding = byte_level_encoding()
+        text = "the model counts token " * 50
+        with patch("src.utils.tokenizers.get_tokenizer", return_value=encoding):
+            first = count_tokens(text, "gpt-4")
+            with patch.object(encoding, "encode_ordinary", side_effect=AssertionError("re-encoded")):
+                self.assertEqual(count_tokens(text, "gpt-4"), first)
+                self.assertEqual(count_tokens_batch([text], "gpt-4").tolist(), [first])
+        stats = get_token_cache().stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3)
+
+    def test_lru_eviction_and_digest_keys(self):
+        cache = TokenCountCache(max_entries=2)
+        keys = [cache.key("enc", f"text {i}") for i in range(3)]
+        cache.put(keys[0], 1)
+        cache.put(keys[1], 2)
+        cache.get(keys[0])
+        cache.put(keys[2], 3)
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(cache.get(keys[0]), 1)
+        self.assertEqual(len(keys[0][1]), 16)
+
+    def test_persists_between_runs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "token_counts.json")
+            cache = TokenCountCache(path=path)
+            key = cache.key("enc", "a long context")
+            cache.put(key, 42)
+            cache.save()
+            self.assertEqual(TokenCountCache(path=path).get(key), 42)
+
+
+class TestOfflineTokenizers(unittest.TestCase):
+    def tearDown(self):
+        for name in ("test_bytes", "missing_encoding"):
+            tokenizers._ENCODINGS.pop(name, None)
+
+    def test_loads_vendored_bpe_file(self):
+        reference = byte_level_encoding()
+        spec = {"pat_str": reference._pat_str, "special_tokens": {}}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(os.path.join(tmp_dir, "test_bytes.tiktoken"), "wb") as f:
+                for token, rank in reference._mergeable_ranks.items():
+                    f.write(base64.b64encode(token) + b" %d\n" % rank)
+            with patch.dict(os.environ, {"TOKENIZER_BPE_DIR": tmp_dir}), \
+                    patch.dict(tokenizers._ENCODING_SPECS, {"test_bytes": spec}), \
+                    patch("tiktoken.get_encoding", side_effect=AssertionError("downloaded")):
+                encoding = load_encoding("test_bytes")
+        text = "the model counts tokens"
+        self.assertEqual(encoding.encode(text), reference.encode(text))
+
+    def test_failed_load_is_not_retried(self):
+        with patch("tiktoken.get_encoding", side_effect=OSError("offline")) as get_encoding:
+            self.assertIsNone(load_encoding("missing_encoding"))
+            self.assertIsNone(load_encoding("missing_encoding"))
+        self.assertEqual(get_encoding.call_count, 1)
+
+    def test_calibrated_estimate(self):
+        self.assertEqual(provider_family("claude-3-opus-20240229"), "anthropic")
+        self.assertEqual(provider_family("gpt-4o"), "openai")
+        self.assertEqual(provider_family("unknown-model"), "default")
+        self.assertEqual(estimate_tokens("a" * 350, "claude-3-opus-20240229"), 100)
+        with patch("src.utils.tokenizers.get_tokenizer", return_value=None):
+            self.assertEqual(count_tokens("a" * 350, "claude-3-opus-20240229"), 100)
+
+    def test_fit_chars_per_token(self):
+        self.assertAlmostEqual(fit_chars_per_token(["abcd" * 10, "abc" * 10], [10, 10]), 3.5)
+        with self.assertRaises(ValueError):
+            fit_chars_per_token(["abc"], [0])
+
+
+class PricedClient(BaseClient):
+    """Client with $1 per 1k tokens either way that records its calls."""
+
+    def __init__(self):
+        super().__init__(model_config={"name": "priced", "cost": {"input_per_1k": 1.0, "output_per_1k": 1.0},
+                                       "defaults": {"max_tokens": 100}})
+        self.name = "test_provider"
+        self.calls = 0
+
+    def generate(self, prompt, config=None):
+        self.calls += 1
+        return "a" * 400
+
+
+class TestCostLedger(unittest.TestCase):
+    def setUp(self):
+        self.previous_ledger = get_cost_ledger()
+
+    def tearDown(self):
+        set_cost_ledger(self.previous_ledger)
+
+    def test_rates_come_from_model_config(self):
+        self.assertEqual(get_cost_rates("claude-3-opus-20240229"), {"input_per_1k": 15.0, "output_per_1k": 75.0})
+        self.assertEqual(get_cost_rates("claude_3_5_sonnet"), {"input_per_1k": 3.0, "output_per_1k": 15.0})
+        self.assertAlmostEqual(estimate_cost(1000, 1000, "claude-3-opus"), 90.0)
+
+    def test_throttles_until_reservations_settle(self):
+        ledger = CostLedger(run_budget=1.0, poll_interval=0.01)
+        first = ledger.reserve("m", "p", 0.6)
+
+        async def run():
+            waiting = asyncio.ensure_future(ledger.reserve_async("m", "p", 0.6))
+            await asyncio.sleep(0.05)
+            self.assertFalse(waiting.done())
+            ledger.settle(first, 0.3)
+            return await asyncio.wait_for(waiting, 1.0)
+
+        second = asyncio.run(run())
+        ledger.settle(second, 0.6)
+        with self.assertRaises(BudgetExceededError) as raised:
+            ledger.reserve("m", "p", 0.2)
+        self.assertEqual(raised.exception.scope, "run")
+
+        summary = ledger.summary()
+        self.assertAlmostEqual(summary["total_cost"], 0.9)
+        self.assertEqual(summary["by_model"]["m"]["calls"], 2)
+        self.assertEqual(summary["in_flight"], 0)
+        self.assertIsNotNone(summary["stopped"])
+
+    def test_client_calls_are_charged_and_stopped(self):
+        ledger = CostLedger(model_budgets={"priced": 0.5})
+        set_cost_ledger(ledger)
+        client = PricedClient()
+        with patch("src.utils.tokenizers.get_tokenizer", return_value=None):
+            result = asyncio.run(client.generate_response("b" * 400))
+            self.assertAlmostEqual(result["cost"], 0.2)
+            self.assertAlmostEqual(ledger.summary()["by_provider"]["test_provider"], 0.2)
+            with self.assertRaises(BudgetExceededError):
+                # 100 prompt + 100 max output tokens would take spend to $0.4, then $0.6
+                client.generate_with_cost("b" * 400)
+                client.generate_with_cost("b" * 400)
+        self.assertEqual(client.calls, 2)
+
+
+
+class TestPromptTemplate(unittest.TestCase):
+    def test_renders_like_format_prompt(self):
+        template = "Topic: {{topic}}\nAudience: {{audience}} ({{topic}}) {json: 1}"
+        variables = {"topic": "AI", "audience": "executives", "unused": 1}
+        self.assertEqual(compile_template(template).render(variables),
+                         "Topic: AI\nAudience: executives (AI) {json: 1}")
+        self.assertEqual(format_prompt(template, {"topic": 3}), "Topic: 3\nAudience: {{audience}} (3) {json: 1}")
+        self.assertEqual(compile_template(template).fields, ("topic", "audience"))
+        self.assertIs(compile_template(template), compile_template(template))
+
+    def test_render_many_fails_fast_on_missing_variables(self):
+        template = compile_template("{{a}}-{{b}}")
+        self.assertEqual(template.render_many([{"a": 1, "b": 2}, {"a": "x", "b": "y"}]), ["1-2", "x-y"])
+        with self.assertRaises(MissingVariableError) as raised:
+            template.render_many([{"a": 1, "b": 2}, {"a": 1}])
+        self.assertEqual((raised.exception.missing, raised.exception.index), (["b"], 1))
+        self.assertEqual(template.render_many([{"a": 1}], strict=False), ["1-{{b}}"])
+        with self.assertRaises(MissingVariableError):
+            template.render({})
+
+
+class TestPromptCaching(unittest.TestCase):
+    def setUp(self):
+        self.previous_ledger = get_cost_ledger()
+        set_cost_ledger(CostLedger())
+
+    def tearDown(self):
+        set_cost_ledger(self.previous_ledger)
+
+    def test_layout_puts_stable_parts_first(self):
+        prompt, prefix = layout_prompt(["Long context"], ["Question?"])
+        self.assertEqual(prompt, "Long context\n\nQuestion?")
+        self.assertTrue(prompt.startswith(prefix))
+        self.assertEqual(prefix, "Long context\n\n")
+        self.assertEqual(layout_prompt([""], ["Question?"]), ("Question?", ""))
+
+    def test_shared_prefix_ends_at_line_break(self):
+        prompts = ["Case: 1\nEvaluate it for accuracy.", "Case: 1\nEvaluate it for relevance."]
+        self.assertEqual(shared_prefix(prompts), "Case: 1\n")
+        self.assertEqual(shared_prefix(prompts[:1]), "")
+
+    def test_mock_client_bills_cache_writes_then_reads(self):
+        client = MockClient(model_config={"name": "mock", "cost": {"input_per_1k": 1.0, "output_per_1k": 0.0},
+                                          "prompt_caching": {"read_multiplier": 0.1, "write_multiplier": 1.25}})
+        prompt, prefix = layout_prompt(["context " * 500], ["question"])
+        with patch("src.utils.tokenizers.get_tokenizer", return_value=None):
+            first = client.generate_with_cost(prompt, cache_prefix=prefix)
+            second = client.generate_with_cost(prompt, cache_prefix=prefix)
+            uncached = client.generate_with_cost(prompt)
+
+        self.assertGreater(first["usage"]["cache_write_tokens"], 0)
+        self.assertEqual(second["usage"]["cached_input_tokens"], first["usage"]["cache_write_tokens"])
+        self.assertEqual(uncached["usage"]["uncached_input_tokens"], uncached["usage"]["prompt_tokens"])
+        self.assertLess(second["cost"], uncached["cost"])
+        self.assertGreater(first["cost"], uncached["cost"])
+        self.assertEqual(client.cache_stats, {"reads": 1, "writes": 1})
+
+    def test_caching_disabled_ignores_prefix(self):
+        client = PricedClient()
+        with patch("src.utils.tokenizers.get_tokenizer", return_value=None):
+            result = client.generate_with_cost("context\n\nquestion", cache_prefix="context\n\n")
+        self.assertEqual(result["usage"]["cached_input_tokens"], 0)
+        self.assertEqual(result["usage"]["uncached_input_tokens"], result["usage"]["prompt_tokens"])
+
+
+
+class TestContextStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.short = self.write("short", [{"id": "a", "title": "A", "content": "alpha"},
+                                          {"id": "b", "content": "b\u00e9ta " * 1000}])
+        self.long = self.write("long", [{"id": "c", "content": ""}])
+
+    def write(self, name, contexts):
+        path = os.path.join(self.tmp.name, "contexts", name, "contexts.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"contexts": contexts}, f)
+        return path
+
+    def test_fetches_contexts_lazily_by_id(self):
+        store = ContextStore.build([self.short, self.long], os.path.join(self.tmp.name, "store", "contexts"))
+        self.addCleanup(store.close)
+        self.assertIsNone(store._map)
+        self.assertEqual(store.get("a"), "alpha")
+        self.assertEqual(store.get("b"), "b\u00e9ta " * 1000)
+        self.assertEqual(store.get("c"), "")
+        self.assertIsNone(store.get("missing"))
+        self.assertEqual(bytes(store.get_bytes("a")), b"alpha")
+        self.assertEqual(store.ids(self.short), ["a", "b"])
+        self.assertEqual(store.metadata("a"), {"title": "A"})
+        self.assertNotEqual(store.digest("a"), store.digest("b"))
+
+        reopened = pickle.loads(pickle.dumps(store))
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.get("b"), store.get("b"))
+
+    def test_open_rebuilds_when_a_source_changes(self):
+        path = os.path.join(self.tmp.name, "store", "contexts")
+        store = open_context_store(data_dir=self.tmp.name, path=path)
+        self.assertIs(open_context_store(data_dir=self.tmp.name, path=path), store)
+        self.assertEqual(resolve_context({"context_id": "a"}, store), "alpha")
+        self.assertEqual(resolve_context({"context": "inline", "context_id": "a"}, store), "inline")
+
+        self.write("short", [{"id": "a", "content": "changed alpha"}])
+        rebuilt = open_context_store(data_dir=self.tmp.name, path=path)
+        self.addCleanup(rebuilt.close)
+        self.assertIsNot(rebuilt, store)
+        self.assertEqual(rebuilt.get("a"), "changed alpha")
+        self.assertNotIn("b", rebuilt)
+        # Stores already handed out keep reading the build they were opened with
+        self.assertEqual(store.get("a"), "alpha")
+        self.assertNotEqual(store.path, rebuilt.path)
+
+    def test_rejects_an_index_from_another_build(self):
+        first = ContextStore.build([self.short], os.path.join(self.tmp.name, "first"))
+        second = ContextStore.build([self.long], os.path.join(self.tmp.name, "second"))
+        first.close()
+        second.close()
+        shutil.copy(second.path + ".idx.json", first.path + ".idx.json")
+        with self.assertRaises(ValueError):
+            ContextStore(first.path)
+
+
+
+class TestCaseCorpus(unittest.TestCase):
+    SOURCES = sorted(glob.glob("data/test_cases/*.json") + glob.glob("data/ground_truth/*.json")
+                     + glob.glob("data/prompts/**/*.yaml", recursive=True))
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_converts_current_formats_losslessly(self):
+        corpus = convert_to_jsonl(self.SOURCES, os.path.join(self.tmp.name, "cases.jsonl"))
+        for path in self.SOURCES:
+            with open(path, "r") as f:
+                original = yaml.safe_load(f) if path.endswith(".yaml") else json.load(f)
+            self.assertEqual(export_source(corpus, path), original, path)
+
+        self.assertEqual(corpus.get("general_1")["category"], "general_knowledge")
+        self.assertEqual([case["id"] for case in corpus.iter_cases(category="algorithm_implementation")],
+                         ["code_algorithm_1"])
+        self.assertNotIn("_origin", corpus.get("code_bug_fix_1"))
+
+    def test_filters_by_category_and_tags_and_reindexes_on_change(self):
+        path = os.path.join(self.tmp.name, "cases.jsonl")
+        with open(path, "w") as f:
+            for i in range(20):
+                f.write(json.dumps({"id": f"c{i}", "category": f"cat{i % 2}", "tags": [f"t{i % 3}"]}) + "\n")
+        corpus = CaseCorpus(path)
+        self.assertEqual(len(corpus), 20)
+        self.assertEqual(corpus.categories(), {"cat0": 10, "cat1": 10})
+        self.assertEqual([case["id"] for case in corpus.iter_cases(category="cat0", tags=["t0"])],
+                         ["c0", "c6", "c12", "c18"])
+        self.assertIsNone(corpus.get("missing"))
+
+        with open(path, "a") as f:
+            f.write(json.dumps({"id": "new", "category": "cat2"}) + "\n")
+        self.assertEqual([case["id"] for case in CaseCorpus(path).iter_cases(category="cat2")], ["new"])
+
+
+
+class TestResultsStore(unittest.TestCase):
+    @staticmethod
+    def write_model(yaml_dir, model, score, cost):
+        with open(os.path.join(yaml_dir, f"{model}.yaml"), "w") as f:
+            yaml.safe_dump({"model": model, "aggregate_metrics": {"accuracy": score, "total_cost_usd": cost},
+                            "results_by_category": {"ppt": {"test_count": 3}}}, f)
+
+    def test_yaml_files_are_imported_once_and_refreshed_when_changed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            yaml_dir = os.path.join(tmp, "yaml")
+            os.makedirs(yaml_dir)
+            self.write_model(yaml_dir, "a", 0.9, 1.0)
+            self.write_model(yaml_dir, "b", 0.7, 0.5)
+            store = ResultsStore(os.path.join(tmp, "results.db"))
+            self.assertEqual(store.sync_yaml_dir(yaml_dir), 2)
+            self.assertEqual(store.sync_yaml_dir(yaml_dir), 0)
+            self.assertEqual(store.metric_values("accuracy"), {"a": 0.9, "b": 0.7})
+            self.assertEqual(store.metric_values("test_count", suite="ppt"), {"a": 3, "b": 3})
+
+            self.write_model(yaml_dir, "a", 0.95, 1.0)
+            os.remove(os.path.join(yaml_dir, "b.yaml"))
+            self.assertEqual(store.sync_yaml_dir(yaml_dir), 1)
+            self.assertEqual(store.model_documents()["a"]["aggregate_metrics"]["accuracy"], 0.95)
+            self.assertNotIn("b", store.model_documents())
+            store.close()
+
+    def test_run_results_are_summarized_per_model_and_suite(self):
+        store = ResultsStore(":memory:")
+        run_id = store.start_run("plan abc")
+        for score, suite in ((0.5, "ppt"), (1.0, "ppt"), (0.9, "code")):
+            store.add_result(run_id, "m", {"metrics": {"accuracy": score}, "cost": 0.25,
+                                           "usage": {"prompt_tokens": 10, "completion_tokens": 30},
+                                           "timing": {"total_time": 2.0}}, {"suite": suite, "case": "c", "id": "u"})
+        store.add_result(run_id, "m", {"cost": 0.0, "reused_from": "u", "usage": {"prompt_tokens": 10}},
+                         {"suite": "code", "id": "v"})
+        document = store.finish_run(run_id)["m"]
+        self.assertEqual(document["aggregate_metrics"]["test_count"], 4)
+        self.assertEqual(document["aggregate_metrics"]["total_tokens"], 120)
+        self.assertAlmostEqual(document["aggregate_metrics"]["total_cost_usd"], 0.75)
+        self.assertAlmostEqual(document["results_by_category"]["ppt"]["accuracy"], 0.75)
+        self.assertEqual(store.model_documents()["m"], document)
+        self.assertEqual(store._conn.execute(
+            "SELECT COUNT(*) FROM results WHERE model = 'm' AND suite = 'code'").fetchone()[0], 2)
+
+    def test_partial_runs_do_not_hide_earlier_metrics(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            yaml_dir = os.path.join(tmp, "yaml")
+            os.makedirs(yaml_dir)
+            self.write_model(yaml_dir, "m1", 0.9, 1.0)
+            store = ResultsStore(os.path.join(tmp, "results.db"))
+            store.sync_yaml_dir(yaml_dir)
+            run_id = store.start_run("generation only")
+            store.add_result(run_id, "m1", {"response": "ok", "cost": 0.5}, {"suite": "code", "id": "u"})
+            store.finish_run(run_id)
+            document = store.model_documents()["m1"]
+            self.assertEqual(document["aggregate_metrics"]["accuracy"], 0.9)
+            self.assertEqual(document["aggregate_metrics"]["total_cost_usd"], 0.5)
+            self.assertEqual(set(document["results_by_category"]), {"ppt", "code"})
+            self.assertEqual(store.metric_values("accuracy"), {"m1": 0.9})
+            store.close()
+
+    def test_reporters_read_the_store(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            yaml_dir = os.path.join(tmp, "yaml")
+            os.makedirs(yaml_dir)
+            self.write_model(yaml_dir, "a", 0.9, 1.0)
+            self.write_model(yaml_dir, "b", 0.7, 0.5)
+            path = ModelComparison(tmp).generate_comparison_matrix(["accuracy"])
+            with open(path) as f:
+                matrix = yaml.safe_load(f)
+            self.assertIn("a", open_results_store(tmp).model_documents())
+            path = ModelComparison(tmp).generate_category_comparison("ppt")
+            with open(path) as f:
+                category = yaml.safe_load(f)
+        self.assertEqual([entry["model"] for entry in matrix["rankings"]["accuracy"]], ["a", "b"])
+        self.assertEqual(sorted(entry["model"] for entry in category["metrics_comparison"]["test_count"]), ["a", "b"])
+
+
+class TestReportCache(unittest.TestCase):
+    def test_extracts_are_recomputed_only_for_changed_models(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ReportCache(os.path.join(tmp, "report_cache.json"))
+            calls = []
+
+            def extract(document, metric):
+                calls.append(document["model"])
+                return document[metric] * 2
+
+            documents = {"a": {"model": "a", "x": 1}, "b": {"model": "b", "x": 2}}
+            self.assertEqual(cache.extract("double", documents, extract, "x"), {"a": 2, "b": 4})
+            documents["b"] = {"model": "b", "x": 5}
+            self.assertEqual(cache.extract("double", documents, extract, "x"), {"a": 2, "b": 10})
+            self.assertEqual(calls, ["a", "b", "b"])
+
+            # A subset leaves the other models cached; only models gone from the store are dropped
+            self.assertEqual(cache.extract("double", {"a": documents["a"]}, extract, "x"), {"a": 2})
+            self.assertEqual(cache.extract("double", documents, extract, "x", known_models=documents),
+                             {"a": 2, "b": 10})
+            self.assertEqual(calls, ["a", "b", "b"])
+
+            # A changed extract does not reuse the old one's values
+            extract.cache_version = 2
+            self.assertEqual(cache.extract("double", documents, extract, "x"), {"a": 2, "b": 10})
+            self.assertEqual(calls, ["a", "b", "b", "a", "b"])
+
+            output_file = os.path.join(tmp, "report.yaml")
+            self.assertTrue(cache.write_yaml(output_file, {"ranking": ["a", "b"]}))
+            reopened = ReportCache(cache.path)
+            self.assertFalse(reopened.write_yaml(output_file, {"ranking": ["a", "b"]}))
+            self.assertTrue(reopened.write_yaml(output_file, {"ranking": ["b", "a"]}))
+
+    def test_only_charts_whose_data_changed_are_redrawn(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            yaml_dir = os.path.join(tmp, "yaml")
+            os.makedirs(yaml_dir)
+            TestResultsStore.write_model(yaml_dir, "a", 0.9, 1.0)
+            TestResultsStore.write_model(yaml_dir, "b", 0.7, 0.5)
+            visualizer = Visualizer(tmp)
+            with patch("matplotlib.pyplot.savefig", side_effect=lambda path, **kwargs: open(path, "wb").close()) as savefig:
+                visualizer.create_bar_chart("accuracy")
+                visualizer.create_bar_chart("total_cost_usd")
+                visualizer.create_bar_chart("accuracy")
+                self.assertEqual(savefig.call_count, 2)
+                TestResultsStore.write_model(yaml_dir, "b", 0.7, 0.8)
+                visualizer.create_bar_chart("accuracy")
+                visualizer.create_bar_chart("total_cost_usd")
+                self.assertEqual(savefig.call_count, 3)
+
+
+class TestJSONLReporter(unittest.TestCase):
+    def test_records_are_flushed_as_they_arrive(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.jsonl")
+            stream = JSONLReporter(path, metadata={"plan_digest": "abc"}, flush_every=2, flush_interval=3600)
+            stream.write_result("m", {"unit_id": "u1", "response": "one"})
+            self.assertEqual(len(list(JSONLReporter.read_records(path))), 1)
+            stream.write_result("m", {"unit_id": "u2", "response": "two"})
+            self.assertEqual(len(list(JSONLReporter.read_records(path))), 3)
+            stream.close()
+
+            # A record cut short by a crash is dropped
+            with open(path, "ab") as f:
+                f.write(b'{"model": "m", "unit_id": "u3", "resp')
+            self.assertEqual(JSONLReporter.aggregate(path), {
+                "plan_digest": "abc",
+                "results": {"m": [{"unit_id": "u1", "response": "one"}, {"unit_id": "u2", "response": "two"}]}
+            })
+
+    def test_append_drops_a_partial_last_record(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.jsonl")
+            with JSONLReporter(path, metadata={"plan_digest": "abc"}) as stream:
+                stream.write_result("m", {"unit_id": "u1"})
+            with open(path, "ab") as f:
+                f.write(b'{"model": "m", "unit_id": "u2", "resp')
+            with JSONLReporter(path, metadata={"plan_digest": "abc"}, append=True) as stream:
+                stream.write_result("m", {"unit_id": "u2"})
+            self.assertEqual(JSONLReporter.aggregate(path)["results"], {"m": [{"unit_id": "u1"}, {"unit_id": "u2"}]})
+
+    def test_numpy_values_stay_numbers(self):
+        record = {"score": np.float64(0.5), "count": np.int64(3), "scores": np.array([1.0, 2.0])}
+        expected = {"score": 0.5, "count": 3, "scores": [1.0, 2.0]}
+        self.assertEqual(json.loads(jsonl_generator._dumps(record)), expected)
+        with patch.object(jsonl_generator, "orjson", None):
+            self.assertEqual(json.loads(jsonl_generator._dumps(record)), expected)
+
+    def test_finalize_matches_the_aggregate_reporters(self):
+        results = {"a": {"model_id": "a", "overall_score": 0.5, "metrics": {"accuracy": 0.5}},
+                   "b": {"model_id": "b", "error": "failed"}}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.jsonl")
+            with patch.object(jsonl_generator, "orjson", None):
+                self.assertTrue(JSONLReporter().generate_report(results, path))
+            self.assertTrue(JSONLReporter.finalize(path, os.path.join(tmp, "run.yaml")))
+            self.assertTrue(JSONLReporter.finalize(path, os.path.join(tmp, "run.json")))
+            with open(os.path.join(tmp, "run.yaml")) as f:
+                self.assertEqual(yaml.safe_load(f), results)
+            with open(os.path.join(tmp, "run.json")) as f:
+                self.assertEqual(json.load(f), results)
+
+if __name__ == "__main__":
+    unittest.main()